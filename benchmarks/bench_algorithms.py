@@ -0,0 +1,119 @@
+"""Benchmarks of the algorithm pipeline when switching time steps.
+
+The steps cycled through are preloaded into the engine's step cache, so
+the timings exclude reading the data file (see ``bench_engine``).
+"""
+import functools
+import itertools
+
+import numpy as np
+
+from kale import Engine
+from kale.algorithms import (
+    cell_data_to_point_data_algorithm,
+    contour_banded,
+    contour_banded_static,
+    subdivide_static_algorithm,
+    warp_by_scalar_algorithm,
+    warp_by_scalar_static_algorithm,
+)
+
+from .datasets import CELLS, STEPS, dataset
+
+# Time steps cycled through by each benchmark
+N_STEPS = 10
+
+
+class _Pipeline:
+    params = (CELLS,)
+    param_names = ("cells",)
+
+    def setup_engine(self, n_cells):
+        self.engine = Engine(*dataset(n_cells, min(STEPS)))
+        steps = range(1, min(N_STEPS, self.engine.max_time_step) + 1)
+        for step in steps:
+            self.engine.preload(step)
+        self.steps = itertools.cycle(steps)
+
+    def update(self, *algorithms):
+        self.engine.time_step = next(self.steps)
+        for algorithm in algorithms:
+            algorithm.Update()
+
+    def teardown(self, *params):
+        self.engine.close()
+
+
+class Baseline(_Pipeline):
+    """Surface and cell to point data, common to the contouring benchmarks."""
+
+    def setup(self, n_cells):
+        self.setup_engine(n_cells)
+        self.points = cell_data_to_point_data_algorithm(self.engine.algorithm)
+        self.points.Update()
+
+    def time_update(self, n_cells):
+        self.update(self.points)
+
+
+class ContourBanded(_Pipeline):
+    """Bands and contour edges of the VTK and the NumPy implementations."""
+
+    params = (CELLS, ["vtk", "numpy"], [21])
+    param_names = ("cells", "implementation", "levels")
+
+    def setup(self, n_cells, implementation, n_levels):
+        self.setup_engine(n_cells)
+        contour = dict(vtk=contour_banded, numpy=contour_banded_static)[implementation]
+        levels = np.linspace(-2, 2, n_levels)
+        self.bands, self.edges = contour(
+            self.engine.algorithm, levels, scalars="cumulative_slip"
+        )
+        self.update(self.bands, self.edges)
+
+    def time_update(self, n_cells, implementation, n_levels):
+        self.update(self.bands, self.edges)
+
+
+class Smoothed(_Pipeline):
+    """Loop subdivision of the surface and its data."""
+
+    params = (CELLS, [1, 2, 3])
+    param_names = ("cells", "subdivisions")
+
+    def setup(self, n_cells, subdivisions):
+        self.setup_engine(n_cells)
+        self.engine.smoothing_iterations = subdivisions
+        self.smoothed = self.engine.algorithm_smoothed
+        self.smoothed.Update()
+
+    def time_build(self, n_cells, subdivisions):
+        # Subdivided geometry and smoothing operator, without a disk cache
+        subdivide_static_algorithm(self.engine.algorithm, subdivisions).Update()
+
+    def time_update(self, n_cells, subdivisions):
+        self.update(self.smoothed)
+
+
+class Warp(_Pipeline):
+    """Warping the smoothed surface by a point data array."""
+
+    params = (CELLS, ["vtk", "static", "static-normals"])
+    param_names = ("cells", "implementation")
+
+    def setup(self, n_cells, implementation):
+        self.setup_engine(n_cells)
+        if implementation == "vtk":
+            warp = warp_by_scalar_algorithm
+        else:
+            warp = functools.partial(
+                warp_by_scalar_static_algorithm,
+                compute_normals=implementation == "static-normals",
+            )
+        self.warped = warp(
+            self.engine.algorithm_smoothed, scalars="geometric_moment", factor=0.1
+        )
+        self.warped.Update()
+
+    def time_update(self, n_cells, implementation):
+        self.update(self.warped)
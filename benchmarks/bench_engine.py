@@ -0,0 +1,99 @@
+"""Benchmarks of Engine setup, time step switching and color limits."""
+import itertools
+import os
+import shutil
+import tempfile
+
+from kale import Engine
+from kale.cache import CACHE_DIR_ENV
+from kale.stats import STATS_SUFFIX
+
+from .datasets import CELLS, STEPS, dataset
+
+
+class EngineInit:
+    """Reading the mesh and the first time step, then the surface."""
+
+    params = (CELLS, STEPS, [False, True])
+    param_names = ("cells", "steps", "geometry_cache")
+
+    def setup(self, n_cells, n_steps, geometry_cache):
+        os.environ.pop(CACHE_DIR_ENV, None)
+        self.filenames = dataset(n_cells, n_steps)
+        self.cache_dir = None
+        if geometry_cache:
+            self.cache_dir = tempfile.mkdtemp(prefix="kale-bench-cache-")
+            engine = Engine(*self.filenames, cache_dir=self.cache_dir)
+            engine.algorithm.Update()
+            engine.close()
+
+    def teardown(self, n_cells, n_steps, geometry_cache):
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def time_init(self, n_cells, n_steps, geometry_cache):
+        Engine(*self.filenames, cache_dir=self.cache_dir).close()
+
+    def time_init_surface(self, n_cells, n_steps, geometry_cache):
+        engine = Engine(*self.filenames, cache_dir=self.cache_dir)
+        engine.algorithm.Update()
+        engine.close()
+
+
+class TimeStep:
+    """Switching to a time step that is not cached."""
+
+    params = (CELLS, STEPS, [None, "float32", "fixed16"])
+    param_names = ("cells", "steps", "precision")
+
+    def setup(self, n_cells, n_steps, precision):
+        self.engine = Engine(
+            *dataset(n_cells, n_steps), cache_bytes=0, precision=precision
+        )
+        self.surface = self.engine.algorithm
+        self.surface.Update()
+        self.steps = itertools.cycle(range(1, self.engine.max_time_step + 1))
+
+    def teardown(self, n_cells, n_steps, precision):
+        self.engine.close()
+
+    def time_switch(self, n_cells, n_steps, precision):
+        self.engine.time_step = next(self.steps)
+
+    def time_switch_update(self, n_cells, n_steps, precision):
+        self.engine.time_step = next(self.steps)
+        self.surface.Update()
+
+    def peakmem_switch(self, n_cells, n_steps, precision):
+        for _ in range(10):
+            self.engine.time_step = next(self.steps)
+
+
+class Clim:
+    """Color limits over the full time history, without and with the sidecar."""
+
+    params = (CELLS, STEPS, [False, True])
+    param_names = ("cells", "steps", "sidecar")
+    # The first call writes the sidecar file, so each timing needs a setup
+    number = 1
+    repeat = 3
+
+    def setup(self, n_cells, n_steps, sidecar):
+        _, data_filename = filenames = dataset(n_cells, n_steps)
+        stats_filename = data_filename.with_name(data_filename.name + STATS_SUFFIX)
+        if sidecar:
+            engine = Engine(*filenames)
+            engine.clim("cumulative_slip")
+            engine.close()
+        elif stats_filename.exists():
+            stats_filename.unlink()
+        self.engine = Engine(*filenames)
+
+    def teardown(self, n_cells, n_steps, sidecar):
+        self.engine.close()
+
+    def time_clim(self, n_cells, n_steps, sidecar):
+        self.engine.clim("cumulative_slip")
+
+    def time_clim_percentiles(self, n_cells, n_steps, sidecar):
+        self.engine.clim("cumulative_slip", percentiles=(1, 99))
@@ -0,0 +1,52 @@
+"""Benchmark of movie writing throughput."""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyvista as pv
+
+from kale import save_movie
+from kale.render import build_plotter
+
+from .datasets import CELLS, STEPS, dataset
+
+N_FRAMES = 50
+
+
+class SaveMovie:
+    """Frames per second of :func:`kale.save_movie` for a contoured scene."""
+
+    params = (CELLS, [0, 1])
+    param_names = ("cells", "smoothing_iterations")
+    number = 1
+    repeat = 2
+    timeout = 600
+
+    def setup(self, n_cells, smoothing_iterations):
+        if not pv.system_supports_plotting():
+            raise NotImplementedError("Rendering is not supported on this system.")
+        mesh_filename, data_filename = dataset(n_cells, min(STEPS))
+        scene = dict(
+            mesh=str(mesh_filename),
+            data=str(data_filename),
+            scalars="cumulative_slip",
+            levels=np.linspace(-2, 2, 21).tolist(),
+            smoothing_iterations=smoothing_iterations,
+        )
+        self.engine, self.plotter = build_plotter(scene)
+        self.times = range(min(N_FRAMES, self.engine.max_time_step))
+        fd, self.filename = tempfile.mkstemp(suffix=".mp4")
+        os.close(fd)
+
+    def teardown(self, n_cells, smoothing_iterations):
+        self.plotter.close()
+        self.engine.close()
+        os.unlink(self.filename)
+
+    def track_frames_per_second(self, n_cells, smoothing_iterations):
+        tic = time.perf_counter()
+        save_movie(self.engine, self.plotter, self.filename, times=self.times)
+        return len(self.times) / (time.perf_counter() - tic)
+
+    track_frames_per_second.unit = "frames/s"
@@ -0,0 +1,104 @@
+"""Synthetic meshes and data files for the benchmarks.
+
+Datasets are written once per size and reused across runs from
+``$KALE_BENCH_DATA`` (a ``kale-benchmarks`` temporary directory by
+default). The sizes benchmarked are set with comma-separated lists in
+``$KALE_BENCH_CELLS`` and ``$KALE_BENCH_STEPS``, e.g.
+
+    KALE_BENCH_CELLS=10000,100000,1000000 KALE_BENCH_STEPS=1000,100000
+
+Data files hold ``n_steps * n_cells`` float64 values per variable, so
+the largest combinations need tens of GB of disk.
+"""
+import os
+from pathlib import Path
+import tempfile
+
+import numpy as np
+import pyvista as pv
+
+DATA_ENV = "KALE_BENCH_DATA"
+CELLS_ENV = "KALE_BENCH_CELLS"
+STEPS_ENV = "KALE_BENCH_STEPS"
+
+VARIABLES = ("cumulative_slip", "last_event_slip", "geometric_moment")
+
+
+def _sizes(env, default):
+    return [int(value) for value in os.environ.get(env, default).split(",")]
+
+
+CELLS = _sizes(CELLS_ENV, "10000,100000")
+STEPS = _sizes(STEPS_ENV, "1000")
+
+
+def data_directory():
+    directory = os.environ.get(DATA_ENV) or Path(
+        tempfile.gettempdir(), "kale-benchmarks"
+    )
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _write_atomic(filename, write):
+    # Partially written files of an interrupted run are never reused
+    fd, tmp = tempfile.mkstemp(dir=filename.parent, suffix=filename.suffix)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def make_mesh(n_cells):
+    """A wavy triangulated plane with about ``n_cells`` triangles."""
+    n = max(int(np.sqrt(n_cells / 2)), 1)
+    mesh = pv.Plane(i_size=2, j_size=2, i_resolution=n, j_resolution=n)
+    mesh = mesh.triangulate()
+    mesh.points[:, 2] = 0.1 * np.sin(4 * mesh.points[:, 0])
+    mesh = mesh.cast_to_unstructured_grid()
+    mesh.clear_data()
+    return mesh
+
+
+def write_data(filename, centers, n_steps, seed=0, block_bytes=64 * 2**20):
+    """Write smooth random fields to a netCDF4 file chunked per step.
+
+    Every variable is a few fixed spatial modes with random amplitudes
+    per step. Blocks of at most ``block_bytes`` are written at a time.
+    """
+    import netCDF4
+
+    rng = np.random.default_rng(seed)
+    x, y = centers[:, 0], centers[:, 1]
+    modes = np.stack([np.sin(3 * x), np.cos(5 * y), np.sin(7 * x) * np.cos(2 * y)])
+    n_cells = len(centers)
+    block = max(block_bytes // (8 * n_cells), 1)
+    with netCDF4.Dataset(filename, "w") as ds:
+        ds.createDimension("time", n_steps)
+        ds.createDimension("cell", n_cells)
+        for name in VARIABLES:
+            var = ds.createVariable(
+                name, "f8", ("time", "cell"), chunksizes=(1, n_cells)
+            )
+            for start in range(0, n_steps, block):
+                stop = min(start + block, n_steps)
+                amplitudes = rng.random((stop - start, len(modes)))
+                var[start:stop] = amplitudes @ modes
+
+
+def dataset(n_cells, n_steps):
+    """Mesh and data filenames of a cached synthetic dataset."""
+    directory = data_directory()
+    mesh_filename = directory / f"mesh_{n_cells}.vtk"
+    data_filename = directory / f"data_{n_cells}_{n_steps}.nc"
+    if not mesh_filename.exists():
+        mesh = make_mesh(n_cells)
+        _write_atomic(mesh_filename, mesh.save)
+    if not data_filename.exists():
+        centers = pv.read(mesh_filename).cell_centers().points
+        _write_atomic(data_filename, lambda name: write_data(name, centers, n_steps))
+    return mesh_filename, data_filename
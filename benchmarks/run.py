@@ -0,0 +1,175 @@
+"""Run the benchmarks without asv and keep a history of the results.
+
+The benchmark modules follow the asv conventions (see ``asv.conf.json``
+and https://asv.readthedocs.io), so ``asv run`` / ``asv continuous``
+work as usual. This runner is a dependency-free alternative: it times
+every ``time_*`` method (best of ``repeat`` runs of ``number`` calls),
+records ``track_*`` values, and appends one JSON line per run with the
+commit and the library versions to a history file.
+
+    python -m benchmarks.run                      # everything
+    python -m benchmarks.run ContourBanded Clim   # matching benchmarks
+    python -m benchmarks.run --compare            # flag regressions
+
+``--compare`` reports benchmarks that got slower than the previous run
+in the history by more than ``--threshold``.
+"""
+import argparse
+import datetime
+import importlib
+import inspect
+import itertools
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+HISTORY = Path(__file__).parent / "results.jsonl"
+MODULES = ("bench_engine", "bench_algorithms", "bench_movie")
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for name in ("kale", "pyvista", "vtk", "numpy", "scipy", "xarray", "netCDF4"):
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except (ImportError, AttributeError):
+            pass
+    return versions
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmarks(patterns=()):
+    """Yield ``(name, cls)`` of the benchmark classes matching ``patterns``."""
+    for module_name in MODULES:
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if name.startswith("_") or cls.__module__ != module.__name__:
+                continue
+            name = f"{module_name}.{name}"
+            if patterns and not any(p in name for p in patterns):
+                continue
+            yield name, cls
+
+
+def _measure(bench, method, values, number):
+    func = getattr(bench, method)
+    if method.startswith("track_"):
+        return func(*values), getattr(func, "unit", "")
+    timer = timeit.Timer(lambda: func(*values), timer=time.perf_counter)
+    if not number:
+        # Aim for about 0.1 s per repeat, as asv does
+        number = max(1, int(0.1 / max(timer.timeit(1), 1e-6)))
+    return timer.timeit(number) / number, "s"
+
+
+def run_class(cls, name, repeat=None):
+    """Run the methods of one benchmark class for all its parameters.
+
+    As in asv, ``setup`` and ``teardown`` run around every repeat and a
+    ``NotImplementedError`` raised by ``setup`` skips the benchmark.
+    Timings are the best of the repeats.
+    """
+    params = getattr(cls, "params", ())
+    param_names = getattr(cls, "param_names", ())
+    number = getattr(cls, "number", 0)
+    methods = [m for m in dir(cls) if m.startswith(("time_", "track_"))]
+    results = {}
+    for values in itertools.product(*params):
+        label = ", ".join(f"{k}={v}" for k, v in zip(param_names, values))
+        for method in methods:
+            key = f"{name}.{method}({label})"
+            n_repeat = 1 if method.startswith("track_") else repeat
+            n_repeat = n_repeat or getattr(cls, "repeat", 0) or 5
+            runs = []
+            for _ in range(n_repeat):
+                bench = cls()
+                try:
+                    if hasattr(bench, "setup"):
+                        bench.setup(*values)
+                except NotImplementedError:
+                    break
+                try:
+                    value, unit = _measure(bench, method, values, number)
+                finally:
+                    if hasattr(bench, "teardown"):
+                        bench.teardown(*values)
+                runs.append(value)
+            if not runs:
+                print(f"{key:<72} skipped")
+                continue
+            results[key] = value = min(runs) if unit == "s" else max(runs)
+            shown = f"{1e3 * value:.3f} ms" if unit == "s" else f"{value:.3f} {unit}"
+            print(f"{key:<72} {shown}")
+    return results
+
+
+def compare(previous, current, threshold):
+    """Return the keys of ``current`` that regressed relative to ``previous``."""
+    regressions = []
+    for key, value in current.items():
+        old = previous.get(key)
+        if old is None or not old:
+            continue
+        # Timings regress upwards, tracked rates (e.g. frames/s) downwards
+        ratio = value / old if ".time_" in key else old / value
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("patterns", nargs="*", help="Substrings of benchmark names.")
+    parser.add_argument("--repeat", type=int, help="Override the number of repeats.")
+    parser.add_argument("--history", type=Path, default=HISTORY)
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, cls in benchmarks(args.patterns):
+        results.update(run_class(cls, name, repeat=args.repeat))
+
+    history = []
+    if args.history.exists():
+        with open(args.history) as f:
+            history = [json.loads(line) for line in f if line.strip()]
+    if args.save:
+        entry = dict(
+            date=datetime.datetime.now().isoformat(timespec="seconds"),
+            commit=_commit(),
+            machine=platform.node(),
+            versions=_versions(),
+            results=results,
+        )
+        with open(args.history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    if args.compare and history:
+        regressions = compare(history[-1]["results"], results, args.threshold)
+        for key, ratio in regressions:
+            print(f"REGRESSION {key}: {ratio:.2f}x")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,5 +3,6 @@ __version__ = "0.0.1"
 
 from kale.algorithms import *
 from kale.engine import Engine
+from kale.multi import MultiEngine
 from kale import theme
 from kale.widgets import time_controls, save_movie, show_ui
@@ -16,13 +16,69 @@ from pyvista.utilities.algorithms import (
     set_algorithm_input,
 )
 
+from kale.cache import cache_key, mesh_from_arrays, mesh_to_arrays
+from kale.contour import TriangleBands
 from kale.engine import Engine
 
+# NumPy functions and constants available to string field expressions
+EXPRESSION_FUNCTIONS = (
+    "abs",
+    "arccos",
+    "arccosh",
+    "arcsin",
+    "arcsinh",
+    "arctan",
+    "arctan2",
+    "arctanh",
+    "ceil",
+    "clip",
+    "cos",
+    "cosh",
+    "e",
+    "exp",
+    "expm1",
+    "floor",
+    "hypot",
+    "inf",
+    "isfinite",
+    "isnan",
+    "log",
+    "log10",
+    "log1p",
+    "log2",
+    "maximum",
+    "minimum",
+    "nan",
+    "pi",
+    "power",
+    "sign",
+    "sin",
+    "sinh",
+    "sqrt",
+    "square",
+    "tan",
+    "tanh",
+    "where",
+)
+
 
 class EngineAlgorithm(_vtk.VTKPythonAlgorithmBase):
-    """vtkAlgorithm container for Engine."""
+    """vtkAlgorithm container for Engine.
+
+    Parameters
+    ----------
+    engine : kale.Engine
+        Engine providing the mesh.
 
-    def __init__(self, engine: Engine):
+    arrays : Sequence[str], optional
+        Data variables passed downstream. Defaults to all of them. The
+        algorithm is only modified when one of these (or the geometry)
+        changes, so e.g. ``arrays=()`` gives a geometry-only source that
+        time step changes do not re-execute.
+
+    """
+
+    def __init__(self, engine: Engine, arrays=None):
         """Initialize algorithm."""
         _vtk.VTKPythonAlgorithmBase.__init__(
             self,
@@ -31,19 +87,52 @@ class EngineAlgorithm(_vtk.VTKPythonAlgorithmBase):
             outputType="vtkUnstructuredGrid",
         )
         self.engine = engine
-        self.engine.add_modified_callback(self.Modified)
+        self.arrays = None if arrays is None else frozenset(arrays)
+        self.engine.add_modified_callback(self._engine_modified)
+
+    def _engine_modified(self):
+        changed = self.engine.changed_arrays
+        if changed is None or (
+            changed if self.arrays is None else changed & self.arrays
+        ):
+            self.Modified()
 
     def RequestData(self, request, inInfo, outInfo):
         """Perform algorithm execution."""
         try:
             out = self.GetOutputData(outInfo, 0)
             out.ShallowCopy(self.engine.mesh)
+            if self.arrays is not None:
+                cell_data = out.GetCellData()
+                for name in self.engine.keys:
+                    if name not in self.arrays:
+                        cell_data.RemoveArray(name)
         except Exception as e:  # pragma: no cover
             traceback.print_exc()
             raise e
         return 1
 
 
+def request_arrays(source, *names):
+    """Request arrays from any Engine upstream of ``source``.
+
+    Walks the VTK pipeline upstream of ``source`` and asks every
+    :class:`EngineAlgorithm` found to load ``names`` on each time step.
+    This is what lets a lazy :class:`kale.Engine` load only the arrays
+    used downstream. Meshes (not algorithms) are ignored.
+    """
+    if isinstance(source, _vtk.vtkAlgorithmOutput):
+        source = source.GetProducer()
+    if not isinstance(source, _vtk.vtkAlgorithm):
+        return
+    if isinstance(source, EngineAlgorithm):
+        source.engine.request(*names)
+        return
+    for port in range(source.GetNumberOfInputPorts()):
+        for connection in range(source.GetNumberOfInputConnections(port)):
+            request_arrays(source.GetInputAlgorithm(port, connection), *names)
+
+
 class OutputPortAlgorithm(PreserveTypeAlgorithmBase):
     """vtkAlgorithm container for output ports.
 
@@ -106,6 +195,32 @@ class RenameArrayAlgorithm(PreserveTypeAlgorithmBase):
         return 1
 
 
+def _point_scalars_surface(self, scalars):
+    """Prepare a PolyData algorithm with ``scalars`` active as point data."""
+    if scalars is None:
+        raise RuntimeError("Please set scalars")
+
+    request_arrays(self, scalars)
+    self, algo = algorithm_to_mesh_handler(self)
+
+    if not isinstance(self, _vtk.vtkPolyData):
+        algo = extract_surface_algorithm(algo or self)
+        self, algo = algorithm_to_mesh_handler(algo)
+
+    if algo is None:
+        raise TypeError(
+            "This version of the filter currently only supports algorithms."
+        )
+
+    if scalars not in self.point_data:
+        algo = cell_data_to_point_data_algorithm(algo, pass_cell_data=False)
+        self, algo = algorithm_to_mesh_handler(algo)
+    if scalars not in self.point_data:
+        raise ValueError("Scalars not present as POINT data.")
+    algo = active_scalars_algorithm(algo, scalars, preference="point")
+    return algorithm_to_mesh_handler(algo)
+
+
 def contour_banded(
     self,
     contours,
@@ -171,27 +286,7 @@ def contour_banded(
         Get edges with `alg.GetContourEdgesOutput()`
 
     """
-    if scalars is None:
-        raise RuntimeError("Please set scalars")
-
-    self, algo = algorithm_to_mesh_handler(self)
-
-    if not isinstance(self, _vtk.vtkPolyData):
-        algo = extract_surface_algorithm(algo or self)
-        self, algo = algorithm_to_mesh_handler(algo)
-
-    if algo is None:
-        raise TypeError(
-            "This version of the filter currently only supports algorithms."
-        )
-
-    if scalars not in self.point_data:
-        algo = cell_data_to_point_data_algorithm(algo, pass_cell_data=False)
-        self, algo = algorithm_to_mesh_handler(algo)
-    if scalars not in self.point_data:
-        raise ValueError("Scalars not present as POINT data.")
-    algo = active_scalars_algorithm(algo, scalars, preference="point")
-    self, algo = algorithm_to_mesh_handler(algo)
+    self, algo = _point_scalars_surface(self, scalars)
 
     if rng is None:
         rng = (self.active_scalars.min(), self.active_scalars.max())
@@ -231,6 +326,186 @@ def contour_banded(
     return rename, OutputPortAlgorithm(contour, 1)
 
 
+def _cell_array(offsets, connectivity):
+    """Create a vtkCellArray from offsets and connectivity arrays."""
+    # Deep copies: the cell array outlives the Python wrappers that
+    # would otherwise keep the NumPy buffers alive
+    cells = _vtk.vtkCellArray()
+    cells.SetData(
+        _vtk.numpy_to_vtkIdTypeArray(
+            np.ascontiguousarray(offsets, dtype=np.int64), deep=True
+        ),
+        _vtk.numpy_to_vtkIdTypeArray(
+            np.ascontiguousarray(connectivity, dtype=np.int64), deep=True
+        ),
+    )
+    return cells
+
+
+def bands_to_polydata(result, scalars, scalar_mode="value"):
+    """Build the band and edge meshes of :class:`kale.contour.TriangleBands`.
+
+    Parameters
+    ----------
+    result : dict
+        Output of a :class:`kale.contour.TriangleBands` call.
+
+    scalars : str
+        Name of the contoured scalars.
+
+    scalar_mode : str, default: 'value'
+        Output the band cell scalars as the band's lower level
+        (``'value'``) or as the band index (``'index'``).
+
+    Returns
+    -------
+    tuple
+        ``(bands, edges)`` PolyData.
+
+    """
+    point_data = dict(result["point_data"])
+    bands = pyvista.PolyData()
+    bands.points = result["points"]
+    bands.SetPolys(_cell_array(result["offsets"], result["connectivity"]))
+    bands.point_data[scalars] = point_data.pop(None)
+    for name, array in point_data.items():
+        bands.point_data[name] = array
+    if scalar_mode == "value":
+        bands.cell_data[scalars] = result["band_values"]
+    else:
+        bands.cell_data[scalars] = result["band_index"]
+    bands.point_data.active_scalars_name = scalars
+
+    lines = result["lines"]
+    edges = pyvista.PolyData()
+    edges.points = bands.points
+    edges.SetLines(_cell_array(np.arange(0, lines.size + 1, 2), lines.ravel()))
+    return bands, edges
+
+
+class BandedContourAlgorithm(_vtk.VTKPythonAlgorithmBase):
+    """vtkAlgorithm for banded contours of a static triangle surface.
+
+    NumPy alternative to ``vtkBandedPolyDataContourFilter`` built on
+    :class:`kale.contour.TriangleBands`. The edge connectivity of the
+    input is computed once and reused for as long as the input
+    triangles do not change, so only the clipping of triangles against
+    the levels runs on each execution.
+
+    Output port 0 holds the bands and output port 1 the contour edges.
+
+    """
+
+    def __init__(self, levels, scalars, clipping=False, scalar_mode="value"):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            inputType="vtkPolyData",
+            nOutputPorts=2,
+            outputType="vtkPolyData",
+        )
+        if scalar_mode not in ("value", "index"):
+            raise ValueError(
+                f'Invalid scalar mode "{scalar_mode}". Should be either "value" or "index".'
+            )
+        self.levels = np.asarray(levels)
+        self.scalars = scalars
+        self.clipping = clipping
+        self.scalar_mode = scalar_mode
+        self._bands = None
+        self._faces = None
+
+    def _triangle_bands(self, mesh):
+        faces = mesh.faces
+        if self._faces is None or not np.array_equal(faces, self._faces):
+            if not mesh.is_all_triangles:
+                raise ValueError("Input must be a triangle mesh.")
+            self._bands = TriangleBands(faces.reshape(-1, 4)[:, 1:])
+            self._faces = faces.copy()
+        return self._bands
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
+            point_data = {
+                name: inp.point_data[name]
+                for name in inp.point_data.keys()
+                if name != self.scalars
+            }
+            result = self._triangle_bands(inp)(
+                inp.points,
+                inp.point_data[self.scalars],
+                self.levels,
+                clipping=self.clipping,
+                point_data=point_data,
+            )
+            bands, edges = bands_to_polydata(result, self.scalars, self.scalar_mode)
+            self.GetOutputData(outInfo, 0).ShallowCopy(bands)
+            self.GetOutputData(outInfo, 1).ShallowCopy(edges)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def contour_banded_static(
+    self,
+    contours,
+    scalars,
+    rng=None,
+    scalar_mode="value",
+    clipping=False,
+):
+    """Generate filled contours of a surface with static topology.
+
+    Drop-in alternative to :func:`contour_banded` using
+    :class:`BandedContourAlgorithm`, which precomputes the edge
+    connectivity of the triangle surface once and contours all
+    triangles against all levels in vectorized NumPy passes.
+
+    Parameters
+    ----------
+    contours : int or Sequence
+        Number of contours or a sequence of contour values to use.
+
+    scalars : str
+        The name of the scalar array to use for contouring.
+
+    rng : Sequence, optional
+        Range of the scalars used to generate ``contours`` levels when
+        an integer is given. Defaults to the range of ``scalars``.
+
+    scalar_mode : str, default: 'value'
+        Output the band cell scalars as the band's lower level
+        (``'value'``) or as the band index (``'index'``).
+
+    clipping : bool, default: False
+        Only return the bands within the contour levels.
+
+    Returns
+    -------
+    tuple
+        Algorithms for the bands and for the contour edges.
+
+    """
+    self, algo = _point_scalars_surface(self, scalars)
+
+    if isinstance(contours, int):
+        if rng is None:
+            rng = (self.active_scalars.min(), self.active_scalars.max())
+        contours = np.linspace(rng[0], rng[1], contours)
+    elif not isinstance(contours, (np.ndarray, collections.abc.Sequence)):
+        raise TypeError("isosurfaces not understood.")
+
+    contour = BandedContourAlgorithm(
+        contours, scalars, clipping=clipping, scalar_mode=scalar_mode
+    )
+    set_algorithm_input(contour, algo or self, port=0)
+    return contour, OutputPortAlgorithm(contour, 1)
+
+
 def subdivide_algorithm(inp, n):
     """Subdivide and smooth the data fields on mesh."""
     sfilter = _vtk.vtkLoopSubdivisionFilter()
@@ -239,11 +514,322 @@ def subdivide_algorithm(inp, n):
     return sfilter
 
 
+class _StaticGeometry:
+    """Track the points and cells of an algorithm input across executions.
+
+    Inputs sharing their points and cells with the previous execution
+    (e.g. shallow copies of a static mesh) are recognized from VTK
+    modification times. Otherwise the geometry is compared by value.
+    """
+
+    def __init__(self):
+        self._mtime = None
+        self.arrays = None
+
+    @staticmethod
+    def _mtime_of(mesh):
+        if isinstance(mesh, _vtk.vtkPolyData):
+            parts = [
+                mesh.GetPoints(),
+                mesh.GetVerts(),
+                mesh.GetLines(),
+                mesh.GetPolys(),
+                mesh.GetStrips(),
+            ]
+        else:
+            parts = [mesh.GetPoints(), mesh.GetCells(), mesh.GetCellTypesArray()]
+        return tuple(0 if part is None else part.GetMTime() for part in parts)
+
+    def changed(self, mesh):
+        """Whether the geometry of ``mesh`` differs from the last call."""
+        mtime = self._mtime_of(mesh)
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        arrays = mesh_to_arrays(mesh)
+        if self.arrays is not None and all(
+            np.array_equal(arrays[name], self.arrays[name]) for name in arrays
+        ):
+            return False
+        self.arrays = {name: array.copy() for name, array in arrays.items()}
+        return True
+
+    def key(self, *parts):
+        """Content-addressed cache key of the geometry and ``parts``."""
+        return cache_key(*parts, *(self.arrays[name] for name in sorted(self.arrays)))
+
+
+class StaticSurfaceAlgorithm(_vtk.VTKPythonAlgorithmBase):
+    """vtkAlgorithm to extract the surface of a mesh with static geometry.
+
+    Equivalent to :func:`extract_surface_algorithm`, but the surface is
+    only extracted when the input points or cells change. Other
+    executions map the input data arrays onto the cached surface.
+
+    Parameters
+    ----------
+    cache : kale.cache.GeometryCache, optional
+        On-disk cache of the extracted surface.
+
+    """
+
+    def __init__(self, cache=None):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            inputType="vtkDataSet",
+            nOutputPorts=1,
+            outputType="vtkPolyData",
+        )
+        self.cache = cache
+        self._geometry = _StaticGeometry()
+        self._surface = None
+        self._point_ids = None
+        self._cell_ids = None
+
+    def _update_surface(self, mesh):
+        if not self._geometry.changed(mesh) and self._surface is not None:
+            return
+        key = self._geometry.key("surface")
+        arrays = self.cache.get(key) if self.cache is not None else None
+        if arrays is None:
+            surface = mesh_from_arrays(self._geometry.arrays).extract_surface(
+                pass_pointid=True, pass_cellid=True
+            )
+            arrays = mesh_to_arrays(surface)
+            arrays["point_ids"] = np.asarray(surface.point_data["vtkOriginalPointIds"])
+            arrays["cell_ids"] = np.asarray(surface.cell_data["vtkOriginalCellIds"])
+            if self.cache is not None:
+                self.cache.put(key, arrays)
+        point_ids = arrays.pop("point_ids")
+        cell_ids = arrays.pop("cell_ids")
+        # Identity maps (e.g. triangle meshes) pass arrays through uncopied
+        if np.array_equal(point_ids, np.arange(mesh.GetNumberOfPoints())):
+            point_ids = None
+        if np.array_equal(cell_ids, np.arange(mesh.GetNumberOfCells())):
+            cell_ids = None
+        self._surface = mesh_from_arrays(arrays)
+        self._point_ids = point_ids
+        self._cell_ids = cell_ids
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
+            self._update_surface(inp)
+            out = pyvista.PolyData()
+            out.ShallowCopy(self._surface)
+            for data, out_data, ids in (
+                (inp.point_data, out.point_data, self._point_ids),
+                (inp.cell_data, out.cell_data, self._cell_ids),
+            ):
+                for name in data.keys():
+                    array = data[name]
+                    out_data[name] = array if ids is None else array[ids]
+                if data.active_scalars_name is not None:
+                    out_data.active_scalars_name = data.active_scalars_name
+            self.GetOutputData(outInfo, 0).ShallowCopy(out)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def extract_surface_static_algorithm(inp, cache=None):
+    """Extract the surface of a mesh with static geometry.
+
+    Drop-in alternative to :func:`extract_surface_algorithm` that only
+    extracts the surface once. See :class:`StaticSurfaceAlgorithm`.
+    """
+    sfilter = StaticSurfaceAlgorithm(cache=cache)
+    set_algorithm_input(sfilter, inp)
+    return sfilter
+
+
+class StaticSubdivisionAlgorithm(_vtk.VTKPythonAlgorithmBase):
+    """vtkAlgorithm to smooth cell data onto a subdivided static surface.
+
+    Equivalent to ``vtkCellDataToPointData`` followed by
+    ``vtkLoopSubdivisionFilter``, but the subdivided geometry and the
+    combined smoothing operator are built once as a
+    :class:`kale.subdivision.SmoothedSurface` and reused for as long as
+    the input points and triangles do not change. Each execution is
+    then one sparse matrix-vector product per cell array.
+
+    Parameters
+    ----------
+    n : int, default: 1
+        Number of subdivisions.
+
+    cache : kale.cache.GeometryCache, optional
+        On-disk cache of the subdivided surfaces.
+
+    """
+
+    def __init__(self, n=1, cache=None):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            inputType="vtkPolyData",
+            nOutputPorts=1,
+            outputType="vtkPolyData",
+        )
+        self._n = n
+        self.cache = cache
+        self._geometry = _StaticGeometry()
+        self._surfaces = {}
+
+    def GetNumberOfSubdivisions(self):
+        """Get the number of subdivisions."""
+        return self._n
+
+    def SetNumberOfSubdivisions(self, n):
+        """Set the number of subdivisions."""
+        if n != self._n:
+            self._n = n
+            self.Modified()
+
+    def _smoothed_surface(self, mesh):
+        if self._geometry.changed(mesh):
+            if not mesh.is_all_triangles:
+                raise ValueError("Input must be a triangle mesh.")
+            self._surfaces = {}
+        if self._n not in self._surfaces:
+            from kale.subdivision import SmoothedSurface
+
+            key = self._geometry.key("loop", self._n)
+            arrays = self.cache.get(key) if self.cache is not None else None
+            if arrays is not None:
+                surface = SmoothedSurface.from_arrays(arrays)
+            else:
+                arrays = self._geometry.arrays
+                surface = SmoothedSurface(
+                    arrays["points"], arrays["faces"].reshape(-1, 4)[:, 1:], self._n
+                )
+                if self.cache is not None:
+                    self.cache.put(key, surface.to_arrays())
+            geometry = pyvista.PolyData()
+            geometry.points = surface.points
+            geometry.SetPolys(
+                _cell_array(
+                    np.arange(0, surface.triangles.size + 1, 3),
+                    surface.triangles.ravel(),
+                )
+            )
+            self._surfaces[self._n] = surface, geometry
+        return self._surfaces[self._n]
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
+            surface, geometry = self._smoothed_surface(inp)
+            out = pyvista.PolyData()
+            out.ShallowCopy(geometry)
+            for name in inp.cell_data.keys():
+                out.point_data[name] = surface(inp.cell_data[name])
+            active = inp.cell_data.active_scalars_name
+            if active is not None:
+                out.point_data.active_scalars_name = active
+            self.GetOutputData(outInfo, 0).ShallowCopy(out)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def subdivide_static_algorithm(inp, n, cache=None):
+    """Subdivide and smooth the data fields on a mesh with static geometry.
+
+    Drop-in alternative to :func:`subdivide_algorithm` applied to the
+    point data of ``inp`` that caches the subdivided geometry. Takes
+    the cell data of ``inp`` directly.
+    """
+    sfilter = StaticSubdivisionAlgorithm(n, cache=cache)
+    set_algorithm_input(sfilter, inp)
+    return sfilter
+
+
+class StaticFeatureEdgesAlgorithm(_vtk.VTKPythonAlgorithmBase):
+    """vtkAlgorithm to extract the feature edges of a static surface.
+
+    The edges only depend on the input geometry, so they are extracted
+    once (see :func:`extract_feature_edges_algorithm` for the options)
+    and reused for as long as the input points and cells do not
+    change. The output holds no data arrays.
+
+    """
+
+    def __init__(
+        self,
+        feature_angle=30.0,
+        boundary_edges=True,
+        non_manifold_edges=True,
+        feature_edges=True,
+        manifold_edges=True,
+        cache=None,
+    ):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            inputType="vtkPolyData",
+            nOutputPorts=1,
+            outputType="vtkPolyData",
+        )
+        self.options = dict(
+            feature_angle=feature_angle,
+            boundary_edges=boundary_edges,
+            non_manifold_edges=non_manifold_edges,
+            feature_edges=feature_edges,
+            manifold_edges=manifold_edges,
+        )
+        self.cache = cache
+        self._geometry = _StaticGeometry()
+        self._edges = None
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = self.GetInputData(inInfo, 0, 0)
+            if self._geometry.changed(inp) or self._edges is None:
+                key = self._geometry.key("edges", sorted(self.options.items()))
+                arrays = self.cache.get(key) if self.cache is not None else None
+                if arrays is None:
+                    edges = mesh_from_arrays(
+                        self._geometry.arrays
+                    ).extract_feature_edges(**self.options)
+                    arrays = mesh_to_arrays(edges)
+                    if self.cache is not None:
+                        self.cache.put(key, arrays)
+                self._edges = mesh_from_arrays(arrays)
+            self.GetOutputData(outInfo, 0).ShallowCopy(self._edges)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def extract_feature_edges_static_algorithm(inp, cache=None, **kwargs):
+    """Extract the feature edges of a surface with static geometry.
+
+    Alternative to :func:`extract_feature_edges_algorithm` that only
+    extracts the edges once. See :class:`StaticFeatureEdgesAlgorithm`.
+    """
+    efilter = StaticFeatureEdgesAlgorithm(cache=cache, **kwargs)
+    set_algorithm_input(efilter, inp)
+    return efilter
+
+
 class ActiveScalarsOperationAlgorithm(PreserveTypeAlgorithmBase):
     """vtkAlgorithm to perform a user operation on the active scalars.
 
     The operation must be a callable that accepts the
-    input numpy array of the input's active scalars.
+    input numpy array of the input's active scalars. The
+    input arrays are shared with the output, so the
+    operation must not modify them in place.
 
     This assumes the type of the mesh is preserved
     through the operation.
@@ -265,7 +851,7 @@ class ActiveScalarsOperationAlgorithm(PreserveTypeAlgorithmBase):
         try:
             inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
             out = self.GetOutputData(outInfo, 0)
-            result = inp.copy(deep=True)
+            result = inp.copy(deep=False)
             if self.output_scalars_name:
                 name = self.output_scalars_name
             else:
@@ -287,6 +873,170 @@ def scalars_operation_algorithm(inp, operation, output_scalars_name=None):
     return operator
 
 
+class FieldExpressionAlgorithm(PreserveTypeAlgorithmBase):
+    """vtkAlgorithm to add arrays computed from expressions of input arrays.
+
+    The output shares the geometry and arrays of the input and only
+    appends the new arrays, e.g.
+    ``{"log_slip": "log10(cumulative_slip + 1e-9)"}``.
+
+    Parameters
+    ----------
+    expressions : dict
+        Output array names and their expressions. An expression is a
+        string over input array names and the NumPy functions of
+        ``EXPRESSION_FUNCTIONS``, or a callable taking the input arrays
+        as keyword arguments. String expressions are compiled once.
+
+    association : str, default: "point"
+        Data (``"point"`` or ``"cell"``) of the input and output arrays.
+
+    active : str, optional
+        Output array made the active scalars.
+
+    chunk_size : int, optional
+        Evaluate string expressions on blocks of this many values to
+        bound the size of temporaries. All expressions are evaluated
+        block by block in one pass over the inputs.
+
+    backend : str, default: "numpy"
+        ``"numpy"`` or ``"numexpr"`` for string expressions. numexpr,
+        if installed, chunks and threads the evaluation itself.
+
+    """
+
+    def __init__(
+        self,
+        expressions,
+        association="point",
+        active=None,
+        chunk_size=None,
+        backend="numpy",
+    ):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            nOutputPorts=1,
+        )
+        if association not in ("point", "cell"):
+            raise ValueError('`association` must be "point" or "cell".')
+        if active is not None and active not in expressions:
+            raise ValueError(f"`{active}` is not one of the expressions.")
+        if backend not in ("numpy", "numexpr"):
+            raise ValueError('`backend` must be "numpy" or "numexpr".')
+        self.expressions = dict(expressions)
+        self.association = association
+        self.active = active
+        self.chunk_size = chunk_size
+        self.backend = backend
+        self._compiled = {
+            name: compile(expression, "<expression>", "eval")
+            for name, expression in self.expressions.items()
+            if isinstance(expression, str)
+        }
+
+    @property
+    def input_names(self):
+        """Names used by the string expressions, arrays or functions."""
+        names = set()
+        for code in self._compiled.values():
+            names.update(code.co_names)
+        return names
+
+    def _evaluate_numpy(self, arrays, n_values):
+        namespace = {"__builtins__": {}}
+        for key, code in self._compiled.items():
+            for name in code.co_names:
+                if name in arrays or name in namespace:
+                    continue
+                if name not in EXPRESSION_FUNCTIONS:
+                    raise ValueError(
+                        f"Unknown variable `{name}` in expression `{key}`: "
+                        f"{self.expressions[key]}"
+                    )
+                namespace[name] = getattr(np, name)
+        if not self.chunk_size or self.chunk_size >= n_values:
+            return {
+                name: np.asarray(eval(code, namespace, arrays))
+                for name, code in self._compiled.items()
+            }
+        results = {}
+        for start in range(0, n_values, self.chunk_size):
+            block = {
+                name: array[start : start + self.chunk_size]
+                for name, array in arrays.items()
+            }
+            for name, code in self._compiled.items():
+                value = np.asarray(eval(code, namespace, block))
+                if name not in results:
+                    shape = (n_values,) + value.shape[1:]
+                    results[name] = np.empty(shape, dtype=value.dtype)
+                results[name][start : start + len(value)] = value
+        return results
+
+    def _evaluate_numexpr(self, arrays):
+        import numexpr
+
+        return {
+            name: numexpr.evaluate(self.expressions[name], local_dict=arrays)
+            for name in self._compiled
+        }
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
+            result = inp.copy(deep=False)
+            if self.association == "point":
+                data, n_values = result.point_data, result.n_points
+            else:
+                data, n_values = result.cell_data, result.n_cells
+            arrays = {name: np.asarray(data[name]) for name in data.keys()}
+            used = {name: arrays[name] for name in self.input_names if name in arrays}
+            if self.backend == "numexpr":
+                results = self._evaluate_numexpr(used)
+            else:
+                results = self._evaluate_numpy(used, n_values)
+            for name, expression in self.expressions.items():
+                if callable(expression):
+                    results[name] = np.asarray(expression(**arrays))
+            for name, value in results.items():
+                data[name] = value
+            if self.active is not None:
+                data.active_scalars_name = self.active
+            self.GetOutputData(outInfo, 0).ShallowCopy(result)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def field_expression_algorithm(
+    inp,
+    expressions,
+    association="point",
+    active=None,
+    chunk_size=None,
+    backend="numpy",
+):
+    """Add arrays computed from expressions of the input arrays.
+
+    Arrays used by string expressions are requested from any lazy
+    :class:`kale.Engine` upstream. See :class:`FieldExpressionAlgorithm`.
+    """
+    efilter = FieldExpressionAlgorithm(
+        expressions,
+        association=association,
+        active=active,
+        chunk_size=chunk_size,
+        backend=backend,
+    )
+    request_arrays(inp, *efilter.input_names)
+    set_algorithm_input(efilter, inp)
+    return efilter
+
+
 def warp_by_scalar_algorithm(
     self,
     scalars=None,
@@ -333,6 +1083,8 @@ def warp_by_scalar_algorithm(
     See :ref:`surface_normal_example` for more examples using this filter.
 
     """
+    if scalars is not None:
+        request_arrays(self, scalars)
     self, algo = algorithm_to_mesh_handler(self)
 
     if scalars is None:
@@ -356,6 +1108,145 @@ def warp_by_scalar_algorithm(
     return alg
 
 
+class StaticWarpAlgorithm(_vtk.VTKPythonAlgorithmBase):
+    """vtkAlgorithm to warp a static surface by a point scalars array.
+
+    Equivalent to ``vtkWarpScalar``, but the warp directions are
+    resolved once for as long as the input points and cells do not
+    change. Each execution is then one vectorized
+    ``points + factor * scalars * normals`` written into a reused
+    buffer, so the output points of successive executions share
+    memory. Only the coordinates along which the surface is warped are
+    written.
+
+    Parameters
+    ----------
+    scalars : str, optional
+        Name of the point scalars to warp by. Defaults to the active
+        point scalars of the input.
+
+    factor : float, default: 1.0
+        Scale factor of the warp.
+
+    normal : Sequence, optional
+        Constant warp direction.
+
+    compute_normals : bool, default: False
+        Warp along the point normals of the surface, computed once.
+        Otherwise, as with ``vtkWarpScalar``, the input point normals
+        are used if present and ``normal`` or the z axis if not.
+
+    """
+
+    def __init__(self, scalars=None, factor=1.0, normal=None, compute_normals=False):
+        """Initialize algorithm."""
+        _vtk.VTKPythonAlgorithmBase.__init__(
+            self,
+            nInputPorts=1,
+            inputType="vtkPointSet",
+            nOutputPorts=1,
+        )
+        self.scalars = scalars
+        self._factor = factor
+        self.normal = normal
+        self.compute_normals = compute_normals
+        self._geometry = _StaticGeometry()
+        self._columns = None
+        self._points = None
+
+    def GetScaleFactor(self):
+        """Get the scale factor of the warp."""
+        return self._factor
+
+    def SetScaleFactor(self, factor):
+        """Set the scale factor of the warp."""
+        if factor != self._factor:
+            self._factor = factor
+            self.Modified()
+
+    def RequestDataObject(self, request, inInfo, outInfo):
+        """Create an output of the input type."""
+        inp = self.GetInputData(inInfo, 0, 0)
+        out = self.GetOutputData(outInfo, 0)
+        if out is None or not out.IsA(inp.GetClassName()):
+            out = inp.NewInstance()
+            outInfo.GetInformationObject(0).Set(out.DATA_OBJECT(), out)
+        return 1
+
+    def _update_normals(self, inp):
+        if not self._geometry.changed(inp) and self._columns is not None:
+            return
+        if self.normal is not None:
+            normals = np.asarray(self.normal, dtype=np.float64)
+        elif self.compute_normals:
+            surface = mesh_from_arrays(self._geometry.arrays).extract_surface()
+            normals = surface.compute_normals(
+                cell_normals=False, split_vertices=False
+            ).point_data["Normals"]
+        elif inp.point_data.GetNormals() is not None:
+            normals = inp.point_data.GetNormals()
+        else:
+            normals = np.array([0.0, 0.0, 1.0])
+        normals = np.asarray(normals, dtype=np.float64)
+        # The input points are static, so only the coordinates that the
+        # warp moves (e.g. z for the default normal) are written per step
+        self._points = np.array(inp.points, dtype=np.float64)
+        self._columns = []
+        for axis in range(3):
+            column = normals[..., axis]
+            if np.any(column):
+                if column.ndim:
+                    column = np.ascontiguousarray(column)
+                else:
+                    column = float(column)
+                self._columns.append((axis, column))
+        self._vtk_points = _vtk.vtkPoints()
+        self._vtk_points.SetData(_vtk.numpy_to_vtk(self._points, deep=False))
+
+    def RequestData(self, request, inInfo, outInfo):
+        """Perform algorithm execution."""
+        try:
+            inp = pyvista.wrap(self.GetInputData(inInfo, 0, 0))
+            self._update_normals(inp)
+            if self.scalars is None:
+                scalars = inp.point_data.active_scalars
+            else:
+                scalars = inp.point_data[self.scalars]
+            if scalars is None:
+                raise MissingDataError("No point scalars to warp by.")
+            scaled = self._factor * np.asarray(scalars, dtype=np.float64)
+            points = np.asarray(inp.points)
+            for axis, normal in self._columns:
+                column = self._points[:, axis]
+                np.multiply(scaled, normal, out=column)
+                column += points[:, axis]
+            self._vtk_points.Modified()
+            out = self.GetOutputData(outInfo, 0)
+            out.ShallowCopy(inp)
+            out.SetPoints(self._vtk_points)
+        except Exception as e:  # pragma: no cover
+            traceback.print_exc()
+            raise e
+        return 1
+
+
+def warp_by_scalar_static_algorithm(
+    inp, scalars=None, factor=1.0, normal=None, compute_normals=False
+):
+    """Warp a surface with static geometry by a point scalars array.
+
+    Drop-in alternative to :func:`warp_by_scalar_algorithm`. See
+    :class:`StaticWarpAlgorithm`.
+    """
+    if scalars is not None:
+        request_arrays(inp, scalars)
+    wfilter = StaticWarpAlgorithm(
+        scalars=scalars, factor=factor, normal=normal, compute_normals=compute_normals
+    )
+    set_algorithm_input(wfilter, inp)
+    return wfilter
+
+
 def extract_feature_edges_algorithm(
     dataset,
     feature_angle=30.0,
@@ -0,0 +1,270 @@
+"""Per-cell reductions over the full time history of a variable.
+
+The time axis is streamed in chunks of time steps (see
+:func:`kale.stats.iter_chunks`). Each chunk is reduced to a partial
+result per cell on a pool of worker threads while the next chunks are
+read, and partial results are merged in time order. Only a few chunks
+and partial results are held in memory at a time.
+
+Reductions are small classes with three methods: ``partial(block,
+first_step)`` reduces a ``(n_steps, n_cells)`` block, ``combine(a, b)``
+merges the partial results of consecutive blocks and ``finalize(state)``
+returns a dict of per-cell arrays.
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+from kale.stats import iter_chunks
+
+
+class Max:
+    """Maximum of each cell and the time step it occurs at (``argmax``)."""
+
+    sign = 1
+    names = ("max", "argmax")
+
+    def partial(self, block, first_step):
+        block = np.nan_to_num(self.sign * block, nan=-np.inf)
+        index = np.argmax(block, axis=0)
+        return block[index, np.arange(block.shape[1])], index + first_step
+
+    def combine(self, a, b):
+        # Ties keep the earliest time step
+        later = b[0] > a[0]
+        return np.where(later, b[0], a[0]), np.where(later, b[1], a[1])
+
+    def finalize(self, state):
+        value, index = state
+        return {self.names[0]: self.sign * value, self.names[1]: index}
+
+
+class Min(Max):
+    """Minimum of each cell and the time step it occurs at (``argmin``)."""
+
+    sign = -1
+    names = ("min", "argmin")
+
+
+class Moments:
+    """Mean, variance and standard deviation of each cell, ignoring NaNs.
+
+    Chunks are merged with the pairwise update of Chan et al., which is
+    numerically stable for long time series.
+
+    Parameters
+    ----------
+    ddof : int, default: 0
+        Delta degrees of freedom of the variance.
+
+    """
+
+    def __init__(self, ddof=0):
+        self.ddof = ddof
+
+    def partial(self, block, first_step):
+        finite = np.isfinite(block)
+        count = finite.sum(axis=0)
+        values = np.where(finite, block, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = values.sum(axis=0) / count
+        deviation = np.where(finite, block - mean, 0.0)
+        m2 = np.einsum("ij,ij->j", deviation, deviation)
+        return count, np.nan_to_num(mean), m2
+
+    def combine(self, a, b):
+        count_a, mean_a, m2_a = a
+        count_b, mean_b, m2_b = b
+        count = count_a + count_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.nan_to_num(count_b / count)
+        delta = mean_b - mean_a
+        mean = mean_a + delta * weight
+        m2 = m2_a + m2_b + delta**2 * count_a * weight
+        return count, mean, m2
+
+    def finalize(self, state):
+        count, mean, m2 = state
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, mean, np.nan)
+            variance = m2 / (count - self.ddof)
+        variance[count <= self.ddof] = np.nan
+        return dict(mean=mean, variance=variance, std=np.sqrt(variance))
+
+
+class Crossings:
+    """Number of times each cell crosses a threshold, e.g. events.
+
+    A crossing is a step whose value is at or above ``threshold`` while
+    the previous step's value is below (``direction="up"``), the
+    reverse (``"down"``) or either (``"both"``). Also counts the steps
+    at or above the threshold (``above``).
+    """
+
+    def __init__(self, threshold, direction="up"):
+        if direction not in ("up", "down", "both"):
+            raise ValueError('`direction` must be "up", "down" or "both".')
+        self.threshold = threshold
+        self.direction = direction
+
+    def _crossed(self, before, after):
+        up = (before < self.threshold) & (after >= self.threshold)
+        down = (before >= self.threshold) & (after < self.threshold)
+        return dict(up=up, down=down, both=up | down)[self.direction]
+
+    def partial(self, block, first_step):
+        return dict(
+            crossings=self._crossed(block[:-1], block[1:]).sum(axis=0),
+            above=(block >= self.threshold).sum(axis=0),
+            first=block[0].copy(),
+            last=block[-1].copy(),
+        )
+
+    def combine(self, a, b):
+        return dict(
+            crossings=a["crossings"]
+            + b["crossings"]
+            + self._crossed(a["last"], b["first"]),
+            above=a["above"] + b["above"],
+            first=a["first"],
+            last=b["last"],
+        )
+
+    def finalize(self, state):
+        return dict(crossings=state["crossings"], above=state["above"])
+
+
+class Histogram:
+    """Histogram of the values of each cell over time.
+
+    Values outside ``range`` and NaNs are not counted. The result is a
+    ``(n_cells, bins)`` array.
+
+    Parameters
+    ----------
+    bins : int, default: 16
+        Number of bins.
+
+    range : tuple, optional
+        Lower and upper edge of the bins. Required by
+        :func:`reduce_variable`. :meth:`kale.Engine.analyze` defaults
+        it to the range of the variable.
+
+    """
+
+    def __init__(self, bins=16, range=None):
+        self.bins = bins
+        self.range = range
+
+    def partial(self, block, first_step):
+        if self.range is None:
+            raise ValueError("Histogram requires a `range`.")
+        lo, hi = self.range
+        n_cells = block.shape[1]
+        inside = (block >= lo) & (block <= hi)
+        with np.errstate(invalid="ignore"):
+            index = ((block - lo) * (self.bins / (hi - lo))).astype(np.int64)
+        np.clip(index, 0, self.bins - 1, out=index)
+        index += np.arange(n_cells) * self.bins
+        counts = np.bincount(index[inside], minlength=n_cells * self.bins)
+        return counts.reshape(n_cells, self.bins)
+
+    def combine(self, a, b):
+        return a + b
+
+    def finalize(self, state):
+        return dict(histogram=state)
+
+
+REDUCTIONS = dict(max=Max, min=Min, moments=Moments)
+
+
+def _reduction(reduction):
+    if isinstance(reduction, str):
+        if reduction not in REDUCTIONS:
+            raise ValueError(
+                f"Unknown reduction `{reduction}`, use one of {sorted(REDUCTIONS)} "
+                "or a reduction instance."
+            )
+        return REDUCTIONS[reduction]()
+    return reduction
+
+
+def reduce_variable(
+    variable,
+    reductions,
+    chunk_steps=None,
+    workers=None,
+    lock=None,
+    start=0,
+    stop=None,
+):
+    """Compute per-cell reductions over the time axis of a variable.
+
+    Parameters
+    ----------
+    variable : array-like
+        A ``(n_steps, n_cells)`` variable, e.g. ``engine.ds[name]``.
+
+    reductions : Sequence
+        Reduction instances (e.g. ``Crossings(1.0)``) or names from
+        :data:`REDUCTIONS`.
+
+    chunk_steps : int, optional
+        Number of time steps per chunk. Defaults to a ~64 MiB chunk.
+
+    workers : int, optional
+        Number of threads reducing chunks. Defaults to the number of
+        CPUs. At most about ``2 * workers`` chunks are held in memory.
+
+    lock : threading.Lock, optional
+        Lock held while reading each chunk.
+
+    start, stop : int, optional
+        Range of time steps to reduce.
+
+    Returns
+    -------
+    dict
+        Per-cell arrays of all reductions, e.g. ``max``, ``argmax``,
+        ``mean``, ``variance``, ``std``, ``crossings``, ``above`` or
+        ``histogram``. ``argmax``/``argmin`` are absolute time steps.
+
+    """
+    reductions = [_reduction(reduction) for reduction in reductions]
+    workers = workers or os.cpu_count() or 1
+
+    def reduce_chunk(first, block):
+        block = block.astype(np.float64, copy=False)
+        return [reduction.partial(block, first) for reduction in reductions]
+
+    states = None
+    pending = collections.deque()
+
+    def fold(partials):
+        nonlocal states
+        if states is None:
+            states = partials
+        else:
+            states = [
+                reduction.combine(a, b)
+                for reduction, a, b in zip(reductions, states, partials)
+            ]
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="kale-reduce") as executor:
+        for first, block in iter_chunks(variable, chunk_steps, lock, start, stop):
+            pending.append(executor.submit(reduce_chunk, first, block))
+            # Partial results are merged in time order as they complete
+            while len(pending) > workers or (pending and pending[0].done()):
+                fold(pending.popleft().result())
+        while pending:
+            fold(pending.popleft().result())
+
+    if states is None:
+        raise ValueError("No time steps to reduce.")
+    results = {}
+    for reduction, state in zip(reductions, states):
+        results.update(reduction.finalize(state))
+    return results
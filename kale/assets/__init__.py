@@ -1,14 +1,64 @@
+import functools
 import pathlib
+import tempfile
+import warnings
 
-import numpy as np
-import pyvista as pv
 import scipy.io as sio
 
+from kale.coastlines import STORE_HEADER, STORE_VERSION, CoastlineStore, build_store
 
-def load_coastlines():
-    path = pathlib.Path(__file__).parent / "WorldHiVectors.mat"
-    WORLD_BOUNDARIES = sio.loadmat(path)
-    n = len(WORLD_BOUNDARIES["lat"])
-    z = np.zeros(n)
-    points = np.c_[WORLD_BOUNDARIES["lon"], WORLD_BOUNDARIES["lat"], z]
-    return pv.lines_from_points(points)
+COASTLINES_FILENAME = pathlib.Path(__file__).parent / "WorldHiVectors.mat"
+COASTLINES_STORE = pathlib.Path(__file__).parent / "coastlines"
+
+
+def _build_coastline_store(directory):
+    WORLD_BOUNDARIES = sio.loadmat(COASTLINES_FILENAME)
+    return build_store(WORLD_BOUNDARIES["lon"], WORLD_BOUNDARIES["lat"], directory)
+
+
+@functools.lru_cache(maxsize=None)
+def coastline_store():
+    """Tiled coastline store, built from ``WorldHiVectors.mat`` on first use.
+
+    The store is written next to the ``.mat`` file, or to the temporary
+    directory if the package is not writable, and rebuilt whenever the
+    ``.mat`` file is newer or the store format changed.
+    """
+    source_mtime = (
+        COASTLINES_FILENAME.stat().st_mtime if COASTLINES_FILENAME.exists() else 0
+    )
+    for directory in (
+        COASTLINES_STORE,
+        pathlib.Path(tempfile.gettempdir()) / "kale-coastlines",
+    ):
+        header = directory / STORE_HEADER
+        if header.exists() and header.stat().st_mtime >= source_mtime:
+            store = CoastlineStore(directory)
+            if store.version == STORE_VERSION:
+                return store
+        try:
+            return CoastlineStore(_build_coastline_store(directory))
+        except OSError as e:
+            warnings.warn(f"Unable to write coastline store `{directory}`: {e}")
+    raise RuntimeError("Unable to write a coastline store.")
+
+
+@functools.lru_cache(maxsize=64)
+def _load_coastlines(bounds, level):
+    return coastline_store().lines(bounds, level=level)
+
+
+def load_coastlines(bounds=None, level=0):
+    """Load the coastline polylines intersecting ``bounds``.
+
+    Only the coastline segments whose bounding box intersects the
+    longitude/latitude ``bounds`` (e.g. plotter bounds; any z bounds
+    are ignored) are read from the store. Results are memoized per
+    region. Loads the whole world when ``bounds`` is ``None``.
+
+    ``level`` selects a simplified level of detail, from ``0`` (full
+    resolution) to ``len(coastline_store().tolerances) - 1``.
+    """
+    if bounds is not None:
+        bounds = tuple(float(b) for b in bounds[:4])
+    return _load_coastlines(bounds, level).copy(deep=False)
@@ -0,0 +1,358 @@
+"""Time step and geometry caching for Engine."""
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+import threading
+import warnings
+import zipfile
+
+import numpy as np
+import pyvista
+from pyvista import _vtk
+
+# Environment variable enabling the on-disk geometry cache
+CACHE_DIR_ENV = "KALE_CACHE_DIR"
+
+
+class StepCache:
+    """Memory-bounded LRU cache of decoded per-step cell arrays.
+
+    Entries are keyed by ``(name, time_step)``. When the total size of
+    the cached arrays exceeds ``max_bytes``, the least recently used
+    entries are evicted.
+
+    Parameters
+    ----------
+    max_bytes : int, default: 512 MiB
+        Memory budget of the cache in bytes. ``0`` disables caching.
+
+    """
+
+    def __init__(self, max_bytes=512 * 2**20):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        """Total number of bytes currently held in the cache."""
+        return self._nbytes
+
+    def get(self, key):
+        """Return the cached array for ``key`` or ``None``.
+
+        Updates the hit/miss counters and the recency of ``key``.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """Return the cached array for ``key`` or ``None``.
+
+        Unlike :meth:`get`, this does not affect counters or recency.
+        """
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key, value):
+        """Add an array to the cache, evicting old entries if needed."""
+        if value.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._data[key] = value
+            self._nbytes += value.nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Return a dictionary summarizing the cache usage."""
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                entries=len(self._data),
+                nbytes=self._nbytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+class Prefetcher:
+    """Background reader of upcoming time steps.
+
+    After every time step change, :meth:`schedule` queues the next
+    ``depth`` steps in the direction of travel (the last step delta,
+    which may be negative or strided) for loading on a single worker
+    thread. Scheduling again supersedes any work still queued.
+
+    Parameters
+    ----------
+    load : callable
+        Called as ``load(time_step)`` on the worker thread. It is
+        expected to populate the cache for that step.
+
+    depth : int, default: 4
+        Number of steps to read ahead. ``0`` disables prefetching.
+
+    """
+
+    def __init__(self, load, depth=4):
+        self.load = load
+        self.depth = int(depth)
+        self._executor = None
+        self._generation = 0
+
+    def schedule(self, time_step, stride, max_time_step, skip=None):
+        """Queue read-ahead of ``time_step + k * stride`` for ``k = 1..depth``.
+
+        Steps for which ``skip(step)`` returns ``True`` (e.g. already
+        cached) are not queued.
+        """
+        if self.depth <= 0 or stride == 0:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="kale-prefetch"
+            )
+        self._generation += 1
+        generation = self._generation
+        for k in range(1, self.depth + 1):
+            step = time_step + k * stride
+            if step < 0 or step > max_time_step:
+                break
+            if skip is not None and skip(step):
+                continue
+            self._executor.submit(self._run, generation, step)
+
+    def _run(self, generation, step):
+        # Drop work superseded by a newer schedule (e.g. change of direction)
+        if generation != self._generation:
+            return
+        self.load(step)
+
+    def shutdown(self):
+        """Cancel queued reads and stop the worker thread."""
+        self._generation += 1
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def file_digest(filename, block_bytes=2**20):
+    """Hex digest of the content of a file."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(block_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(*parts):
+    """Content-addressed key of ``parts``.
+
+    Arrays contribute their dtype, shape and bytes, anything else its
+    ``repr``.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype.str}{part.shape}".encode())
+            digest.update(np.ascontiguousarray(part).data)
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def mesh_to_arrays(mesh):
+    """Geometry of a PolyData or UnstructuredGrid as a dict of arrays.
+
+    Data arrays are not included.
+    """
+    mesh = pyvista.wrap(mesh)
+    arrays = dict(points=np.asarray(mesh.points))
+    if isinstance(mesh, pyvista.PolyData):
+        arrays.update(
+            verts=np.asarray(mesh.verts),
+            lines=np.asarray(mesh.lines),
+            faces=np.asarray(mesh.faces),
+            strips=np.asarray(mesh.strips),
+        )
+    elif isinstance(mesh, pyvista.UnstructuredGrid):
+        arrays.update(
+            cells=np.asarray(mesh.cells), celltypes=np.asarray(mesh.celltypes)
+        )
+    else:
+        raise TypeError(f"Unsupported mesh type {type(mesh).__name__}.")
+    return arrays
+
+
+def mesh_from_arrays(arrays):
+    """Rebuild a mesh from :func:`mesh_to_arrays`."""
+    if "celltypes" in arrays:
+        return pyvista.UnstructuredGrid(
+            arrays["cells"], arrays["celltypes"], arrays["points"]
+        )
+    mesh = pyvista.PolyData()
+    mesh.points = arrays["points"]
+    for name, setter in (
+        ("verts", mesh.SetVerts),
+        ("lines", mesh.SetLines),
+        ("faces", mesh.SetPolys),
+        ("strips", mesh.SetStrips),
+    ):
+        if len(arrays[name]):
+            cells = _vtk.vtkCellArray()
+            cells.ImportLegacyFormat(
+                _vtk.numpy_to_vtkIdTypeArray(
+                    np.asarray(arrays[name], dtype=np.int64), deep=True
+                )
+            )
+            setter(cells)
+    return mesh
+
+
+class GeometryCache:
+    """On-disk, content-addressed cache of derived geometry.
+
+    Each entry is a dict of arrays stored uncompressed as
+    ``<key>.npz`` in ``directory``. Entries are written atomically so
+    that several processes can share a directory. Reading an entry
+    marks it as recently used; once the directory holds more than
+    ``max_bytes``, the least recently used entries are removed.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Cache directory. Created if needed.
+
+    max_bytes : int, default: 1 GiB
+        Size limit of the directory in bytes.
+
+    """
+
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_environment(cls):
+        """Cache in the ``KALE_CACHE_DIR`` directory, or ``None`` if unset."""
+        directory = os.environ.get(CACHE_DIR_ENV)
+        return cls(directory) if directory else None
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Return the arrays stored under ``key`` or ``None``."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as content:
+                arrays = {name: content[name] for name in content.files}
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # Missing, or removed/truncated by another process
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """Store a dict of arrays under ``key`` and enforce the size limit."""
+        try:
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        except OSError as e:
+            warnings.warn(f"Unable to write geometry cache `{self.directory}`: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._path(key))
+        except BaseException as e:
+            # Partial files are not entries and would never be evicted
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp)
+            if not isinstance(e, OSError):
+                raise
+            warnings.warn(f"Unable to write geometry cache `{self.directory}`: {e}")
+            return
+        self.evict()
+
+    def entries(self):
+        """List ``(path, size, mtime)`` of the entries, least recent first."""
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        """Remove least recently used entries until within ``max_bytes``."""
+        entries = self.entries()
+        nbytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            nbytes -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
+
+    def info(self):
+        """Return a dictionary summarizing the cache usage."""
+        entries = self.entries()
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(entries),
+            nbytes=sum(size for _, size, _ in entries),
+            max_bytes=self.max_bytes,
+        )
@@ -0,0 +1,275 @@
+"""Command line interface for kale."""
+import argparse
+import json
+from pathlib import Path
+
+from kale.precision import PRECISIONS
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+MOVIE_SUFFIXES = (".mp4", ".gif", ".avi", ".mov", ".mkv")
+
+
+def _convert(args):
+    from kale.storage import convert, convert_delta, convert_memmap, read_throughput
+
+    if args.report:
+        before = read_throughput(args.data_filename, name=args.variable)
+    if args.memmap:
+        convert_memmap(
+            args.data_filename, args.output_filename, dtype=args.dtype or "float32"
+        )
+    elif args.delta:
+        convert_delta(
+            args.data_filename,
+            args.output_filename,
+            keyframe_interval=args.keyframe_interval,
+            tolerance=args.tolerance,
+            dtype=args.dtype,
+        )
+    else:
+        convert(
+            args.data_filename,
+            args.output_filename,
+            chunk_steps=args.chunk_steps,
+            compression=None if args.compression == "none" else args.compression,
+            complevel=args.complevel,
+            shuffle=not args.no_shuffle,
+        )
+    if args.report:
+        after = read_throughput(args.output_filename, name=args.variable)
+        print("read throughput   steps/s      MB/s")
+        for label, result in (("before", before), ("after", after)):
+            print(
+                f"{label:<14}{result['steps_per_second']:>10.1f}"
+                f"{result['megabytes_per_second']:>10.1f}"
+            )
+
+
+def _render(args):
+    import pyvista as pv
+
+    from kale.engine import Engine
+    from kale.profiling import Profiler
+    from kale.render import (
+        make_scene,
+        render_frames,
+        render_movie,
+        render_still,
+        save_movie_parallel,
+    )
+
+    scene = {}
+    if args.scene:
+        with open(args.scene) as f:
+            scene = json.load(f)
+    scene["mesh"] = args.mesh_filename
+    scene["data"] = args.data_filename
+    for key in ("scalars", "zscale", "precision"):
+        if getattr(args, key) is not None:
+            scene[key] = getattr(args, key)
+    scene = make_scene(scene)
+
+    stop = args.stop
+    times = None
+    if stop is None or args.events:
+        engine = Engine(scene["mesh"], scene["data"], zscale=scene["zscale"])
+        if stop is None:
+            stop = engine.max_time_step
+        if args.events:
+            # Only the steps where the variable jumps, skipping the quiet ones
+            catalog = engine.events(
+                args.events, args.event_threshold, args.event_min_cells
+            )
+            times = catalog.select(args.start, stop)[:: args.stride].tolist()
+        engine.close()
+    if times is None:
+        times = range(args.start, stop, args.stride)
+    if args.xvfb:
+        pv.start_xvfb()
+    if args.profile and args.processes and args.processes > 1:
+        raise ValueError("--profile is not supported with --processes.")
+
+    output = Path(args.output)
+    suffix = output.suffix.lower()
+    profiler = Profiler().start() if args.profile else None
+    try:
+        if suffix in IMAGE_SUFFIXES:
+            render_still(scene, output, time=args.start)
+            times = [args.start]
+        elif suffix in MOVIE_SUFFIXES:
+            if args.processes and args.processes > 1:
+                save_movie_parallel(
+                    scene,
+                    output,
+                    times=times,
+                    processes=args.processes,
+                    framerate=args.framerate,
+                    quality=args.quality,
+                )
+            else:
+                timer = render_movie(
+                    scene, output, times, framerate=args.framerate, quality=args.quality
+                )
+                print(timer.report())
+        else:
+            # Frames are named by time step so that the directories written by
+            # several jobs can be concatenated
+            render_frames(scene, times, output, indices=times)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    print(f"Wrote {output} ({len(times)} frames)")
+    if profiler is not None:
+        print(profiler.table())
+        profiler.save_chrome_trace(args.profile)
+        print(f"Wrote {args.profile}")
+
+
+def _concat(args):
+    from kale.render import FRAME_PATTERN, concat_movies, stitch_frames
+
+    inputs = [Path(name) for name in args.inputs]
+    if all(path.is_dir() for path in inputs):
+        pattern = FRAME_PATTERN.replace("{:06d}", "*")
+        frames = sorted(frame for path in inputs for frame in path.glob(pattern))
+        if not frames:
+            raise ValueError("No frames found in the input directories.")
+        stitch_frames(
+            frames, args.output, framerate=args.framerate, quality=args.quality
+        )
+    elif any(path.is_dir() for path in inputs):
+        raise ValueError("Inputs must be either all movies or all frame directories.")
+    else:
+        concat_movies(inputs, args.output)
+    print(f"Wrote {args.output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="kale", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser(
+        "convert", help="Rewrite a data file chunked for fast per-step reads."
+    )
+    convert.add_argument("data_filename")
+    convert.add_argument("output_filename")
+    convert.add_argument("--chunk-steps", type=int, default=1)
+    convert.add_argument("--compression", default="zlib")
+    convert.add_argument("--complevel", type=int, default=1)
+    convert.add_argument("--no-shuffle", action="store_true")
+    layout = convert.add_mutually_exclusive_group()
+    layout.add_argument(
+        "--memmap",
+        action="store_true",
+        help="Write an uncompressed memory-mapped store directory instead.",
+    )
+    layout.add_argument(
+        "--delta",
+        action="store_true",
+        help="Write a store of keyframes and sparse per-step deltas instead, "
+        "for variables that change in few cells per step.",
+    )
+    convert.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=64,
+        help="Steps between keyframes of --delta stores.",
+    )
+    convert.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Largest change not stored in --delta stores. Defaults to exact.",
+    )
+    convert.add_argument(
+        "--dtype",
+        help="Storage type for --memmap (default: float32) and --delta "
+        "(default: source type) stores.",
+    )
+    convert.add_argument("--variable", help="Variable used to report read throughput.")
+    convert.add_argument(
+        "--no-report",
+        dest="report",
+        action="store_false",
+        help="Skip measuring read throughput before and after.",
+    )
+    convert.set_defaults(func=_convert)
+
+    render = subparsers.add_parser(
+        "render",
+        help="Render a still, a movie or frames off-screen.",
+        description="Render a scene off-screen. The output suffix selects the "
+        "mode: an image renders the --start time step, a movie renders the "
+        "time range and anything else is a directory of frames named by time "
+        "step. Split a long movie over several jobs with --start/--stop and "
+        "join the pieces with `kale concat`.",
+    )
+    render.add_argument("mesh_filename")
+    render.add_argument("data_filename")
+    render.add_argument(
+        "--scene", help="JSON file of scene keys, see kale.render.DEFAULT_SCENE."
+    )
+    render.add_argument("--scalars", help="Overrides the scene scalars.")
+    render.add_argument("--zscale", type=float, help="Overrides the scene zscale.")
+    render.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        help="Overrides the scene precision of the per-step arrays.",
+    )
+    render.add_argument("-o", "--output", required=True)
+    render.add_argument("--start", type=int, default=0)
+    render.add_argument(
+        "--stop", type=int, help="End of the time range (exclusive). Defaults to all."
+    )
+    render.add_argument("--stride", type=int, default=1)
+    render.add_argument(
+        "--events",
+        metavar="VARIABLE",
+        help="Render only the time steps where VARIABLE jumps, see Engine.events.",
+    )
+    render.add_argument(
+        "--event-threshold",
+        type=float,
+        default=0.0,
+        help="Smallest change of a cell counted as an event.",
+    )
+    render.add_argument(
+        "--event-min-cells",
+        type=int,
+        default=1,
+        help="Smallest number of changed cells of an event.",
+    )
+    render.add_argument(
+        "--processes", type=int, help="Render a movie on several processes."
+    )
+    render.add_argument("--framerate", type=int, default=24)
+    render.add_argument("--quality", type=int, default=5)
+    render.add_argument(
+        "--xvfb",
+        action="store_true",
+        help="Start a virtual X server, for nodes without off-screen OpenGL.",
+    )
+    render.add_argument(
+        "--profile",
+        metavar="TRACE",
+        help="Print a per-stage timing table and write a Chrome trace JSON file. "
+        "Not supported with --processes.",
+    )
+    render.set_defaults(func=_render)
+
+    concat = subparsers.add_parser(
+        "concat",
+        help="Join movie segments or frame directories written by `kale render`.",
+    )
+    concat.add_argument("output")
+    concat.add_argument(
+        "inputs",
+        nargs="+",
+        help="Movies (joined without re-encoding) or frame directories.",
+    )
+    concat.add_argument("--framerate", type=int, default=24)
+    concat.add_argument("--quality", type=int, default=5)
+    concat.set_defaults(func=_concat)
+
+    args = parser.parse_args(argv)
+    args.func(args)
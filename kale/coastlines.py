@@ -0,0 +1,340 @@
+"""Tiled store of coastline polylines for fast region-of-interest loads.
+
+The raw coastline vectors are split into short segments (at NaN
+separators and every ``max_points`` points) and written to a directory
+of raw ``.npy`` arrays: the segment coordinates, their offsets and
+bounding boxes, and an index of the segments overlapping each tile of
+a regular longitude/latitude grid. The arrays are memory-mapped, so a
+regional query only reads the pages of the segments it returns.
+
+Coarser levels of detail are stored alongside the full resolution
+coordinates, simplified with the Douglas-Peucker algorithm at
+increasing tolerances. Simplification keeps the end points of every
+segment, so all levels share the segment index.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pyvista as pv
+
+STORE_HEADER = "coastlines.json"
+STORE_VERSION = 2
+
+# Douglas-Peucker tolerances (degrees) of the levels of detail
+TOLERANCES = (0.0, 0.002, 0.008, 0.032, 0.128)
+
+_ARRAYS = ("coords", "offsets", "bboxes", "tile_offsets", "tile_segments")
+
+
+def split_segments(lon, lat, max_points=256):
+    """Split NaN-separated coastline vectors into short segments.
+
+    Consecutive segments produced by splitting a long line share their
+    end points so that no line piece is lost.
+
+    Returns
+    -------
+    tuple
+        ``(coords, offsets)`` with ``(n_points, 2)`` float32 longitude
+        and latitude coordinates and ``n_segments + 1`` offsets.
+
+    """
+    lon = np.asarray(lon, dtype=np.float64).ravel()
+    lat = np.asarray(lat, dtype=np.float64).ravel()
+    valid = np.isfinite(lon) & np.isfinite(lat)
+    # Runs of valid points
+    edges = np.diff(np.concatenate([[False], valid, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    keep = stops - starts >= 2
+    starts, stops = starts[keep], stops[keep]
+
+    # Split long runs into pieces of max_points sharing their end points
+    step = max_points - 1
+    n_pieces = np.maximum(1, -(-(stops - starts - 1) // step))
+    run = np.repeat(np.arange(len(starts)), n_pieces)
+    piece = np.arange(n_pieces.sum()) - np.repeat(
+        np.cumsum(n_pieces) - n_pieces, n_pieces
+    )
+    piece_starts = starts[run] + piece * step
+    piece_stops = np.minimum(piece_starts + max_points, stops[run])
+
+    lengths = piece_stops - piece_starts
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    index = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - piece_starts, lengths)
+    coords = np.c_[lon[index], lat[index]].astype(np.float32)
+    return coords, offsets
+
+
+def simplify(coords, offsets, tolerance):
+    """Douglas-Peucker simplification of all segments at once.
+
+    The recursion is run breadth-first over all segments: each pass
+    finds the farthest point of every open range from its chord and
+    splits the ranges where it is farther than ``tolerance``.
+
+    Returns
+    -------
+    tuple
+        ``(coords, offsets)`` of the simplified segments.
+
+    """
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[offsets[:-1]] = True
+    keep[offsets[1:] - 1] = True
+    first = offsets[:-1]
+    last = offsets[1:] - 1
+    open_ = last - first > 1
+    first, last = first[open_], last[open_]
+    x, y = coords.astype(np.float64).T
+    while len(first):
+        counts = last - first - 1
+        group = np.repeat(np.arange(len(first)), counts)
+        index = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts - first - 1, counts
+        )
+        # Distance to the chord segment (to the end point for closed loops)
+        ax, ay = x[first], y[first]
+        abx, aby = x[last] - ax, y[last] - ay
+        length_sq = abx**2 + aby**2
+        length_sq[length_sq == 0] = np.inf
+        abx, aby, length_sq = abx[group], aby[group], length_sq[group]
+        apx = x[index] - ax[group]
+        apy = y[index] - ay[group]
+        t = np.clip((apx * abx + apy * aby) / length_sq, 0, 1)
+        distance = np.hypot(apx - t * abx, apy - t * aby)
+        # Farthest point of each range
+        group_max = np.maximum.reduceat(distance, np.cumsum(counts) - counts)
+        candidates = np.flatnonzero(distance == group_max[group])
+        _, first_candidate = np.unique(group[candidates], return_index=True)
+        farthest = candidates[first_candidate]
+        split = distance[farthest] > tolerance
+        far = index[farthest[split]]
+        keep[far] = True
+        first = np.concatenate([first[split], far])
+        last = np.concatenate([far, last[split]])
+        open_ = last - first > 1
+        first, last = first[open_], last[open_]
+    counts = np.add.reduceat(keep.astype(np.int64), offsets[:-1])
+    return coords[keep], np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+def _tile_range(values, lower, tile_degrees, n_tiles):
+    return np.clip(((values - lower) // tile_degrees).astype(np.int64), 0, n_tiles - 1)
+
+
+def build_store(
+    lon, lat, directory, tile_degrees=5.0, max_points=256, tolerances=TOLERANCES
+):
+    """Write a coastline store from longitude and latitude vectors.
+
+    Parameters
+    ----------
+    lon, lat : numpy.ndarray
+        Coastline vertices with polylines separated by NaNs.
+
+    directory : str or Path
+        Destination directory. Created if needed.
+
+    tile_degrees : float, default: 5.0
+        Size of the index tiles in degrees.
+
+    max_points : int, default: 256
+        Maximum number of points per segment.
+
+    tolerances : Sequence[float], optional
+        Douglas-Peucker tolerances in degrees of the levels of detail.
+        Level ``0`` (tolerance ``0``) is always the full resolution.
+
+    Returns
+    -------
+    Path
+        The store directory.
+
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    coords, offsets = split_segments(lon, lat, max_points=max_points)
+    n_segments = len(offsets) - 1
+
+    # Per-segment (lon_min, lon_max, lat_min, lat_max)
+    bboxes = np.empty((n_segments, 4), dtype=np.float32)
+    if n_segments:
+        starts = offsets[:-1]
+        bboxes[:, 0] = np.minimum.reduceat(coords[:, 0], starts)
+        bboxes[:, 1] = np.maximum.reduceat(coords[:, 0], starts)
+        bboxes[:, 2] = np.minimum.reduceat(coords[:, 1], starts)
+        bboxes[:, 3] = np.maximum.reduceat(coords[:, 1], starts)
+
+    # Regular tile grid over the data extent
+    if n_segments:
+        origin = [
+            float(np.floor(bboxes[:, 0].min())),
+            float(np.floor(bboxes[:, 2].min())),
+        ]
+        extent = [float(bboxes[:, 1].max()), float(bboxes[:, 3].max())]
+    else:
+        origin, extent = [0.0, 0.0], [0.0, 0.0]
+    shape = [
+        max(1, int(np.ceil((extent[k] - origin[k]) / tile_degrees)) + 1)
+        for k in range(2)
+    ]
+    i0 = _tile_range(bboxes[:, 0], origin[0], tile_degrees, shape[0])
+    i1 = _tile_range(bboxes[:, 1], origin[0], tile_degrees, shape[0])
+    j0 = _tile_range(bboxes[:, 2], origin[1], tile_degrees, shape[1])
+    j1 = _tile_range(bboxes[:, 3], origin[1], tile_degrees, shape[1])
+    # (tile, segment) pairs of every tile covered by a segment bbox
+    ni, nj = i1 - i0 + 1, j1 - j0 + 1
+    segment = np.repeat(np.arange(n_segments), ni * nj)
+    local = np.arange(len(segment)) - np.repeat(np.cumsum(ni * nj) - ni * nj, ni * nj)
+    tile_i = i0[segment] + local // nj[segment]
+    tile_j = j0[segment] + local % nj[segment]
+    tile = tile_i * shape[1] + tile_j
+    order = np.argsort(tile, kind="stable")
+    tile_segments = segment[order]
+    tile_offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(tile, minlength=shape[0] * shape[1]))]
+    )
+
+    arrays = dict(
+        coords=coords,
+        offsets=offsets,
+        bboxes=bboxes,
+        tile_offsets=tile_offsets,
+        tile_segments=tile_segments,
+    )
+    tolerances = sorted(set([0.0, *tolerances]))
+    for level, tolerance in enumerate(tolerances[1:], start=1):
+        arrays[f"coords_{level}"], arrays[f"offsets_{level}"] = simplify(
+            coords, offsets, tolerance
+        )
+    for name, array in arrays.items():
+        np.save(directory / f"{name}.npy", array)
+    header = dict(
+        format="coastlines",
+        version=STORE_VERSION,
+        tolerances=tolerances,
+        tile_degrees=tile_degrees,
+        origin=origin,
+        shape=shape,
+        max_points=max_points,
+    )
+    with open(directory / STORE_HEADER, "w") as f:
+        json.dump(header, f, indent=2)
+    return directory
+
+
+class CoastlineStore:
+    """Read-only view of a store written by :func:`build_store`."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / STORE_HEADER) as f:
+            header = json.load(f)
+        if header.get("format") != "coastlines":
+            raise ValueError(f"`{directory}` is not a kale coastline store.")
+        self.version = header["version"]
+        self.tolerances = header.get("tolerances", [0.0])
+        self.tile_degrees = header["tile_degrees"]
+        self.origin = header["origin"]
+        self.shape = header["shape"]
+        for name in _ARRAYS:
+            setattr(self, name, self._load(name))
+        self._levels = {0: (self.coords, self.offsets)}
+
+    def _load(self, name):
+        return np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+    def level(self, level):
+        """``(coords, offsets)`` of a level of detail."""
+        if level not in self._levels:
+            if not 0 <= level < len(self.tolerances):
+                raise ValueError(
+                    f"Invalid level {level}, the store has {len(self.tolerances)}."
+                )
+            self._levels[level] = (
+                self._load(f"coords_{level}"),
+                self._load(f"offsets_{level}"),
+            )
+        return self._levels[level]
+
+    def level_for(self, bounds, window_size, pixels=0.5):
+        """Coarsest level of detail not visible at a given resolution.
+
+        Picks the coarsest level whose tolerance is at most ``pixels``
+        pixels when ``bounds`` (longitude/latitude) are shown in a
+        ``window_size`` ``(width, height)`` viewport.
+        """
+        width, height = window_size
+        pixel = max(
+            (bounds[1] - bounds[0]) / max(width, 1),
+            (bounds[3] - bounds[2]) / max(height, 1),
+        )
+        levels = [
+            level
+            for level, tolerance in enumerate(self.tolerances)
+            if tolerance <= pixels * pixel
+        ]
+        return levels[-1]
+
+    @property
+    def n_segments(self):
+        return len(self.offsets) - 1
+
+    def query(self, bounds=None):
+        """Indices of the segments whose bounding box intersects ``bounds``.
+
+        ``bounds`` are ``(lon_min, lon_max, lat_min, lat_max, ...)``;
+        any trailing (z) bounds are ignored. All segments are returned
+        when ``bounds`` is ``None``.
+        """
+        if bounds is None:
+            return np.arange(self.n_segments)
+        x0, x1, y0, y1 = (float(b) for b in bounds[:4])
+        i0, i1 = _tile_range(
+            np.array([x0, x1]), self.origin[0], self.tile_degrees, self.shape[0]
+        )
+        j0, j1 = _tile_range(
+            np.array([y0, y1]), self.origin[1], self.tile_degrees, self.shape[1]
+        )
+        tiles = (
+            np.arange(i0, i1 + 1)[:, None] * self.shape[1] + np.arange(j0, j1 + 1)
+        ).ravel()
+        starts = np.asarray(self.tile_offsets[tiles])
+        stops = np.asarray(self.tile_offsets[tiles + 1])
+        counts = stops - starts
+        index = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts - starts, counts
+        )
+        candidates = np.unique(np.asarray(self.tile_segments[index]))
+        box = np.asarray(self.bboxes[candidates])
+        hit = (
+            (box[:, 0] <= x1)
+            & (box[:, 1] >= x0)
+            & (box[:, 2] <= y1)
+            & (box[:, 3] >= y0)
+        )
+        return candidates[hit]
+
+    def lines(self, bounds=None, level=0):
+        """Polylines of the segments intersecting ``bounds`` at ``z = 0``.
+
+        ``level`` selects the level of detail (``0`` is the full
+        resolution).
+        """
+        segments = self.query(bounds)
+        all_coords, offsets = self.level(level)
+        starts = np.asarray(offsets[segments])
+        lengths = np.asarray(offsets[segments + 1]) - starts
+        out_offsets = np.concatenate([[0], np.cumsum(lengths)])
+        index = np.arange(out_offsets[-1]) - np.repeat(
+            out_offsets[:-1] - starts, lengths
+        )
+        coords = np.asarray(all_coords[index])
+        mesh = pv.PolyData()
+        mesh.points = np.c_[coords, np.zeros(len(coords), dtype=coords.dtype)]
+        if len(segments):
+            connectivity = np.arange(out_offsets[-1])
+            mesh.lines = np.insert(connectivity, out_offsets[:-1], lengths)
+        return mesh
@@ -0,0 +1,204 @@
+"""Vectorized banded contouring of static triangle surfaces.
+
+The contoured scalars are linear on each triangle, so the part of a
+triangle inside the band ``[lo, hi)`` is a convex polygon whose
+vertices are triangle vertices or points where a band level crosses a
+triangle edge. :class:`TriangleBands` precomputes the edge connectivity
+of a triangle mesh once, then builds these polygons for all triangles
+and all bands in a few NumPy passes. Points where a level crosses an
+edge are identified by ``(edge, level)`` so that neighbouring
+triangles share them.
+"""
+import numpy as np
+
+# Walk each triangle boundary as v0 -> v1 -> v2 -> v0
+_TRIANGLE_EDGES = np.array([[0, 1], [1, 2], [2, 0]])
+
+
+def _float_type(array):
+    """``array``'s type if floating point, else ``float64``."""
+    if np.issubdtype(array.dtype, np.floating):
+        return array.dtype
+    return np.dtype(np.float64)
+
+
+def _ranges(counts):
+    """Concatenation of ``arange(n)`` for each ``n`` in ``counts``."""
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+class TriangleBands:
+    """Banded contour generator for a triangle mesh with static topology.
+
+    Parameters
+    ----------
+    triangles : numpy.ndarray
+        ``(n_triangles, 3)`` point indices of the triangles.
+
+    """
+
+    def __init__(self, triangles):
+        self.triangles = np.asarray(triangles, dtype=np.int64)
+        pairs = self.triangles[:, _TRIANGLE_EDGES]
+        self.edges, inverse = np.unique(
+            np.sort(pairs, axis=-1).reshape(-1, 2), axis=0, return_inverse=True
+        )
+        # Edge index of each triangle side
+        self.triangle_edges = inverse.reshape(-1, 3)
+
+    def __call__(self, points, scalars, levels, clipping=False, point_data=None):
+        """Compute the bands and contour edges of ``scalars``.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            ``(n_points, 3)`` point coordinates.
+
+        scalars : numpy.ndarray
+            ``(n_points,)`` point scalars to contour.
+
+        levels : Sequence
+            Contour levels.
+
+        clipping : bool, default: False
+            Drop the bands below the first and above the last level.
+
+        point_data : dict, optional
+            Additional point arrays to interpolate onto the output.
+
+        Returns
+        -------
+        dict
+            ``points`` of the output, ``point_data`` (``scalars``
+            under the key ``None`` plus interpolated ``point_data``),
+            band polygons as VTK ``offsets`` and ``connectivity``
+            arrays, per-band ``band_values`` (the lower level of each
+            band) and ``band_index``, and ``(n_lines, 2)`` point
+            indices of the contour edge ``lines``.
+
+        """
+        levels = np.unique(np.asarray(levels, dtype=np.float64))
+        scalars = np.asarray(scalars)
+        n_levels = len(levels)
+        # Band j is [bounds[j], bounds[j + 1]) with open bands at both ends
+        bounds = np.concatenate([[-np.inf], levels, [np.inf]])
+
+        s = scalars[self.triangles]
+        s_min = np.minimum(np.minimum(s[:, 0], s[:, 1]), s[:, 2])
+        s_max = np.maximum(np.maximum(s[:, 0], s[:, 1]), s[:, 2])
+        band_min = np.searchsorted(levels, s_min, side="right")
+        band_max = np.searchsorted(levels, s_max, side="right")
+
+        # Triangles within a single band are output as they are
+        whole = band_min == band_max
+        if clipping:
+            whole_keep = whole & (band_min > 0) & (band_min < n_levels)
+        else:
+            whole_keep = whole
+        whole_band = band_min[whole_keep]
+
+        # (triangle, band) pairs of the triangles crossing levels
+        crossing = np.flatnonzero(~whole)
+        counts = band_max[crossing] - band_min[crossing] + 1
+        tri = np.repeat(crossing, counts)
+        band = _ranges(counts) + band_min[tri]
+        if clipping:
+            keep = (band > 0) & (band < n_levels)
+            tri, band = tri[keep], band[keep]
+        lo = bounds[band][:, None]
+        hi = bounds[band + 1][:, None]
+
+        st = s[tri]
+        sa = st[:, _TRIANGLE_EDGES[:, 0]]
+        sb = st[:, _TRIANGLE_EDGES[:, 1]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_lo = (lo - sa) / (sb - sa)
+            t_hi = (hi - sa) / (sb - sa)
+        cross_lo = (sa >= lo) != (sb >= lo)
+        cross_hi = (sa >= hi) != (sb >= hi)
+        edge = self.triangle_edges[tri]
+
+        # Per side: the start vertex, then up to two crossings ordered
+        # along the side. Vertex ids are point indices, crossing ids are
+        # negative keys resolved below.
+        n_pairs = len(tri)
+        ids = np.empty((n_pairs, 3, 3), dtype=np.int64)
+        valid = np.empty((n_pairs, 3, 3), dtype=bool)
+        ids[:, :, 0] = self.triangles[tri]
+        valid[:, :, 0] = (sa >= lo) & (sa < hi)
+        key_lo = -(edge * n_levels + (band[:, None] - 1)) - 1
+        key_hi = -(edge * n_levels + band[:, None]) - 1
+        lo_first = ~(cross_lo & cross_hi) | (t_lo < t_hi)
+        ids[:, :, 1] = np.where(lo_first & cross_lo, key_lo, key_hi)
+        valid[:, :, 1] = cross_lo | cross_hi
+        ids[:, :, 2] = np.where(lo_first, key_hi, key_lo)
+        valid[:, :, 2] = cross_lo & cross_hi
+        ids = ids.reshape(n_pairs, 9)
+        valid = valid.reshape(n_pairs, 9)
+        sizes = valid.sum(axis=1)
+        keep = sizes >= 3
+        ids, valid, sizes, band = ids[keep], valid[keep], sizes[keep], band[keep]
+        poly_ids = ids[valid]
+
+        # Contour edges: each (triangle, level) crossing joins two sides
+        counts = band_max[crossing] - band_min[crossing]
+        line_tri = np.repeat(crossing, counts)
+        level = _ranges(counts) + band_min[line_tri]
+        ls = s[line_tri]
+        line_levels = levels[level][:, None]
+        la = ls[:, _TRIANGLE_EDGES[:, 0]] >= line_levels
+        lb = ls[:, _TRIANGLE_EDGES[:, 1]] >= line_levels
+        line_keys = -(self.triangle_edges[line_tri] * n_levels + level[:, None]) - 1
+        line_keys = line_keys[la != lb]
+
+        # Resolve crossing keys to output point indices
+        is_key = poly_ids < 0
+        keys, inverse = np.unique(
+            np.concatenate([poly_ids[is_key], line_keys]), return_inverse=True
+        )
+        n_points = len(scalars)
+        n_poly_keys = np.count_nonzero(is_key)
+        poly_ids[is_key] = n_points + inverse[:n_poly_keys]
+        line_ids = n_points + inverse[n_poly_keys:]
+
+        # Crossing points, interpolated along the canonical edge direction
+        key_edge, key_level = np.divmod(-keys - 1, n_levels)
+        u, w = self.edges[key_edge].T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (levels[key_level] - scalars[u]) / (scalars[w] - scalars[u])
+        t = np.nan_to_num(t)[:, None]
+        out_points = np.concatenate([points, points[u] + t * (points[w] - points[u])])
+        # Output arrays keep the precision of floating point inputs
+        dtype = _float_type(scalars)
+        out_data = {
+            None: np.concatenate([scalars, levels[key_level]]).astype(dtype, copy=False)
+        }
+        for name, array in (point_data or {}).items():
+            ta = t if array.ndim > 1 else t[:, 0]
+            out_data[name] = np.concatenate(
+                [array, array[u] + ta * (array[w] - array[u])]
+            ).astype(_float_type(array), copy=False)
+
+        # Polygons as offsets/connectivity: whole triangles, then pieces
+        n_whole = len(whole_band)
+        offsets = np.empty(n_whole + len(sizes) + 1, dtype=np.int64)
+        offsets[0] = 0
+        offsets[1 : n_whole + 1] = np.arange(3, 3 * n_whole + 1, 3)
+        np.cumsum(sizes, out=offsets[n_whole + 1 :])
+        offsets[n_whole + 1 :] += 3 * n_whole
+        connectivity = np.concatenate([self.triangles[whole_keep].ravel(), poly_ids])
+
+        band = np.concatenate([whole_band, band])
+        band_values = bounds[band]
+        band_values[band == 0] = scalars.min() if len(scalars) else np.nan
+        band_values = band_values.astype(dtype, copy=False)
+
+        return dict(
+            points=out_points,
+            point_data=out_data,
+            offsets=offsets,
+            connectivity=connectivity,
+            band_values=band_values,
+            band_index=band,
+            lines=line_ids.reshape(-1, 2),
+        )
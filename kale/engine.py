@@ -1,49 +1,157 @@
 """Kale Engine."""
 from pathlib import Path
+import threading
 
 import numpy as np
 import pyvista as pv
-from pyvista.utilities.algorithms import (
-    cell_data_to_point_data_algorithm,
-    extract_surface_algorithm,
+
+from kale import interpolate, profiling
+from kale.cache import (
+    GeometryCache,
+    Prefetcher,
+    StepCache,
+    cache_key,
+    file_digest,
+    mesh_from_arrays,
+    mesh_to_arrays,
 )
-import xarray as xr
+from kale.events import EventIndex, detect_events
+from kale.precision import PRECISIONS, Cast, FixedPoint
+from kale.stats import StatisticsCache, histogram_percentile, streaming_statistics
+from kale.storage import open_dataset
 
 
 class Engine:
-    def __init__(self, mesh_filename, data_filename, zscale=0.1):
+    def __init__(
+        self,
+        mesh_filename,
+        data_filename,
+        zscale=0.1,
+        cache_bytes=512 * 2**20,
+        prefetch=0,
+        lazy=False,
+        cache_dir=None,
+        precision=None,
+    ):
         if not Path(mesh_filename).exists():
             raise ValueError(f"`{mesh_filename} does not exist.")
-        if not Path(data_filename).exists():
-            raise ValueError(f"`{data_filename} does not exist.")
+        self._open_data(data_filename)
+        self._events = {}
+
+        # Derived geometry is cached on disk if a cache directory is
+        # given or set in the KALE_CACHE_DIR environment variable
+        if isinstance(cache_dir, GeometryCache):
+            self._geometry_cache = cache_dir
+        elif cache_dir is not None:
+            self._geometry_cache = GeometryCache(cache_dir)
+        else:
+            self._geometry_cache = GeometryCache.from_environment()
 
-        self._mesh = pv.read(mesh_filename)
-        self._ds = xr.open_dataset(data_filename, engine="netcdf4")
+        self._mesh = self._read_mesh(mesh_filename, zscale)
 
         self._algorithm = None
         self._algorithm_smoothed = None
 
         self._modified_callbacks = set()
+        self._changed = None
+        self._geometry_algorithms = None
 
-        # Clear any data arrays in the mesh - only use data from HDF5 file
-        self.mesh.clear_data()
+        # Per-step array cache with optional background read-ahead.
+        # Dataset reads are serialized as netCDF/HDF5 is not thread-safe.
+        self._read_lock = threading.Lock()
+        self._cache = StepCache(cache_bytes)
+        self._prefetcher = Prefetcher(self._load_step, depth=prefetch)
+        self._time_step = None
+        self._time = None
+        self._stride = 1
 
-        # Scale Z axis on mesh itself to avoid scaled-rendering issues
-        self.mesh.points[:, -1] *= zscale
+        # Interpolant coefficients of the current step interval per variable
+        self._interpolation = "linear"
+        self._interpolants = {}
+
+        # Arrays are held in the cache and set on the mesh at this precision
+        if precision is not None and precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown precision `{precision}`, use one of {PRECISIONS} or None."
+            )
+        self._precision = precision
+        self._codecs = {}
+        self._codec_lock = threading.Lock()
+        # Views into a memory-mapped store are only usable if stored at
+        # the requested precision
+        self._zero_copy = getattr(self.ds, "zero_copy", False) and (
+            precision is None
+            or all(self.ds[name].dtype.name == precision for name in self.keys)
+        )
+
+        # With lazy loading, only requested variables are loaded per step
+        self._lazy = lazy
+        self._requested = set()
 
         # Set initial time step and populate mesh
-        self.max_time_step = self.ds[self.keys[0]].shape[0] - 1
+        self.max_time_step = min(self.ds[name].shape[0] for name in self.keys) - 1
+        if lazy:
+            self._requested.add(self.keys[0])
         self.time_step = 0
 
-    def modified(self):
+    def _open_data(self, data_filename):
+        """Open the dataset and its statistics and event sidecars."""
+        if not Path(data_filename).exists():
+            raise ValueError(f"`{data_filename} does not exist.")
+        self._ds = open_dataset(data_filename)
+        self._stats = StatisticsCache(data_filename)
+        self._event_index = EventIndex(data_filename)
+
+    def _read_mesh(self, mesh_filename, zscale):
+        cache = self._geometry_cache
+        if cache is not None:
+            key = cache_key("mesh", file_digest(mesh_filename), zscale)
+            arrays = cache.get(key)
+            if arrays is not None:
+                return mesh_from_arrays(arrays)
+
+        mesh = pv.read(mesh_filename)
+
+        # Clear any data arrays in the mesh - only use data from HDF5 file
+        mesh.clear_data()
+
+        # Scale Z axis on mesh itself to avoid scaled-rendering issues
+        mesh.points[:, -1] *= zscale
+
+        if cache is not None and isinstance(mesh, (pv.PolyData, pv.UnstructuredGrid)):
+            cache.put(key, mesh_to_arrays(mesh))
+        return mesh
+
+    def modified(self, arrays=None):
+        """Notify the modified callbacks that the mesh changed.
+
+        ``arrays`` are the names of the changed cell arrays. ``None``
+        means that anything, including the geometry, may have changed.
+        """
+        self._changed = None if arrays is None else frozenset(arrays)
         for callback in self._modified_callbacks:
             callback()
 
+    @property
+    def changed_arrays(self):
+        """Names of the arrays changed by the last modification.
+
+        ``None`` if anything, including the mesh geometry, may have changed.
+        """
+        return self._changed
+
     def add_modified_callback(self, callback):
         self._modified_callbacks.add(callback)
 
     def clear_modified_callbacks(self, callback):
         self._modified_callbacks = set()
+        self._changed = None
+        self._geometry_algorithms = None
+
+    def close(self):
+        """Stop background prefetching and close the dataset."""
+        self._prefetcher.shutdown()
+        self.ds.close()
 
     @property
     def mesh(self):
@@ -57,21 +165,331 @@ class Engine:
     def keys(self):
         return list(self.ds.keys())
 
-    def get_variable(self, name):
-        """Returns variable array for current time step."""
-        var = np.array(self.ds[name][self.time_step, :])
+    @property
+    def geometry_cache(self):
+        """On-disk cache of the derived geometry, or ``None``."""
+        return self._geometry_cache
+
+    @property
+    def zero_copy(self):
+        """Whether time steps are views into a memory-mapped store."""
+        return self._zero_copy
+
+    @property
+    def precision(self):
+        """Precision of the per-step arrays, ``None`` to keep the stored type.
+
+        ``"float32"`` or ``"float64"`` convert the arrays on load.
+        ``"fixed16"`` and ``"fixed8"`` hold them in the cache quantized
+        with a per-variable scale and offset (see
+        :class:`kale.precision.FixedPoint`) spanning the range of
+        :meth:`statistics`, and decode them to ``float32``.
+        """
+        return self._precision
+
+    def _codec(self, name):
+        """Encoder of the cached arrays of ``name``, ``None`` for none."""
+        if self._precision is None:
+            return None
+        with self._codec_lock:
+            if name not in self._codecs:
+                if self._precision.startswith("fixed"):
+                    stats = self.statistics(name)
+                    bits = int(self._precision[len("fixed") :])
+                    codec = FixedPoint(stats["min"], stats["max"], bits)
+                else:
+                    codec = Cast(self._precision)
+                self._codecs[name] = codec
+            return self._codecs[name]
+
+    @property
+    def lazy(self):
+        """Whether only requested variables are loaded on each time step."""
+        return self._lazy
+
+    @property
+    def active_keys(self):
+        """Variables loaded into the mesh on each time step."""
+        if not self._lazy:
+            return self.keys
+        return [name for name in self.keys if name in self._requested]
+
+    def request(self, *names):
+        """Request variables to be loaded on every time step.
+
+        Variables not yet in the mesh are loaded for the current time
+        step right away. This is a no-op for variables that are not in
+        the dataset (e.g. derived arrays) or when lazy loading is off.
+        """
+        names = [
+            name for name in names if name in self.ds and name not in self._requested
+        ]
+        if not self._lazy or not names:
+            return
+        self._requested.update(names)
+        for name in names:
+            self.mesh[name] = self.get_variable(name)
+        self.modified(names)
+
+    def release(self, *names):
+        """Stop loading variables on each time step and drop them from the mesh."""
+        if not self._lazy:
+            return
+        for name in names:
+            self._requested.discard(name)
+            if name in self.mesh.cell_data:
+                del self.mesh.cell_data[name]
+        self.modified(names)
+
+    def set_active_scalars(self, name):
+        """Request a variable and make it the active scalars of the mesh."""
+        self.request(name)
+        self.mesh.set_active_scalars(name, preference="cell")
+
+    @property
+    def cache(self):
+        """The :class:`kale.cache.StepCache` of loaded time steps."""
+        return self._cache
+
+    def cache_info(self):
+        """Return hit/miss counters and memory usage of the step cache."""
+        return self._cache.info()
+
+    @property
+    def prefetch(self):
+        """Number of time steps read ahead in the background."""
+        return self._prefetcher.depth
+
+    @prefetch.setter
+    def prefetch(self, depth: int):
+        self._prefetcher.depth = int(depth)
+
+    def _read_variable(self, name, time_step, codec):
+        """Read and encode a time step of a variable, bypassing the cache.
+
+        Callers hold the read lock.
+        """
+        with profiling.span("engine.read") as info:
+            var = np.asarray(self.ds[name][time_step, :])
+            info["bytes"] = var.nbytes
+        # Encoding copies, the cache must not hold views
+        return np.array(var) if codec is None else codec.encode(var)
+
+    def _load_variable(self, name, time_step, count=True):
+        """Return a cached variable, reading and caching it on a miss."""
+        if self.zero_copy:
+            # Views into memory-mapped files need neither copies nor caching
+            return self.ds[name][time_step]
+        key = (name, time_step)
+        # Created outside the read lock, as it may read statistics
+        codec = self._codec(name)
+        var = self._cache.get(key) if count else self._cache.peek(key)
+        if var is None:
+            with self._read_lock:
+                # The prefetcher may have loaded it while waiting on the lock
+                var = self._cache.peek(key)
+                if var is None:
+                    var = self._read_variable(name, time_step, codec)
+                    self._cache.put(key, var)
+        return var
+
+    def _load_step(self, time_step):
+        for name in self.active_keys:
+            if self.zero_copy:
+                self.ds.advise(name, time_step)
+            else:
+                self._load_variable(name, time_step, count=False)
+
+    def preload(self, time):
+        """Load all data needed to show ``time`` into the cache.
+
+        Safe to call from another thread, e.g. to read ahead of
+        rendering. Fractional times load the neighbouring steps used by
+        :attr:`interpolation`.
+        """
+        step = int(np.floor(time))
+        if step == time:
+            steps = [step]
+        elif self._interpolation == "linear":
+            steps = [step, step + 1]
+        else:
+            steps = range(step - 1, step + 3)
+        for s in steps:
+            self._load_step(int(np.clip(s, 0, self.max_time_step)))
+
+    def _is_cached(self, time_step):
+        if self.zero_copy:
+            return False
+        return all((name, time_step) in self._cache for name in self.active_keys)
+
+    def get_variable(self, name, time_step=None):
+        """Returns variable array for current (or given) time step."""
+        if time_step is None:
+            time_step = self.time_step
+        var = self._load_variable(name, time_step)
+        codec = self._codec(name)
+        if codec is not None:
+            var = codec.decode(var)
         if len(var) != self.mesh.n_cells:
             print(f"{len(var)=}")
             print(f"{self.mesh.n_cells=}")
             raise ValueError("Dimensional mismatch between data and mesh")
         return var
 
-    def clim(self, name=None):
-        # NOTE: using last timestep to avoid loading entire dataset
-        var = np.array(
-            self.ds[name or self.mesh.active_scalars_name or self.keys[0]][-2, :]
+    def statistics(self, name=None, bins=1024):
+        """Statistics of a variable over the full time history.
+
+        Computed once by streaming over the time axis in chunks (see
+        :func:`kale.stats.streaming_statistics`) and cached in a sidecar
+        file next to the data file, so later calls return immediately.
+        """
+        name = name or self.mesh.active_scalars_name or self.keys[0]
+        key = f"bins={bins}"
+        stats = self._stats.get(name, key)
+        if stats is None:
+            stats = streaming_statistics(self.ds[name], bins=bins, lock=self._read_lock)
+            self._stats.put(name, key, stats)
+        return stats
+
+    def analyze(
+        self,
+        name=None,
+        reductions=("max", "moments"),
+        chunk_steps=None,
+        workers=None,
+        attach=True,
+    ):
+        """Per-cell reductions of a variable over the full time history.
+
+        The time axis is streamed in chunks reduced in parallel (see
+        :func:`kale.analytics.reduce_variable`), so memory use is
+        bounded by the chunk size rather than the length of the history.
+
+        Parameters
+        ----------
+        name : str, optional
+            Variable name. Defaults to the active scalars.
+
+        reductions : Sequence, default: ("max", "moments")
+            Names or instances of the reductions in :mod:`kale.analytics`,
+            e.g. ``Crossings(threshold)`` or ``Histogram(bins=32)``.
+            Histograms default to the range of the variable.
+
+        chunk_steps : int, optional
+            Number of time steps per chunk. Defaults to a ~64 MiB chunk.
+
+        workers : int, optional
+            Number of threads reducing chunks. Defaults to the number of
+            CPUs.
+
+        attach : bool, default: True
+            Add the results to the mesh as static cell arrays.
+
+        Returns
+        -------
+        dict
+            Per-cell arrays named ``f"{name}_{result}"``, e.g.
+            ``cumulative_slip_argmax``.
+
+        """
+        from kale.analytics import Histogram, reduce_variable
+
+        name = name or self.mesh.active_scalars_name or self.keys[0]
+        reductions = [
+            Histogram(r.bins, self.clim(name))
+            if isinstance(r, Histogram) and r.range is None
+            else r
+            for r in reductions
+        ]
+        results = reduce_variable(
+            self.ds[name],
+            reductions,
+            chunk_steps=chunk_steps,
+            workers=workers,
+            lock=self._read_lock,
         )
-        return np.nanmin(var), np.nanmax(var)
+        results = {f"{name}_{key}": value for key, value in results.items()}
+        if attach:
+            for key, value in results.items():
+                self.mesh.cell_data[key] = value
+            self.modified(results)
+        return results
+
+    def events(self, name=None, threshold=0.0, min_cells=1):
+        """Catalog of the time steps where a variable jumps.
+
+        Detected in a single pass over the time axis (see
+        :func:`kale.events.detect_events`) and cached in a sidecar file
+        next to the data file, so later calls return immediately.
+
+        Parameters
+        ----------
+        name : str, optional
+            Variable name. Defaults to the active scalars.
+
+        threshold : float, default: 0.0
+            Cells whose absolute change from the previous step exceeds
+            this are affected by an event.
+
+        min_cells : int, default: 1
+            Minimum number of affected cells of an event.
+
+        Returns
+        -------
+        kale.events.EventCatalog
+
+        """
+        name = name or self.mesh.active_scalars_name or self.keys[0]
+        params = dict(threshold=float(threshold), min_cells=int(min_cells))
+        key = (name, *params.values())
+        if key not in self._events:
+            catalog = self._event_index.get(name, **params)
+            if catalog is None:
+                catalog = detect_events(self.ds[name], lock=self._read_lock, **params)
+                self._event_index.put(name, catalog, **params)
+            self._events[key] = catalog
+        return self._events[key]
+
+    def next_event(self, name=None, threshold=0.0, min_cells=1):
+        """Go to the next event after the current time step.
+
+        Returns the new time step, or ``None`` if there is no later
+        event. See :meth:`events` for the parameters.
+        """
+        step = self.events(name, threshold, min_cells).next(self.time)
+        if step is not None:
+            self.time_step = step
+        return step
+
+    def previous_event(self, name=None, threshold=0.0, min_cells=1):
+        """Go to the last event before the current time step.
+
+        Returns the new time step, or ``None`` if there is no earlier
+        event. See :meth:`events` for the parameters.
+        """
+        step = self.events(name, threshold, min_cells).previous(self.time)
+        if step is not None:
+            self.time_step = step
+        return step
+
+    def clim(self, name=None, percentiles=None):
+        """Color limits of a variable over the full time history.
+
+        Parameters
+        ----------
+        name : str, optional
+            Variable name. Defaults to the active scalars.
+
+        percentiles : Sequence, optional
+            Lower and upper percentiles (0-100) to use instead of the
+            minimum and maximum, e.g. ``(1, 99)`` for robust limits.
+
+        """
+        stats = self.statistics(name)
+        if percentiles is not None:
+            lo, hi = histogram_percentile(stats, percentiles)
+            return lo, hi
+        return stats["min"], stats["max"]
 
     @property
     def time_step(self):
@@ -81,28 +499,107 @@ class Engine:
     def time_step(self, value):
         if not isinstance(value, int):
             raise TypeError("Time step must be an integer")
-        if value < 0 or value > self.max_time_step:
+        self._set_time(value, 0.0)
+
+    @property
+    def time(self):
+        """Fractional time step.
+
+        Setting a value between two stored time steps blends their
+        arrays (see :attr:`interpolation`) without reading any other
+        data. ``time_step`` then reports the stored step just before.
+        """
+        return self._time
+
+    @time.setter
+    def time(self, value):
+        step = int(np.floor(value))
+        frac = float(value) - step
+        if step == self.max_time_step and frac == 0:
+            self._set_time(step, 0.0)
+        elif step == self.max_time_step:
             raise ValueError("Time step out of time range.")
-        self._time_step = value
-        for name in self.keys:
-            self.mesh[name] = self.get_variable(name)
-        self.modified()
+        else:
+            self._set_time(step, frac)
+
+    @property
+    def interpolation(self):
+        """Temporal interpolation used by :attr:`time`: "linear" or "cubic".
+
+        "cubic" is a monotone (PCHIP) cubic through the two neighbouring
+        steps on each side.
+        """
+        return self._interpolation
+
+    @interpolation.setter
+    def interpolation(self, method):
+        if method not in interpolate.METHODS:
+            raise ValueError(f"Interpolation must be one of {interpolate.METHODS}")
+        self._interpolation = method
+        self._interpolants = {}
+
+    def _interpolant(self, name, time_step):
+        """Interpolant coefficients between ``time_step`` and the next step."""
+        key = (time_step, self._interpolation)
+        cached = self._interpolants.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if self._interpolation == "linear":
+            coefficients = interpolate.linear_coefficients(
+                self.get_variable(name, time_step),
+                self.get_variable(name, time_step + 1),
+            )
+        else:
+            steps = np.clip(
+                np.arange(time_step - 1, time_step + 3), 0, self.max_time_step
+            )
+            coefficients = interpolate.cubic_coefficients(
+                *(self.get_variable(name, int(step)) for step in steps)
+            )
+        self._interpolants[name] = (key, coefficients)
+        return coefficients
+
+    def _set_time(self, step, frac):
+        if step < 0 or step > self.max_time_step:
+            raise ValueError("Time step out of time range.")
+        if self._time_step is not None and step != self._time_step:
+            self._stride = step - self._time_step
+        self._time_step = step
+        self._time = step + frac
+        with profiling.span(profiling.FRAME_SPAN):
+            for name in self.active_keys:
+                if frac:
+                    with profiling.span("engine.interpolate"):
+                        self.mesh[name] = interpolate.evaluate(
+                            self._interpolant(name, step), frac
+                        )
+                else:
+                    self.mesh[name] = self.get_variable(name)
+            self._prefetcher.schedule(
+                step, self._stride, self.max_time_step, skip=self._is_cached
+            )
+        self.modified(self.active_keys)
 
     @property
     def algorithm(self):
         if self._algorithm is None:
-            from kale.algorithms import EngineAlgorithm
+            from kale.algorithms import (
+                EngineAlgorithm,
+                extract_surface_static_algorithm,
+            )
 
-            self._algorithm = extract_surface_algorithm(EngineAlgorithm(self))
+            self._algorithm = extract_surface_static_algorithm(
+                EngineAlgorithm(self), cache=self.geometry_cache
+            )
         return self._algorithm
 
     @property
     def algorithm_smoothed(self):
         if self._algorithm_smoothed is None:
-            from kale.algorithms import subdivide_algorithm
+            from kale.algorithms import subdivide_static_algorithm
 
-            self._algorithm_smoothed = subdivide_algorithm(
-                cell_data_to_point_data_algorithm(self.algorithm), 1
+            self._algorithm_smoothed = subdivide_static_algorithm(
+                self.algorithm, 1, cache=self.geometry_cache
             )
         return self._algorithm_smoothed
 
@@ -112,8 +609,34 @@ class Engine:
 
     @smoothing_iterations.setter
     def smoothing_iterations(self, n: int):
+        if self._geometry_algorithms is not None:
+            self._geometry_algorithms[1].SetNumberOfSubdivisions(n)
         return self.algorithm_smoothed.SetNumberOfSubdivisions(n)
 
+    def _geometry_algorithm(self, smoothed=False):
+        """Surface (or smoothed surface) of the mesh without the data arrays.
+
+        Time step changes do not modify it, so stages depending only on
+        the geometry are not re-executed.
+        """
+        if self._geometry_algorithms is None:
+            from kale.algorithms import (
+                EngineAlgorithm,
+                extract_surface_static_algorithm,
+                subdivide_static_algorithm,
+            )
+
+            surface = extract_surface_static_algorithm(
+                EngineAlgorithm(self, arrays=()), cache=self.geometry_cache
+            )
+            self._geometry_algorithms = (
+                surface,
+                subdivide_static_algorithm(
+                    surface, self.smoothing_iterations, cache=self.geometry_cache
+                ),
+            )
+        return self._geometry_algorithms[smoothed]
+
     @property
     def boundary(self):
         """Outline the boundary of the mesh.
@@ -121,10 +644,11 @@ class Engine:
         Please note that this is a static mesh (Engine assumes
         that the mesh geometry does not change).
         """
-        from kale.algorithms import extract_feature_edges_algorithm
+        from kale.algorithms import extract_feature_edges_static_algorithm
 
-        edges = extract_feature_edges_algorithm(
-            self.algorithm,
+        edges = extract_feature_edges_static_algorithm(
+            self._geometry_algorithm(),
+            cache=self.geometry_cache,
             boundary_edges=True,
             non_manifold_edges=False,
             feature_edges=False,
@@ -139,10 +663,11 @@ class Engine:
         Please note that this is a static mesh (Engine assumes
         that the mesh geometry does not change).
         """
-        from kale.algorithms import extract_feature_edges_algorithm
+        from kale.algorithms import extract_feature_edges_static_algorithm
 
-        edges = extract_feature_edges_algorithm(
-            self.algorithm_smoothed,
+        edges = extract_feature_edges_static_algorithm(
+            self._geometry_algorithm(smoothed=True),
+            cache=self.geometry_cache,
             boundary_edges=True,
             non_manifold_edges=False,
             feature_edges=False,
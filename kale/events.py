@@ -0,0 +1,196 @@
+"""Detection and cataloging of the time steps where a variable jumps.
+
+Earthquake cycle outputs such as ``cumulative_slip`` only change in
+discrete events. :func:`detect_events` scans a variable once, in
+chunks of time steps, and records every step where at least
+``min_cells`` cells change by more than ``threshold`` from the previous
+step. The resulting :class:`EventCatalog` is compact (steps, affected
+cells and magnitudes) and is cached in a sidecar file next to the data
+file, see :class:`EventIndex`.
+"""
+import json
+import os
+from pathlib import Path
+import warnings
+
+import numpy as np
+
+from kale.stats import data_signature, iter_chunks
+
+EVENTS_SUFFIX = ".kale-events"
+
+
+class EventCatalog:
+    """Catalog of the events of a variable.
+
+    Attributes
+    ----------
+    steps : numpy.ndarray
+        Time step of each event, increasing.
+
+    offsets, cells : numpy.ndarray
+        Affected cells of event ``i`` are
+        ``cells[offsets[i]:offsets[i + 1]]``.
+
+    max_jump, total_jump : numpy.ndarray
+        Largest and summed absolute change of the affected cells.
+
+    """
+
+    def __init__(self, steps, offsets, cells, max_jump, total_jump):
+        self.steps = np.asarray(steps, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.cells = np.asarray(cells, dtype=np.int32)
+        self.max_jump = np.asarray(max_jump, dtype=np.float64)
+        self.total_jump = np.asarray(total_jump, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"EventCatalog({len(self)} events)"
+
+    @property
+    def n_cells(self):
+        """Number of affected cells of each event."""
+        return np.diff(self.offsets)
+
+    def cells_of(self, index):
+        """Affected cells of event ``index``."""
+        return self.cells[self.offsets[index] : self.offsets[index + 1]]
+
+    def next(self, step):
+        """Time step of the first event after ``step``, or ``None``."""
+        i = np.searchsorted(self.steps, step, side="right")
+        return int(self.steps[i]) if i < len(self.steps) else None
+
+    def previous(self, step):
+        """Time step of the last event before ``step``, or ``None``."""
+        i = np.searchsorted(self.steps, step, side="left")
+        return int(self.steps[i - 1]) if i > 0 else None
+
+    def select(self, start=0, stop=None, min_cells=1, min_magnitude=0.0):
+        """Steps of the events in ``[start, stop)`` passing the filters."""
+        keep = (self.steps >= start) & (self.n_cells >= min_cells)
+        keep &= self.total_jump >= min_magnitude
+        if stop is not None:
+            keep &= self.steps < stop
+        return self.steps[keep]
+
+    def to_arrays(self):
+        return dict(
+            steps=self.steps,
+            offsets=self.offsets,
+            cells=self.cells,
+            max_jump=self.max_jump,
+            total_jump=self.total_jump,
+        )
+
+
+def detect_events(variable, threshold=0.0, min_cells=1, chunk_steps=None, lock=None):
+    """Find the time steps where a variable jumps.
+
+    Parameters
+    ----------
+    variable : array-like
+        A ``(n_steps, n_cells)`` variable, e.g. ``engine.ds[name]``.
+
+    threshold : float, default: 0.0
+        Cells whose absolute change from the previous step exceeds
+        this are affected.
+
+    min_cells : int, default: 1
+        Minimum number of affected cells of an event.
+
+    chunk_steps : int, optional
+        Number of time steps per chunk. Defaults to a ~64 MiB chunk.
+
+    lock : threading.Lock, optional
+        Lock held while reading each chunk.
+
+    Returns
+    -------
+    EventCatalog
+
+    """
+    steps, counts, cells, max_jump, total_jump = [], [], [], [], []
+    previous = None
+    for first, block in iter_chunks(variable, chunk_steps, lock):
+        if previous is None:
+            # The first step has no previous step to jump from
+            previous, block, first = block[0], block[1:], first + 1
+        jump = np.abs(np.diff(block, axis=0, prepend=previous[None]))
+        previous = block[-1] if len(block) else previous
+        affected = jump > threshold
+        count = affected.sum(axis=1)
+        rows = np.flatnonzero(count >= max(min_cells, 1))
+        if not len(rows):
+            continue
+        # Row-major nonzero groups the affected cells by event
+        row, cell = np.nonzero(affected[rows])
+        values = jump[rows][row, cell]
+        starts = np.r_[0, np.cumsum(count[rows])[:-1]]
+        steps.append(first + rows)
+        counts.append(count[rows])
+        cells.append(cell.astype(np.int32))
+        max_jump.append(np.maximum.reduceat(values, starts))
+        total_jump.append(np.add.reduceat(values, starts))
+    if not steps:
+        empty = np.zeros(0)
+        return EventCatalog(empty, [0], empty, empty, empty)
+    counts = np.concatenate(counts)
+    return EventCatalog(
+        np.concatenate(steps),
+        np.r_[0, np.cumsum(counts)],
+        np.concatenate(cells),
+        np.concatenate(max_jump),
+        np.concatenate(total_jump),
+    )
+
+
+class EventIndex:
+    """Sidecar files caching the event catalogs of a data file.
+
+    Catalogs are stored next to the data file in
+    ``<data_filename>.kale-events.<name>.npz`` with the detection
+    parameters and the data file's resolved path, size and
+    modification time. They are ignored once the data file changes.
+    """
+
+    def __init__(self, data_filename):
+        self.data_filename = Path(data_filename).resolve()
+
+    def filename(self, name):
+        return self.data_filename.with_name(
+            f"{self.data_filename.name}{EVENTS_SUFFIX}.{name}.npz"
+        )
+
+    def _signature(self, params):
+        return dict(data_signature(self.data_filename), params=params)
+
+    def get(self, name, **params):
+        """Return the cached catalog of ``name`` or ``None``."""
+        try:
+            with np.load(self.filename(name)) as f:
+                if json.loads(str(f["signature"])) != self._signature(params):
+                    return None
+                return EventCatalog(
+                    **{key: f[key] for key in f.files if key != "signature"}
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def put(self, name, catalog, **params):
+        """Store a catalog and write its sidecar file."""
+        filename = self.filename(name)
+        tmp = filename.with_name(filename.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    signature=json.dumps(self._signature(params)),
+                    **catalog.to_arrays(),
+                )
+            os.replace(tmp, filename)
+        except OSError as e:
+            warnings.warn(f"Unable to write event index `{filename}`: {e}")
@@ -2,14 +2,19 @@ import numpy as np
 import pyvista as pv
 
 from kale import theme
-from kale.algorithms import contour_banded
-from kale.assets import load_coastlines
+from kale.algorithms import contour_banded, contour_banded_static
+from kale.assets import coastline_store, load_coastlines
 
 
-def add_contours(plotter, source, scalars, levels, **kwargs):
+def add_contours(plotter, source, scalars, levels, static=False, **kwargs):
+    """Add banded contours and their edges to the plotter.
+
+    Use ``static=True`` for the NumPy contouring of static triangle
+    surfaces (see :func:`kale.algorithms.contour_banded_static`).
+    """
     n_colors = len(levels) - 1
     clim = [np.min(levels), np.max(levels)]
-    contour, edges = contour_banded(
+    contour, edges = (contour_banded_static if static else contour_banded)(
         source,
         levels,
         rng=clim,
@@ -50,9 +55,26 @@ def add_bounds(plotter, **kwargs):
     return pv.Plotter.show_bounds(plotter, **args)
 
 
-def add_coastlines(plotter, **kwargs):
-    """Run after adding all other data to the scene."""
-    coasts = load_coastlines()
+def _renderer_size(plotter):
+    """Size in pixels of the active renderer of the plotter."""
+    x0, y0, x1, y1 = plotter.renderer.GetViewport()
+    scale = plotter.image_scale or 1
+    width, height = plotter.window_size
+    return width * (x1 - x0) * scale, height * (y1 - y0) * scale
+
+
+def add_coastlines(plotter, lod=True, **kwargs):
+    """Run after adding all other data to the scene.
+
+    With ``lod=True``, the coastlines are simplified to the level of
+    detail matching the pixel size of the current renderer.
+    """
+    level = 0
+    if lod:
+        level = coastline_store().level_for(plotter.bounds, _renderer_size(plotter))
+    coasts = load_coastlines(plotter.bounds, level=level)
+    if not coasts.n_points:
+        return None
     roi = coasts.clip_box(bounds=plotter.bounds, invert=False)
     kwargs.setdefault("color", theme.COASTLINE_COLOR)
     pv.Plotter.add_mesh(plotter, roi, **kwargs)
@@ -0,0 +1,48 @@
+"""Temporal interpolation between stored time steps.
+
+Interpolants are stored as polynomial coefficients in the fraction
+``s`` in ``[0, 1)`` between two stored steps, so that evaluating an
+in-between frame is a short Horner evaluation over the cell arrays.
+"""
+import numpy as np
+
+METHODS = ("linear", "cubic")
+
+
+def linear_coefficients(p1, p2):
+    """Coefficients of the linear interpolant from ``p1`` to ``p2``."""
+    return p1, p2 - p1
+
+
+def cubic_coefficients(p0, p1, p2, p3):
+    """Coefficients of the monotone cubic interpolant from ``p1`` to ``p2``.
+
+    Uses the Fritsch-Carlson (PCHIP) tangents computed from the
+    neighbouring steps ``p0`` and ``p3`` with unit spacing, so the
+    interpolant never overshoots the stored values.
+    """
+    d0 = p1 - p0
+    d1 = p2 - p1
+    d2 = p3 - p2
+    m1 = _pchip_slope(d0, d1)
+    m2 = _pchip_slope(d1, d2)
+    c2 = 3 * d1 - 2 * m1 - m2
+    c3 = m1 + m2 - 2 * d1
+    return p1, m1, c2, c3
+
+
+def _pchip_slope(d0, d1):
+    # Harmonic mean of the secants, zero at local extrema
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = 2 * d0 * d1 / (d0 + d1)
+    return np.where(d0 * d1 > 0, slope, 0)
+
+
+def evaluate(coefficients, s):
+    """Evaluate interpolant ``coefficients`` at fraction ``s``."""
+    result = coefficients[-1] * s
+    for c in coefficients[-2:0:-1]:
+        result += c
+        result *= s
+    result += coefficients[0]
+    return result
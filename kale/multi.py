@@ -0,0 +1,307 @@
+"""Engine over several simulation runs sharing one mesh.
+
+:class:`MultiEngine` reads the mesh once and attaches any number of
+data files as named sources. Their variables appear as
+``"<source>/<variable>"`` arrays of the one mesh, so the static
+geometry and every pipeline built on the Engine are shared by all runs.
+Difference fields between runs (see :meth:`MultiEngine.add_difference`)
+are computed per step from the cached variables of both runs.
+"""
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from kale.engine import Engine
+from kale.events import EventIndex
+from kale.stats import StatisticsCache
+from kale.storage import open_dataset
+
+SEPARATOR = "/"
+
+
+def source_key(source, variable):
+    """Array name of ``variable`` of ``source``, e.g. ``"run1/cumulative_slip"``."""
+    return f"{source}{SEPARATOR}{variable}"
+
+
+def split_key(key):
+    """Source and variable of an array name, see :func:`source_key`."""
+    source, _, variable = key.partition(SEPARATOR)
+    return source, variable
+
+
+class DifferenceVariable:
+    """Lazy ``a - b`` of two ``(n_steps, n_cells)`` variables.
+
+    Indexing reads both variables and subtracts them. The number of
+    steps is the smaller of the two.
+    """
+
+    ndim = 2
+
+    def __init__(self, a, b):
+        if a.shape[1:] != b.shape[1:]:
+            raise ValueError(
+                f"Cannot subtract variables of shapes {a.shape} and {b.shape}."
+            )
+        self.a = a
+        self.b = b
+        self.shape = (min(a.shape[0], b.shape[0]), *a.shape[1:])
+        self.dtype = np.result_type(a.dtype, b.dtype)
+        self.dims = getattr(a, "dims", ("time", "cell"))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        return np.subtract(np.asarray(self.a[index]), np.asarray(self.b[index]))
+
+    def __array__(self, dtype=None):
+        return np.asarray(self[: self.shape[0]], dtype=dtype)
+
+    @property
+    def values(self):
+        return np.asarray(self)
+
+
+class MultiDataset:
+    """The variables of several datasets under ``"<source>/<variable>"`` keys.
+
+    Also holds the difference variables added with
+    :meth:`add_difference`. The interface mirrors the parts of
+    :class:`xarray.Dataset` used by :class:`kale.Engine`.
+    """
+
+    def __init__(self, datasets):
+        self.datasets = dict(datasets)
+        self._differences = {}
+
+    @property
+    def zero_copy(self):
+        return all(getattr(ds, "zero_copy", False) for ds in self.datasets.values())
+
+    def __getitem__(self, key):
+        if key in self._differences:
+            return self._differences[key][0]
+        source, variable = split_key(key)
+        if source not in self.datasets:
+            raise KeyError(key)
+        return self.datasets[source][variable]
+
+    def __contains__(self, key):
+        source, variable = split_key(key)
+        return key in self._differences or (
+            source in self.datasets and variable in self.datasets[source]
+        )
+
+    def keys(self):
+        keys = [
+            source_key(source, variable)
+            for source, ds in self.datasets.items()
+            for variable in ds.keys()
+        ]
+        return keys + list(self._differences)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def add_difference(self, key, a, b):
+        """Add ``key`` as the difference of the variables ``a`` and ``b``."""
+        self._differences[key] = DifferenceVariable(self[a], self[b]), (a, b)
+
+    def operands(self, key):
+        """Keys of the variables subtracted in ``key``, or ``None``."""
+        difference = self._differences.get(key)
+        return None if difference is None else difference[1]
+
+    def advise(self, key, time_step):
+        source, variable = split_key(key)
+        self.datasets[source].advise(variable, time_step)
+
+    def close(self):
+        for ds in self.datasets.values():
+            ds.close()
+
+
+class _SourceSidecars:
+    """Routes sidecar lookups of ``"<source>/<variable>"`` keys to each source.
+
+    Difference variables have no data file of their own and are not
+    cached.
+    """
+
+    def __init__(self, sidecars):
+        self.sidecars = sidecars
+
+    def get(self, key, *args, **kwargs):
+        source, variable = split_key(key)
+        sidecar = self.sidecars.get(source)
+        return None if sidecar is None else sidecar.get(variable, *args, **kwargs)
+
+    def put(self, key, *args, **kwargs):
+        source, variable = split_key(key)
+        sidecar = self.sidecars.get(source)
+        if sidecar is not None:
+            sidecar.put(variable, *args, **kwargs)
+
+
+class MultiEngine(Engine):
+    """Engine over several data files of the same mesh.
+
+    The mesh is read once and every variable of every run is a cell
+    array ``"<source>/<variable>"`` of it, so memory grows with the
+    number of loaded arrays rather than with the number of runs.
+    Variables are loaded lazily by default: only the arrays requested by
+    the pipelines (see :meth:`kale.Engine.request`) are read on each
+    time step. The time range is that of the shortest run.
+
+    Parameters
+    ----------
+    mesh_filename : str or Path
+        Mesh shared by all runs.
+
+    data_filenames : Mapping or Sequence
+        Data files by source name, or a sequence of data files named by
+        their stem (e.g. ``"run1.hdf"`` is ``"run1"``).
+
+    lazy : bool, default: True
+        Only load requested variables on each time step.
+
+    **kwargs
+        Passed to :class:`kale.Engine`.
+
+    Examples
+    --------
+    >>> engine = MultiEngine("nankai.vtk", {"a": "a.hdf", "b": "b.hdf"})
+    >>> engine.add_difference("a", "b")
+    ['a-b/cumulative_slip', 'a-b/last_event_slip', 'a-b/geometric_moment']
+    >>> engine.set_active_scalars("a-b/cumulative_slip")
+
+    """
+
+    def __init__(self, mesh_filename, data_filenames, zscale=0.1, lazy=True, **kwargs):
+        super().__init__(
+            mesh_filename, data_filenames, zscale=zscale, lazy=lazy, **kwargs
+        )
+
+    def _open_data(self, data_filenames):
+        if not isinstance(data_filenames, Mapping):
+            names = [Path(filename).stem for filename in data_filenames]
+            if len(set(names)) != len(names):
+                raise ValueError(
+                    "Data files with the same name, give them as a mapping."
+                )
+            data_filenames = dict(zip(names, data_filenames))
+        if not data_filenames:
+            raise ValueError("At least one data file is required.")
+        for source, filename in data_filenames.items():
+            if SEPARATOR in source:
+                raise ValueError(f"Source names cannot contain `{SEPARATOR}`.")
+            if not Path(filename).exists():
+                raise ValueError(f"`{filename} does not exist.")
+        self._ds = MultiDataset(
+            {
+                source: open_dataset(filename)
+                for source, filename in data_filenames.items()
+            }
+        )
+        self._stats = _SourceSidecars(
+            {
+                source: StatisticsCache(filename)
+                for source, filename in data_filenames.items()
+            }
+        )
+        self._event_index = _SourceSidecars(
+            {
+                source: EventIndex(filename)
+                for source, filename in data_filenames.items()
+            }
+        )
+
+    @property
+    def sources(self):
+        """Names of the runs."""
+        return list(self.ds.datasets)
+
+    def add_difference(self, a, b, variables=None, name=None):
+        """Add difference fields ``a - b`` of two runs.
+
+        Differences are computed on each time step from the variables of
+        both runs, which are read and cached as usual, and only when
+        the difference is loaded.
+
+        Parameters
+        ----------
+        a, b : str
+            Source names.
+
+        variables : Sequence[str], optional
+            Variables to subtract. Defaults to those of both runs.
+
+        name : str, optional
+            Source name of the differences. Defaults to ``f"{a}-{b}"``.
+
+        Returns
+        -------
+        list
+            Keys of the difference arrays, ``"<name>/<variable>"``.
+
+        """
+        for source in (a, b):
+            if source not in self.ds.datasets:
+                raise ValueError(f"Unknown source `{source}`.")
+        name = name or f"{a}-{b}"
+        if name in self.ds.datasets or SEPARATOR in name:
+            raise ValueError(f"Invalid difference name `{name}`.")
+        if variables is None:
+            variables = [
+                variable
+                for variable in self.ds.datasets[a].keys()
+                if variable in self.ds.datasets[b]
+            ]
+        keys = []
+        for variable in variables:
+            key = source_key(name, variable)
+            self.ds.add_difference(
+                key, source_key(a, variable), source_key(b, variable)
+            )
+            keys.append(key)
+        if not self.lazy:
+            # Every variable is loaded on each time step
+            for key in keys:
+                self.mesh[key] = self.get_variable(key)
+            self.modified(keys)
+        return keys
+
+    def _operand(self, name, time_step, count):
+        var = super()._load_variable(name, time_step, count)
+        codec = self._codec(name)
+        return var if codec is None else codec.decode(var)
+
+    def _load_variable(self, name, time_step, count=True):
+        operands = self.ds.operands(name)
+        if operands is None:
+            return super()._load_variable(name, time_step, count)
+        a, b = (self._operand(key, time_step, count) for key in operands)
+        difference = np.subtract(a, b)
+        codec = self._codec(name)
+        return difference if codec is None else codec.encode(difference)
+
+    def _load_step(self, time_step):
+        # Differences are computed when used, only their operands are loaded
+        for name in self.active_keys:
+            for key in self.ds.operands(name) or (name,):
+                if self.zero_copy:
+                    self.ds.advise(key, time_step)
+                else:
+                    super()._load_variable(key, time_step, count=False)
+
+    def _is_cached(self, time_step):
+        if self.zero_copy:
+            return False
+        return all(
+            (key, time_step) in self._cache
+            for name in self.active_keys
+            for key in self.ds.operands(name) or (name,)
+        )
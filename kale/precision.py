@@ -0,0 +1,71 @@
+"""Reduced precision representations of the Engine's per-step arrays.
+
+A codec ``encode``s the arrays read from the data file into the form
+held in the step cache and ``decode``s them into the arrays set on the
+mesh and passed down the VTK pipeline.
+"""
+import numpy as np
+
+PRECISIONS = ("float32", "float64", "fixed8", "fixed16")
+
+
+class Cast:
+    """Arrays converted to a floating point type, e.g. ``float32``."""
+
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+
+    def encode(self, values):
+        return np.array(values, dtype=self.dtype)
+
+    def decode(self, codes):
+        return codes
+
+
+class FixedPoint:
+    """Arrays quantized to unsigned integers with a scale and an offset.
+
+    Values in ``[lo, hi]`` are mapped to the codes ``0`` to
+    ``2**bits - 2`` and decoded to ``float32`` within about half a
+    step, ``(hi - lo) / (2**bits - 2) / 2``, of the original values.
+    Values outside the range are clipped and the largest code marks
+    NaNs.
+
+    Parameters
+    ----------
+    lo, hi : float
+        Range of the values, e.g. from :meth:`kale.Engine.statistics`.
+
+    bits : int, default: 16
+        Number of bits per value, 8 or 16.
+
+    """
+
+    def __init__(self, lo, hi, bits=16):
+        if bits not in (8, 16):
+            raise ValueError("`bits` must be 8 or 16.")
+        self.dtype = np.dtype(f"uint{bits}")
+        self.nan = np.iinfo(self.dtype).max
+        self.offset = float(lo) if np.isfinite(lo) else 0.0
+        span = float(hi) - self.offset if np.isfinite(hi) else 0.0
+        self.scale = span / (self.nan - 1) if span > 0 else 1.0
+
+    @property
+    def resolution(self):
+        """Largest difference between a value and its decoded value."""
+        return self.scale / 2
+
+    def encode(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        nan = np.isnan(values)
+        scaled = (values - self.offset) / self.scale
+        np.clip(scaled, 0, self.nan - 1, out=scaled)
+        scaled[nan] = self.nan
+        return np.rint(scaled).astype(self.dtype)
+
+    def decode(self, codes):
+        values = codes.astype(np.float32)
+        values *= np.float32(self.scale)
+        values += np.float32(self.offset)
+        values[codes == self.nan] = np.nan
+        return values
@@ -0,0 +1,312 @@
+"""Opt-in per-stage profiling of Engine I/O, the VTK pipeline and rendering.
+
+Nothing is recorded unless a :class:`Profiler` is running. While one
+is, the Engine reports its data reads and time step updates through
+:func:`span`, and every watched VTK algorithm (kale's Python algorithms
+as well as VTK's own filters) and render window is timed with
+``StartEvent``/``EndEvent`` observers. Spans are grouped into frames,
+one per time change of an Engine.
+
+    with Profiler() as profiler:
+        profiler.watch(plotter)
+        kale.save_movie(engine, plotter, "movie.mp4")
+    print(profiler.table())
+    profiler.save_chrome_trace("trace.json")  # chrome://tracing, Perfetto
+
+Pipeline stages run when downstream algorithms or the renderer request
+them, so spans nest: the ``render`` span contains the updates of the
+stages it triggered. The ``self`` column of :meth:`Profiler.table`
+excludes nested spans.
+"""
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+from pyvista import _vtk
+
+# Span that starts a new frame
+FRAME_SPAN = "engine.set_time"
+
+_active = None
+# Yields a dict like Profiler.span, whose updates are discarded
+_null = contextlib.nullcontext({"bytes": None})
+
+
+def active():
+    """The running :class:`Profiler`, or ``None``."""
+    return _active
+
+
+def span(name, category="engine", nbytes=None):
+    """Context manager timing a block as ``name`` in the running profiler.
+
+    A no-op unless a :class:`Profiler` is running. The yielded value is
+    a dict whose ``"bytes"`` item may be set inside the block.
+    """
+    if _active is None:
+        return _null
+    return _active.span(name, category, nbytes)
+
+
+def watch(*objects):
+    """Watch ``objects`` in the running profiler, see :meth:`Profiler.watch`.
+
+    A no-op unless a :class:`Profiler` is running.
+    """
+    if _active is not None:
+        _active.watch(*objects)
+
+
+Span = collections.namedtuple(
+    "Span", ["name", "category", "start", "duration", "thread", "frame", "nbytes"]
+)
+
+
+class Profiler:
+    """Recorder of timed spans, aggregated per stage and frame.
+
+    Use as a context manager, or call :meth:`start` and :meth:`stop`.
+    Only one profiler can run at a time.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.frame = 0
+        self._origin = time.perf_counter()
+        self._observers = []
+        self._watched = {}
+        self._pending = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Start recording."""
+        global _active
+        if _active is not None:
+            raise ValueError("A profiler is already running.")
+        _active = self
+        return self
+
+    def stop(self):
+        """Stop recording and remove all observers."""
+        global _active
+        if _active is self:
+            _active = None
+        for obj, tag in self._observers:
+            obj.RemoveObserver(tag)
+        self._observers = []
+        self._watched = {}
+
+    def record(self, name, category, start, duration, nbytes=None):
+        """Add a span, ``start`` being a :func:`time.perf_counter` value."""
+        self.spans.append(
+            Span(
+                name,
+                category,
+                start - self._origin,
+                duration,
+                threading.get_ident(),
+                self.frame,
+                nbytes,
+            )
+        )
+
+    @contextlib.contextmanager
+    def span(self, name, category="engine", nbytes=None):
+        """Context manager timing a block, see :func:`span`."""
+        info = {"bytes": nbytes}
+        if name == FRAME_SPAN:
+            self.frame += 1
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(
+                name, category, start, time.perf_counter() - start, info["bytes"]
+            )
+
+    def watch(self, *objects):
+        """Time the VTK algorithms of ``objects`` on every execution.
+
+        Accepts VTK algorithms and algorithm outputs, whose upstream
+        pipeline is watched too, and PyVista plotters, whose render
+        window and the pipelines of all their mappers are watched.
+        """
+        for obj in objects:
+            if hasattr(obj, "ren_win") and hasattr(obj, "renderers"):
+                self._watch_plotter(obj)
+            else:
+                self._watch_algorithm(obj)
+        return self
+
+    def _observe(self, obj, name, category, output=False):
+        key = id(obj)
+
+        def on_start(caller, event):
+            self._pending[key, threading.get_ident()] = time.perf_counter()
+
+        def on_end(caller, event):
+            start = self._pending.pop((key, threading.get_ident()), None)
+            if start is None:
+                return
+            duration = time.perf_counter() - start
+            nbytes = None
+            if output and caller.GetNumberOfOutputPorts():
+                data = caller.GetOutputDataObject(0)
+                if data is not None:
+                    nbytes = data.GetActualMemorySize() * 1024
+            self.record(name, category, start, duration, nbytes)
+
+        for event, callback in (("StartEvent", on_start), ("EndEvent", on_end)):
+            self._observers.append((obj, obj.AddObserver(event, callback)))
+
+    def _stage_name(self, algorithm):
+        name = type(algorithm).__name__
+        names = set(self._watched.values())
+        if name in names:
+            count = 2
+            while f"{name}#{count}" in names:
+                count += 1
+            name = f"{name}#{count}"
+        return name
+
+    def _watch_algorithm(self, algorithm):
+        if isinstance(algorithm, _vtk.vtkAlgorithmOutput):
+            algorithm = algorithm.GetProducer()
+        if not isinstance(algorithm, _vtk.vtkAlgorithm):
+            return
+        if id(algorithm) in self._watched:
+            return
+        self._watched[id(algorithm)] = name = self._stage_name(algorithm)
+        self._observe(algorithm, name, "pipeline", output=True)
+        for port in range(algorithm.GetNumberOfInputPorts()):
+            for connection in range(algorithm.GetNumberOfInputConnections(port)):
+                self._watch_algorithm(algorithm.GetInputAlgorithm(port, connection))
+
+    def _watch_plotter(self, plotter):
+        if plotter.ren_win is not None and id(plotter.ren_win) not in self._watched:
+            self._watched[id(plotter.ren_win)] = "render"
+            self._observe(plotter.ren_win, "render", "render")
+        for renderer in plotter.renderers:
+            for actor in renderer.actors.values():
+                mapper = actor.GetMapper() if hasattr(actor, "GetMapper") else None
+                if mapper is None:
+                    continue
+                for port in range(mapper.GetNumberOfInputPorts()):
+                    for connection in range(mapper.GetNumberOfInputConnections(port)):
+                        self._watch_algorithm(
+                            mapper.GetInputAlgorithm(port, connection)
+                        )
+
+    def self_times(self):
+        """Duration of each span minus the spans nested in it, in seconds."""
+        result = [span.duration for span in self.spans]
+        by_thread = collections.defaultdict(list)
+        for i, span in enumerate(self.spans):
+            by_thread[span.thread].append(i)
+        for indices in by_thread.values():
+            indices.sort(key=lambda i: (self.spans[i].start, -self.spans[i].duration))
+            stack = []
+            for i in indices:
+                span = self.spans[i]
+                while stack and (
+                    self.spans[stack[-1]].start + self.spans[stack[-1]].duration
+                    <= span.start
+                ):
+                    stack.pop()
+                if stack:
+                    result[stack[-1]] -= span.duration
+                stack.append(i)
+        return result
+
+    def summary(self):
+        """Per-stage totals.
+
+        Returns
+        -------
+        dict
+            For each stage name, a dict of ``calls``, ``total`` and
+            ``self`` seconds and ``bytes`` (the summed bytes read or
+            output, ``None`` if not measured).
+
+        """
+        stages = {}
+        for span, self_time in zip(self.spans, self.self_times()):
+            stage = stages.setdefault(
+                span.name, dict(calls=0, total=0.0, self=0.0, bytes=None)
+            )
+            stage["calls"] += 1
+            stage["total"] += span.duration
+            stage["self"] += self_time
+            if span.nbytes is not None:
+                stage["bytes"] = (stage["bytes"] or 0) + span.nbytes
+        return stages
+
+    def frames(self):
+        """Per-frame breakdown: a list of ``{stage: self seconds}`` dicts."""
+        frames = collections.defaultdict(collections.Counter)
+        for span, self_time in zip(self.spans, self.self_times()):
+            frames[span.frame][span.name] += self_time
+        return [dict(frames[i]) for i in sorted(frames)]
+
+    def table(self):
+        """Return a table of the time and bytes of each stage."""
+        n_frames = max(len(self.frames()), 1)
+        lines = [
+            f"{'stage':<32}{'calls':>8}{'total (s)':>12}{'self (s)':>12}"
+            f"{'ms/frame':>12}{'MB':>10}"
+        ]
+        stages = sorted(self.summary().items(), key=lambda item: -item[1]["self"])
+        for name, stage in stages:
+            mb = "" if stage["bytes"] is None else f"{stage['bytes'] / 2**20:.1f}"
+            lines.append(
+                f"{name:<32}{stage['calls']:>8}{stage['total']:>12.3f}"
+                f"{stage['self']:>12.3f}{1e3 * stage['self'] / n_frames:>12.2f}"
+                f"{mb:>10}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """The spans in the Chrome trace event format, as a dict."""
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [
+            dict(
+                name="thread_name",
+                ph="M",
+                pid=pid,
+                tid=thread,
+                args=dict(name=names.get(thread, str(thread))),
+            )
+            for thread in {span.thread for span in self.spans}
+        ]
+        for span in self.spans:
+            args = dict(frame=span.frame)
+            if span.nbytes is not None:
+                args["bytes"] = span.nbytes
+            events.append(
+                dict(
+                    name=span.name,
+                    cat=span.category,
+                    ph="X",
+                    ts=1e6 * span.start,
+                    dur=1e6 * span.duration,
+                    pid=pid,
+                    tid=span.thread,
+                    args=args,
+                )
+            )
+        return dict(traceEvents=events, displayTimeUnit="ms")
+
+    def save_chrome_trace(self, filename):
+        """Write :meth:`chrome_trace` to a JSON file."""
+        with open(filename, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return filename
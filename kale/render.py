@@ -0,0 +1,803 @@
+"""Off-screen rendering of Engine scenes.
+
+A scene is a plain, JSON-serializable dictionary describing what to
+render (data files, scalars, contour levels, colormap, warp, camera,
+...) so that it can be rebuilt identically in other processes. See
+:data:`DEFAULT_SCENE` for the available keys.
+"""
+import collections
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import multiprocessing
+import os
+from pathlib import Path
+import queue
+import shutil
+import tempfile
+import threading
+import time as _time
+
+import numpy as np
+import pyvista as pv
+
+from kale import helpers, profiling, theme
+from kale.engine import Engine
+
+DEFAULT_SCENE = dict(
+    # Engine
+    mesh=None,
+    data=None,
+    zscale=0.1,
+    # Precision of the per-step arrays, e.g. "float32", see Engine.precision
+    precision=None,
+    # Contoured scalars
+    scalars=None,
+    levels=None,
+    cmap=None,
+    show_scalar_bar=False,
+    smoothing_iterations=0,
+    # Warp by scalars, e.g. dict(scalars="geometric_moment", factor=2e-9),
+    # along z or, with normals=True, along the surface normals
+    warp=None,
+    # Decorations
+    boundary=True,
+    floor=True,
+    bounds=False,
+    coastlines=False,
+    # Format string of the time label, e.g. "t = {time_step:05d}"
+    time_label=None,
+    # View
+    camera_position=None,
+    window_size=(1024, 768),
+    image_scale=None,
+)
+
+FRAME_PATTERN = "frame_{:06d}.png"
+
+
+def make_scene(scene=None, required=("mesh", "data", "scalars", "levels"), **kwargs):
+    """Return a complete scene from a partial description.
+
+    Missing keys are filled from :data:`DEFAULT_SCENE`. Raises a
+    ``ValueError`` if any of the ``required`` keys is not set.
+    """
+    scene = dict(DEFAULT_SCENE, **(scene or {}), **kwargs)
+    unknown = set(scene) - set(DEFAULT_SCENE)
+    if unknown:
+        raise ValueError(f"Unknown scene keys: {sorted(unknown)}")
+    for key in required:
+        if scene[key] is None:
+            raise ValueError(f"Scene requires `{key}`.")
+    return scene
+
+
+def build_plotter(scene, engine=None):
+    """Build an off-screen plotter for a scene.
+
+    Parameters
+    ----------
+    scene : dict
+        Scene description (see :func:`make_scene`).
+
+    engine : kale.Engine, optional
+        Engine to use. Created from ``scene["mesh"]`` and
+        ``scene["data"]`` if not given.
+
+    Returns
+    -------
+    tuple
+        ``(engine, plotter)``
+
+    """
+    from kale.algorithms import (
+        cell_data_to_point_data_algorithm,
+        extract_feature_edges_algorithm,
+        warp_by_scalar_algorithm,
+        warp_by_scalar_static_algorithm,
+    )
+
+    scene = make_scene(scene)
+    if engine is None:
+        engine = Engine(
+            scene["mesh"],
+            scene["data"],
+            zscale=scene["zscale"],
+            lazy=True,
+            precision=scene["precision"],
+        )
+
+    if scene["smoothing_iterations"]:
+        engine.smoothing_iterations = scene["smoothing_iterations"]
+        source = engine.algorithm_smoothed
+        boundary = engine.boundary_smoothed
+    else:
+        source = engine.algorithm
+        boundary = engine.boundary
+
+    if scene["warp"]:
+        if not scene["smoothing_iterations"]:
+            source = cell_data_to_point_data_algorithm(source)
+        if scene["warp"].get("normals"):
+            source = warp_by_scalar_static_algorithm(
+                source,
+                scalars=scene["warp"]["scalars"],
+                factor=scene["warp"]["factor"],
+                compute_normals=True,
+            )
+        else:
+            source = warp_by_scalar_algorithm(
+                source,
+                scalars=scene["warp"]["scalars"],
+                factor=scene["warp"]["factor"],
+            )
+        boundary = extract_feature_edges_algorithm(
+            source,
+            boundary_edges=True,
+            non_manifold_edges=False,
+            feature_edges=False,
+            manifold_edges=False,
+        )
+
+    plotter = pv.Plotter(off_screen=True, window_size=list(scene["window_size"]))
+    if scene["image_scale"]:
+        plotter.image_scale = scene["image_scale"]
+    scalars = scene["scalars"]
+    helpers.add_contours(
+        plotter,
+        source,
+        scalars,
+        np.asarray(scene["levels"]),
+        cmap=scene["cmap"] or theme.COLOR_MAPS.get(scalars, pv.global_theme.cmap),
+        show_scalar_bar=scene["show_scalar_bar"],
+        scalar_bar_args=dict(**theme.SCALAR_BAR_OPTS),
+    )
+    if scene["boundary"]:
+        plotter.add_mesh(boundary)
+    if scene["floor"]:
+        plotter.add_floor("-z", show_edges=True, edge_color="white", color="lightgray")
+    if scene["bounds"]:
+        helpers.add_bounds(plotter)
+    if scene["coastlines"]:
+        helpers.add_coastlines(plotter, line_width=5)
+    if scene["camera_position"] is not None:
+        plotter.camera_position = [tuple(p) for p in scene["camera_position"]]
+    profiling.watch(plotter)
+    return engine, plotter
+
+
+def update_frame(engine, plotter, scene, time):
+    """Move the engine to ``time`` and update the time label."""
+    engine.time = time
+    if scene["time_label"]:
+        plotter.add_text(
+            scene["time_label"].format(time=engine.time, time_step=engine.time_step),
+            name="time-step-label",
+            font_size=theme.TIMESTEP_FONT_SIZE,
+        )
+
+
+def grab_frame(plotter):
+    """Render and return the current image, as ``Plotter.write_frame`` does."""
+    if plotter._first_time:
+        plotter._on_first_render_request()
+    plotter.render()
+    return plotter.image
+
+
+class StageTimer:
+    """Accumulate wall time spent in named stages of a frame loop."""
+
+    def __init__(self):
+        self.totals = collections.defaultdict(float)
+        self.frames = 0
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        tic = _time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] += _time.perf_counter() - tic
+
+    def report(self):
+        """Return a table of total and per-frame time of each stage."""
+        frames = max(self.frames, 1)
+        lines = [f"{'stage':<14}{'total (s)':>12}{'ms/frame':>12}"]
+        for stage, total in self.totals.items():
+            lines.append(f"{stage:<14}{total:>12.3f}{1e3 * total / frames:>12.2f}")
+        return "\n".join(lines)
+
+
+def write_movie_pipelined(
+    engine, plotter, times, writer, queue_size=4, update=None, progress=None
+):
+    """Render frames to a movie writer with overlapped I/O and encoding.
+
+    Three stages run concurrently, connected by bounded queues of
+    ``queue_size`` items: a loader thread reads the data of upcoming
+    times into the engine's cache (see :meth:`kale.Engine.preload`),
+    the calling thread sets the time and renders (VTK rendering must
+    stay on this thread), and an encoder thread appends the frame
+    buffers to ``writer``.
+
+    Parameters
+    ----------
+    engine : kale.Engine
+        Engine driving the plotter. Its cache must be able to hold
+        about ``queue_size`` time steps.
+
+    plotter : pyvista.Plotter
+        Plotter to render.
+
+    times : Sequence
+        (Fractional) time steps to render.
+
+    writer : object
+        Anything with an ``append_data(image)`` method, e.g. an imageio
+        writer or ``plotter.mwriter``.
+
+    queue_size : int, default: 4
+        Capacity of the queues between stages.
+
+    update : callable, optional
+        Called as ``update(time)`` instead of setting ``engine.time``,
+        e.g. to also update annotations.
+
+    progress : callable, optional
+        Called after each frame is rendered.
+
+    Returns
+    -------
+    StageTimer
+        Time spent in each stage. ``wait_*`` stages are the time the
+        render thread spent blocked on the loader or the encoder.
+
+    """
+    timer = StageTimer()
+    loaded = queue.Queue(maxsize=queue_size)
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item):
+        # Give up if the consumer stopped, rather than blocking forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def load():
+        try:
+            for time in times:
+                if stop.is_set():
+                    return
+                with timer.time("load"):
+                    engine.preload(time)
+                put(loaded, time)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+        finally:
+            put(loaded, None)
+
+    def encode():
+        try:
+            while True:
+                image = frames.get()
+                if image is None:
+                    return
+                with timer.time("encode"):
+                    writer.append_data(image)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+            stop.set()
+
+    loader = threading.Thread(target=load, name="kale-load", daemon=True)
+    encoder = threading.Thread(target=encode, name="kale-encode", daemon=True)
+    loader.start()
+    encoder.start()
+    try:
+        while not errors:
+            with timer.time("wait_load"):
+                time = loaded.get()
+            if time is None:
+                break
+            with timer.time("update"):
+                if update is None:
+                    engine.time = time
+                else:
+                    update(time)
+            with timer.time("render"):
+                image = grab_frame(plotter)
+            with timer.time("wait_encode"):
+                put(frames, image)
+            timer.frames += 1
+            if progress is not None:
+                progress()
+    finally:
+        # The encoder may have stopped on an error with the queue full
+        while encoder.is_alive():
+            try:
+                frames.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        encoder.join()
+        stop.set()
+        loader.join()
+    if errors:
+        raise errors[0]
+    return timer
+
+
+def render_frames(scene, times, directory, first_index=0, progress=None, indices=None):
+    """Render frames of a scene to numbered PNG files.
+
+    Frame ``i`` of ``times`` is written to ``directory`` as
+    ``FRAME_PATTERN.format(first_index + i)``, or
+    ``FRAME_PATTERN.format(indices[i])`` if ``indices`` are given.
+
+    Parameters
+    ----------
+    scene : dict
+        Scene description (see :func:`make_scene`).
+
+    times : Sequence
+        (Fractional) time steps to render.
+
+    directory : str or Path
+        Output directory.
+
+    first_index : int, default: 0
+        Index of the first frame.
+
+    progress : queue.Queue, optional
+        ``1`` is put on the queue after each frame.
+
+    indices : Sequence[int], optional
+        Frame indices used in the filenames, e.g. the time steps.
+
+    Returns
+    -------
+    list
+        Written filenames.
+
+    """
+    import imageio
+
+    scene = make_scene(scene)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    if indices is None:
+        indices = range(first_index, first_index + len(times))
+    engine, plotter = build_plotter(scene)
+    filenames = []
+    try:
+        for index, time in zip(indices, times):
+            update_frame(engine, plotter, scene, time)
+            filename = directory / FRAME_PATTERN.format(index)
+            imageio.imwrite(filename, grab_frame(plotter))
+            filenames.append(filename)
+            if progress is not None:
+                progress.put(1)
+    finally:
+        plotter.close()
+        engine.close()
+    return filenames
+
+
+def render_still(scene, filename, time=0):
+    """Render a single frame of a scene to an image file."""
+    import imageio
+
+    scene = make_scene(scene)
+    engine, plotter = build_plotter(scene)
+    try:
+        update_frame(engine, plotter, scene, time)
+        imageio.imwrite(filename, grab_frame(plotter))
+    finally:
+        plotter.close()
+        engine.close()
+    return filename
+
+
+def render_movie(
+    scene, filename, times, framerate=24, quality=5, queue_size=4, progress=None
+):
+    """Render a movie of a scene in this process.
+
+    Loading, rendering and encoding are pipelined with
+    :func:`write_movie_pipelined`.
+
+    Returns
+    -------
+    StageTimer
+        Time spent in each stage.
+
+    """
+    import imageio
+
+    scene = make_scene(scene)
+    engine, plotter = build_plotter(scene)
+    try:
+        with imageio.get_writer(filename, fps=framerate, quality=quality) as writer:
+            return write_movie_pipelined(
+                engine,
+                plotter,
+                times,
+                writer,
+                queue_size=queue_size,
+                update=lambda time: update_frame(engine, plotter, scene, time),
+                progress=progress,
+            )
+    finally:
+        plotter.close()
+        engine.close()
+
+
+def concat_movies(filenames, filename):
+    """Concatenate movies encoded with the same settings, without re-encoding.
+
+    Uses the ffmpeg concat demuxer (from ``imageio-ffmpeg``), e.g. to
+    join the segments of a movie rendered by several jobs.
+    """
+    import subprocess
+
+    import imageio_ffmpeg
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for name in filenames:
+            path = str(Path(name).resolve()).replace("'", r"'\''")
+            f.write(f"file '{path}'\n")
+    try:
+        subprocess.run(
+            [
+                imageio_ffmpeg.get_ffmpeg_exe(),
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                f.name,
+                "-c",
+                "copy",
+                str(filename),
+            ],
+            check=True,
+        )
+    finally:
+        os.unlink(f.name)
+    return filename
+
+
+def stitch_frames(filenames, filename, framerate=24, quality=5, **kwargs):
+    """Encode frames, in the given order, into one movie."""
+    import imageio
+
+    with imageio.get_writer(filename, fps=framerate, quality=quality, **kwargs) as w:
+        for frame in filenames:
+            w.append_data(imageio.imread(frame))
+    return filename
+
+
+def split_times(times, n):
+    """Split ``times`` into at most ``n`` contiguous blocks.
+
+    Returns a list of ``(first_index, block)`` tuples in frame order.
+    """
+    times = list(times)
+    bounds = np.linspace(0, len(times), min(n, len(times)) + 1).astype(int)
+    return [(a, times[a:b]) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def save_movie_parallel(
+    scene,
+    filename,
+    times=None,
+    processes=None,
+    frames_directory=None,
+    framerate=24,
+    quality=5,
+    **kwargs,
+):
+    """Render a movie of a scene on several processes.
+
+    The times are split into contiguous blocks, one per worker process.
+    Each worker builds its own Engine and off-screen plotter from the
+    scene and writes lossless PNG frames, which are then encoded in
+    frame order into one movie, matching the output of
+    :func:`kale.save_movie` for the same scene.
+
+    Parameters
+    ----------
+    scene : dict
+        Scene description (see :func:`make_scene`).
+
+    filename : str
+        Movie filename.
+
+    times : Sequence, optional
+        (Fractional) time steps to render. Defaults to all time steps.
+
+    processes : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    frames_directory : str, optional
+        Where to keep the frames. A temporary directory that is removed
+        afterwards is used by default.
+
+    framerate, quality, **kwargs
+        Passed to :func:`imageio.get_writer`.
+
+    Returns
+    -------
+    str
+        The movie filename.
+
+    """
+    from tqdm import tqdm
+
+    scene = make_scene(scene)
+    if times is None:
+        engine = Engine(scene["mesh"], scene["data"], zscale=scene["zscale"])
+        times = range(engine.max_time_step)
+        engine.close()
+    blocks = split_times(times, processes or os.cpu_count())
+    n_frames = sum(len(block) for _, block in blocks)
+
+    directory = frames_directory or tempfile.mkdtemp(prefix="kale-frames-")
+    # VTK is not fork-safe: always start fresh interpreters
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Manager() as manager, ProcessPoolExecutor(
+            max_workers=len(blocks), mp_context=context
+        ) as executor:
+            progress = manager.Queue()
+            futures = [
+                executor.submit(render_frames, scene, block, directory, first, progress)
+                for first, block in blocks
+            ]
+            with tqdm(total=n_frames) as bar:
+                while not all(f.done() for f in futures):
+                    try:
+                        bar.update(progress.get(timeout=0.5))
+                    except queue.Empty:
+                        pass
+                while not progress.empty():
+                    bar.update(progress.get())
+            filenames = [name for f in futures for name in f.result()]
+        stitch_frames(
+            filenames, filename, framerate=framerate, quality=quality, **kwargs
+        )
+    finally:
+        if frames_directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    return filename
+
+
+PANEL_KEYS = ("scalars", "time", "levels", "camera_position", "cmap", "title")
+
+
+def make_panel(scene, panel):
+    """Return a complete panel spec, with defaults taken from ``scene``."""
+    unknown = set(panel) - set(PANEL_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown panel keys: {sorted(unknown)}")
+    defaults = dict(
+        scalars=scene["scalars"],
+        time=0,
+        levels=scene["levels"],
+        camera_position=scene["camera_position"],
+        cmap=scene["cmap"],
+        title=None,
+    )
+    panel = dict(defaults, **panel)
+    for key in ("scalars", "levels"):
+        if panel[key] is None:
+            raise ValueError(f"Panel requires `{key}`.")
+    return panel
+
+
+def load_panel_data(engine, panels):
+    """Read the cell arrays of all panels, each time step only once.
+
+    The time and the requested variables of ``engine`` are restored
+    afterwards.
+
+    Returns
+    -------
+    tuple
+        ``(surface, values)`` where ``surface`` is the static surface
+        of the engine and ``values`` maps ``(time, scalars)`` to the
+        cell values on that surface.
+
+    """
+    wanted = collections.defaultdict(set)
+    for panel in panels:
+        wanted[panel["time"]].add(panel["scalars"])
+    requested = {name for names in wanted.values() for name in names}
+    added = [name for name in requested if name not in engine.active_keys]
+    previous = engine.time
+    values = {}
+    surface = None
+    try:
+        engine.request(*requested)
+        for time, names in sorted(wanted.items()):
+            engine.time = time
+            engine.algorithm.Update()
+            surface = pv.wrap(engine.algorithm.GetOutputDataObject(0))
+            for name in names:
+                values[time, name] = np.array(surface.cell_data[name])
+    finally:
+        if added:
+            engine.release(*added)
+        if engine.time != previous:
+            engine.time = previous
+    return surface, values
+
+
+def render_panels(
+    panels,
+    scene=None,
+    engine=None,
+    shape=None,
+    filename=None,
+    workers=None,
+    **kwargs,
+):
+    """Render a multi-panel figure from one Engine.
+
+    Every panel shows the banded contours of one variable at one time
+    with its own levels and camera. The static geometry is shared by
+    all panels: the surface, its smoothing operator (see
+    :class:`kale.subdivision.SmoothedSurface`), the contouring
+    connectivity (see :class:`kale.contour.TriangleBands`), the
+    boundary and the coastlines are built once, each time step is read
+    once, and the panels are contoured concurrently on threads. All
+    panels are then rendered off-screen into one image.
+
+    Parameters
+    ----------
+    panels : Sequence[dict]
+        Panel specs with keys ``scalars``, ``time``, ``levels``,
+        ``camera_position``, ``cmap`` and ``title``. Missing keys are
+        taken from ``scene``.
+
+    scene : dict, optional
+        Shared scene settings (see :data:`DEFAULT_SCENE`). ``warp`` is
+        not supported and ``window_size`` is the size of each panel.
+
+    engine : kale.Engine, optional
+        Engine to use. Created from ``scene["mesh"]`` and
+        ``scene["data"]`` if not given.
+
+    shape : tuple, optional
+        ``(rows, columns)`` of the panel grid. Defaults to one row.
+
+    filename : str, optional
+        Save the image to this file.
+
+    workers : int, optional
+        Number of contouring threads.
+
+    **kwargs
+        Scene settings overriding ``scene``.
+
+    Returns
+    -------
+    numpy.ndarray
+        The composed image.
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from kale.algorithms import bands_to_polydata
+    from kale.contour import TriangleBands
+    from kale.subdivision import SmoothedSurface
+
+    scene = make_scene(scene, required=() if engine else ("mesh", "data"), **kwargs)
+    if scene["warp"]:
+        raise ValueError("`warp` is not supported by render_panels.")
+    panels = [make_panel(scene, panel) for panel in panels]
+    shape = shape or (1, len(panels))
+    if shape[0] * shape[1] < len(panels):
+        raise ValueError(f"Shape {shape} cannot hold {len(panels)} panels.")
+
+    own_engine = engine is None
+    if own_engine:
+        engine = Engine(
+            scene["mesh"],
+            scene["data"],
+            zscale=scene["zscale"],
+            lazy=True,
+            precision=scene["precision"],
+        )
+    try:
+        surface, values = load_panel_data(engine, panels)
+    finally:
+        if own_engine:
+            engine.close()
+    if not surface.is_all_triangles:
+        raise ValueError("render_panels requires a triangle mesh.")
+
+    # Shared static geometry
+    smoothed = SmoothedSurface(
+        surface.points,
+        surface.faces.reshape(-1, 4)[:, 1:],
+        scene["smoothing_iterations"],
+    )
+    bands = TriangleBands(smoothed.triangles)
+    geometry = pv.PolyData(
+        smoothed.points,
+        faces=np.c_[np.full(len(smoothed.triangles), 3), smoothed.triangles],
+    )
+    boundary = geometry.extract_feature_edges(
+        boundary_edges=True,
+        non_manifold_edges=False,
+        feature_edges=False,
+        manifold_edges=False,
+    )
+
+    def contour(panel):
+        point_values = smoothed(values[panel["time"], panel["scalars"]])
+        result = bands(smoothed.points, point_values, np.asarray(panel["levels"]))
+        return bands_to_polydata(result, panel["scalars"])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        contours = list(executor.map(contour, panels))
+
+    width, height = scene["window_size"]
+    plotter = pv.Plotter(
+        off_screen=True,
+        shape=shape,
+        window_size=[width * shape[1], height * shape[0]],
+    )
+    if scene["image_scale"]:
+        plotter.image_scale = scene["image_scale"]
+    try:
+        for k, (panel, (contour_mesh, edges)) in enumerate(zip(panels, contours)):
+            plotter.subplot(*divmod(k, shape[1]))
+            scalars = panel["scalars"]
+            levels = np.asarray(panel["levels"])
+            clim = [np.min(levels), np.max(levels)]
+            plotter.add_mesh(
+                contour_mesh,
+                scalars=scalars,
+                clim=clim,
+                n_colors=len(levels) - 1,
+                cmap=panel["cmap"]
+                or theme.COLOR_MAPS.get(scalars, pv.global_theme.cmap),
+                show_scalar_bar=scene["show_scalar_bar"],
+                scalar_bar_args=dict(**theme.SCALAR_BAR_OPTS),
+            )
+            plotter.add_mesh(
+                edges,
+                color=theme.CONTOUR_LINE_COLOR,
+                line_width=theme.CONTOUR_LINE_WIDTH,
+            )
+            if scene["boundary"]:
+                plotter.add_mesh(boundary)
+            if scene["floor"]:
+                plotter.add_floor(
+                    "-z", show_edges=True, edge_color="white", color="lightgray"
+                )
+            if scene["bounds"]:
+                helpers.add_bounds(plotter)
+            if scene["coastlines"]:
+                helpers.add_coastlines(plotter, line_width=5)
+            title = panel["title"]
+            if title is None and scene["time_label"]:
+                title = scene["time_label"].format(
+                    time=panel["time"], time_step=int(panel["time"])
+                )
+            if title:
+                plotter.add_text(title, font_size=theme.TIMESTEP_FONT_SIZE)
+            if panel["camera_position"] is not None:
+                plotter.camera_position = [tuple(p) for p in panel["camera_position"]]
+        return plotter.screenshot(filename, return_img=True)
+    finally:
+        plotter.close()
@@ -0,0 +1,204 @@
+"""Streaming statistics over the full time history of a variable."""
+import contextlib
+import json
+import os
+from pathlib import Path
+import warnings
+
+import numpy as np
+
+STATS_SUFFIX = ".kale-stats.json"
+
+
+def data_signature(data_filename):
+    """Resolved path, size and modification time of a data file.
+
+    Directory stores (see :mod:`kale.storage`) are rewritten file by
+    file, so their size is the total size of their files and their
+    modification time the newest one.
+    """
+    path = Path(data_filename).resolve()
+    if path.is_dir():
+        stats = [f.stat() for f in path.rglob("*") if f.is_file()]
+        mtime = max((stat.st_mtime for stat in stats), default=path.stat().st_mtime)
+        size = sum(stat.st_size for stat in stats)
+    else:
+        stat = path.stat()
+        mtime, size = stat.st_mtime, stat.st_size
+    return dict(path=str(path), mtime=mtime, size=size)
+
+
+def chunk_steps_for(variable, chunk_bytes=64 * 2**20):
+    """Number of time steps per chunk that fit in ``chunk_bytes``."""
+    n_cells = int(np.prod(variable.shape[1:]))
+    itemsize = np.dtype(variable.dtype).itemsize
+    return max(1, int(chunk_bytes // max(1, n_cells * itemsize)))
+
+
+def iter_chunks(variable, chunk_steps=None, lock=None, start=0, stop=None):
+    """Iterate over a ``(n_steps, n_cells)`` variable in blocks of time steps.
+
+    Parameters
+    ----------
+    variable : array-like
+        Anything sliceable as ``variable[a:b, :]`` with a ``shape``,
+        e.g. an ``xarray.DataArray``.
+
+    chunk_steps : int, optional
+        Number of time steps per chunk. Defaults to a ~64 MiB chunk.
+
+    lock : threading.Lock, optional
+        Lock held while reading each chunk.
+
+    start, stop : int, optional
+        Range of time steps to iterate over.
+
+    Yields
+    ------
+    tuple
+        ``(first_step, block)`` where ``block`` is a 2D ``numpy.ndarray``.
+
+    """
+    chunk_steps = chunk_steps or chunk_steps_for(variable)
+    stop = variable.shape[0] if stop is None else stop
+    lock = lock or contextlib.nullcontext()
+    for a in range(start, stop, chunk_steps):
+        b = min(a + chunk_steps, stop)
+        with lock:
+            block = np.asarray(variable[a:b, :])
+        yield a, block
+
+
+def streaming_statistics(variable, bins=1024, chunk_steps=None, lock=None):
+    """Compute summary statistics of a variable over all time steps.
+
+    Two streaming passes are made over the time axis so that only one
+    chunk is held in memory at a time: the first computes the range,
+    count, mean and standard deviation, the second a fixed-bin
+    histogram over that range. The histogram doubles as a sketch from
+    which any NaN-ignoring percentile can be estimated with
+    :func:`histogram_percentile` (accurate to one bin width).
+
+    Parameters
+    ----------
+    variable : array-like
+        A ``(n_steps, n_cells)`` variable, e.g. ``engine.ds[name]``.
+
+    bins : int, default: 1024
+        Number of histogram bins.
+
+    chunk_steps : int, optional
+        Number of time steps per chunk. Defaults to a ~64 MiB chunk.
+
+    lock : threading.Lock, optional
+        Lock held while reading each chunk.
+
+    Returns
+    -------
+    dict
+        With keys ``min``, ``max``, ``mean``, ``std``, ``count``,
+        ``histogram`` and ``bin_edges``.
+
+    """
+    vmin, vmax = np.inf, -np.inf
+    count, mean, m2 = 0, 0.0, 0.0
+    for _, block in iter_chunks(variable, chunk_steps, lock):
+        finite = block[np.isfinite(block)].astype(np.float64, copy=False)
+        if finite.size == 0:
+            continue
+        vmin = min(vmin, finite.min())
+        vmax = max(vmax, finite.max())
+        # Chunks are merged with the pairwise update of Chan et al., which
+        # stays accurate for a large mean and a small spread
+        n = finite.size
+        chunk_mean = finite.mean()
+        chunk_m2 = np.square(finite - chunk_mean).sum()
+        delta = chunk_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += chunk_m2 + delta**2 * count * n / total
+        count = total
+
+    if count == 0:
+        nan = float("nan")
+        return dict(
+            min=nan, max=nan, mean=nan, std=nan, count=0, histogram=[], bin_edges=[]
+        )
+
+    std = np.sqrt(m2 / count)
+    edges = np.linspace(vmin, vmax if vmax > vmin else vmin + 1, bins + 1)
+    hist = np.zeros(bins, dtype=np.int64)
+    for _, block in iter_chunks(variable, chunk_steps, lock):
+        finite = block[np.isfinite(block)]
+        hist += np.histogram(finite, bins=edges)[0]
+
+    return dict(
+        min=float(vmin),
+        max=float(vmax),
+        mean=float(mean),
+        std=float(std),
+        count=int(count),
+        histogram=hist.tolist(),
+        bin_edges=edges.tolist(),
+    )
+
+
+def histogram_percentile(stats, q):
+    """Estimate percentile(s) ``q`` (0-100) from :func:`streaming_statistics`."""
+    counts = np.asarray(stats["histogram"], dtype=np.float64)
+    edges = np.asarray(stats["bin_edges"], dtype=np.float64)
+    if counts.sum() == 0:
+        return np.full(np.shape(q), np.nan)[()]
+    cdf = np.concatenate([[0.0], np.cumsum(counts)]) / counts.sum()
+    # Interpolate linearly within bins; np.interp needs increasing xp
+    cdf, idx = np.unique(cdf, return_index=True)
+    return np.interp(np.asarray(q) / 100.0, cdf, edges[idx])[()]
+
+
+class StatisticsCache:
+    """Sidecar file caching statistics of a data file.
+
+    Statistics are stored next to the data file in
+    ``<data_filename>.kale-stats.json``. The file records the data
+    file's resolved path, size and modification time (see
+    :func:`data_signature`) and is ignored once the data file changes.
+    """
+
+    def __init__(self, data_filename):
+        self.data_filename = Path(data_filename).resolve()
+        self.filename = self.data_filename.with_name(
+            self.data_filename.name + STATS_SUFFIX
+        )
+        self._entries = None
+
+    def _signature(self):
+        return data_signature(self.data_filename)
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            with open(self.filename) as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return self._entries
+        if content.get("signature") == self._signature():
+            self._entries = content.get("variables", {})
+        return self._entries
+
+    def get(self, name, key):
+        """Return cached statistics of ``name`` computed with ``key`` or ``None``."""
+        return self._load().get(name, {}).get(key)
+
+    def put(self, name, key, stats):
+        """Store statistics and write the sidecar file."""
+        self._load().setdefault(name, {})[key] = stats
+        content = dict(signature=self._signature(), variables=self._entries)
+        tmp = self.filename.with_name(self.filename.name + ".tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump(content, f)
+            os.replace(tmp, self.filename)
+        except OSError as e:
+            warnings.warn(f"Unable to write statistics cache `{self.filename}`: {e}")
@@ -0,0 +1,522 @@
+"""Storage layouts for Engine data files."""
+import json
+import mmap
+from pathlib import Path
+import threading
+import time
+
+import numpy as np
+import xarray as xr
+
+from kale.stats import iter_chunks
+
+MEMMAP_HEADER = "kale.json"
+
+
+class MemmapStore:
+    """Read-only store of raw, memory-mapped ``(n_steps, n_cells)`` arrays.
+
+    A store is a directory holding one uncompressed C-ordered binary
+    file per variable and a ``kale.json`` header describing them (see
+    :func:`convert_memmap`). Indexing a time step returns a zero-copy
+    view into the mapped file, so reads are bound by page-cache
+    bandwidth. The interface mirrors the parts of
+    :class:`xarray.Dataset` used by :class:`kale.Engine`.
+    """
+
+    format = "memmap"
+    zero_copy = True
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / MEMMAP_HEADER) as f:
+            header = json.load(f)
+        if header.get("format") != self.format:
+            raise ValueError(f"`{path}` is not a kale {self.format} store.")
+        self.attrs = header.get("attrs", {})
+        self.dims = tuple(header["dims"])
+        self._variables = {
+            name: self._open_variable(info)
+            for name, info in header["variables"].items()
+        }
+
+    def _open_variable(self, info):
+        return np.memmap(
+            self.path / info["file"],
+            dtype=info["dtype"],
+            mode="r",
+            shape=tuple(info["shape"]),
+        )
+
+    def __getitem__(self, name):
+        return self._variables[name]
+
+    def __contains__(self, name):
+        return name in self._variables
+
+    def __iter__(self):
+        return iter(self._variables)
+
+    def keys(self):
+        return self._variables.keys()
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def sizes(self):
+        return dict(zip(self.dims, next(iter(self._variables.values())).shape))
+
+    def advise(self, name, time_step):
+        """Ask the OS to read a time step into the page cache ahead of use."""
+        if not hasattr(mmap, "MADV_WILLNEED"):  # pragma: no cover
+            return
+        var = self._variables[name]
+        row = var.strides[0]
+        start = var.offset + time_step * row
+        aligned = start - start % mmap.PAGESIZE
+        var._mmap.madvise(mmap.MADV_WILLNEED, aligned, row + start - aligned)
+
+    def close(self):
+        self._variables = {}
+
+
+def _map(filename, dtype, shape):
+    # Empty files cannot be memory-mapped
+    if not np.prod(shape):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", shape=shape)
+
+
+class DeltaVariable:
+    """A ``(n_steps, n_cells)`` variable stored as keyframes and sparse deltas.
+
+    Every ``keyframe_interval``-th step is stored densely. The other
+    steps store only the cells that changed since the previous step and
+    their new values. A step is rebuilt from the keyframe at or before
+    it, and the last rebuilt step is kept so that reading forward, as
+    movies do, only applies the deltas in between.
+    """
+
+    ndim = 2
+
+    def __init__(self, path, info, dims):
+        self.dims = dims
+        self.shape = tuple(info["shape"])
+        self.dtype = np.dtype(info["dtype"])
+        self.keyframe_interval = info["keyframe_interval"]
+        self.tolerance = info["tolerance"]
+        n_steps, n_cells = self.shape
+        n_keys = -(-n_steps // self.keyframe_interval)
+        self._keyframes = _map(path / info["keyframes"], self.dtype, (n_keys, n_cells))
+        self._offsets = _map(path / info["offsets"], np.int64, (n_steps + 1,))
+        n_deltas = int(self._offsets[-1])
+        self._cells = _map(path / info["cells"], np.int32, (n_deltas,))
+        self._values = _map(path / info["values"], self.dtype, (n_deltas,))
+        self._lock = threading.Lock()
+        self._step = None
+        self._row = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def nbytes(self):
+        """Size of the stored keyframes and deltas."""
+        return sum(
+            a.nbytes
+            for a in (self._keyframes, self._offsets, self._cells, self._values)
+        )
+
+    def _read_step(self, step):
+        interval = self.keyframe_interval
+        with self._lock:
+            if (
+                self._step is not None
+                and self._step <= step
+                and self._step // interval == step // interval
+            ):
+                row, first = self._row, self._step + 1
+            else:
+                row = np.array(self._keyframes[step // interval])
+                first = step - step % interval + 1
+            offsets = self._offsets[first : step + 2]
+            for a, b in zip(offsets[:-1], offsets[1:]):
+                row[self._cells[a:b]] = self._values[a:b]
+            self._step, self._row = step, row
+            return row.copy()
+
+    def __getitem__(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        steps, rest = index[0], index[1:]
+        n_steps, n_cells = self.shape
+        if isinstance(steps, (int, np.integer)):
+            if not -n_steps <= steps < n_steps:
+                raise IndexError(f"Time step {steps} out of range.")
+            return self._read_step(int(steps) % n_steps)[rest]
+        if isinstance(steps, slice):
+            rows = [self._read_step(step) for step in range(*steps.indices(n_steps))]
+            block = np.stack(rows) if rows else np.empty((0, n_cells), self.dtype)
+            return block[(slice(None), *rest)]
+        raise TypeError("Delta variables are indexed by a time step or a slice.")
+
+    def __array__(self, dtype=None):
+        return np.asarray(self[:], dtype=dtype)
+
+    @property
+    def values(self):
+        return self[:]
+
+
+class DeltaStore(MemmapStore):
+    """Read-only store of keyframes and sparse per-step deltas.
+
+    Written by :func:`convert_delta` for variables that change in few
+    cells per step, such as the cumulative slip of earthquake cycle
+    models. Same interface as :class:`MemmapStore`, but steps are
+    rebuilt into new arrays (see :class:`DeltaVariable`) and cached by
+    the Engine as usual.
+    """
+
+    format = "delta"
+    zero_copy = False
+
+    def _open_variable(self, info):
+        return DeltaVariable(self.path, info, self.dims)
+
+    def advise(self, name, time_step):
+        pass
+
+
+STORES = {store.format: store for store in (MemmapStore, DeltaStore)}
+
+
+def open_dataset(filename):
+    """Open an Engine data file.
+
+    The backend is picked from the layout on disk: kale stores
+    (directories with a ``kale.json`` header) are opened as a
+    :class:`MemmapStore` or :class:`DeltaStore` according to their
+    format, Zarr stores (``*.zarr`` or directories with a ``.zgroup``)
+    with :func:`xarray.open_zarr`, anything else as netCDF4/HDF5.
+    """
+    path = Path(filename)
+    if (path / MEMMAP_HEADER).exists():
+        with open(path / MEMMAP_HEADER) as f:
+            store = json.load(f).get("format")
+        if store not in STORES:
+            raise ValueError(f"`{path}` has an unknown kale store format `{store}`.")
+        return STORES[store](path)
+    if path.suffix == ".zarr" or (path / ".zgroup").exists():
+        return xr.open_zarr(path)
+    return xr.open_dataset(path, engine="netcdf4")
+
+
+def convert(
+    data_filename,
+    output_filename,
+    chunk_steps=1,
+    compression="zlib",
+    complevel=1,
+    shuffle=True,
+    chunk_bytes=64 * 2**20,
+):
+    """Rewrite a data file in a layout chunked for per-step reads.
+
+    Every ``(n_steps, n_cells)`` variable is written to a netCDF4 file
+    chunked as ``(chunk_steps, n_cells)`` so that reading one time step
+    decompresses only ``chunk_steps`` rows. The data is streamed in
+    blocks of at most ``chunk_bytes`` and never fully loaded.
+
+    Parameters
+    ----------
+    data_filename : str or Path
+        Source data file (anything :func:`open_dataset` can read).
+
+    output_filename : str or Path
+        Destination netCDF4 file.
+
+    chunk_steps : int, default: 1
+        Number of time steps per chunk.
+
+    compression : str, default: "zlib"
+        netCDF4 compression filter. ``None`` to disable compression.
+        Other filters (e.g. ``"zstd"``) depend on the netCDF4 build.
+
+    complevel : int, default: 1
+        Compression level. Low levels favour read speed.
+
+    shuffle : bool, default: True
+        Enable the HDF5 byte-shuffle filter.
+
+    chunk_bytes : int, default: 64 MiB
+        Size of the blocks copied at a time.
+
+    Returns
+    -------
+    Path
+        The output filename.
+
+    """
+    import netCDF4
+
+    output_filename = Path(output_filename)
+    if Path(data_filename).resolve() == output_filename.resolve():
+        raise ValueError("Output must be different from the data file.")
+    src = open_dataset(data_filename)
+    try:
+        with netCDF4.Dataset(output_filename, "w", format="NETCDF4") as dst:
+            dst.setncatts(src.attrs)
+            for dim, size in src.sizes.items():
+                dst.createDimension(dim, size)
+            for name, var in src.variables.items():
+                chunks = None
+                if var.ndim == 2:
+                    chunks = (min(chunk_steps, var.shape[0]), var.shape[1])
+                # Variables may be plain arrays sharing the dataset's
+                # dimensions, without attributes
+                out = dst.createVariable(
+                    name,
+                    var.dtype,
+                    getattr(var, "dims", src.dims),
+                    compression=compression if complevel else None,
+                    complevel=complevel,
+                    shuffle=shuffle,
+                    chunksizes=chunks,
+                )
+                attrs = getattr(var, "attrs", {})
+                out.setncatts({k: v for k, v in attrs.items() if not k.startswith("_")})
+                if var.ndim == 2:
+                    steps = max(chunk_steps, chunk_bytes // var[0].nbytes)
+                    steps -= steps % chunk_steps
+                    for a, block in iter_chunks(var, chunk_steps=steps):
+                        out[a : a + len(block), :] = block
+                else:
+                    out[...] = var.values
+    finally:
+        src.close()
+    return output_filename
+
+
+def convert_memmap(
+    data_filename, output_dirname, dtype="float32", chunk_bytes=64 * 2**20
+):
+    """Rewrite a data file as a :class:`MemmapStore` directory.
+
+    Each ``(n_steps, n_cells)`` variable is stored uncompressed as
+    ``dtype`` in its own file so that every time step can be mapped
+    straight into the mesh without copies. The data is streamed in
+    blocks of at most ``chunk_bytes``.
+
+    Parameters
+    ----------
+    data_filename : str or Path
+        Source data file (anything :func:`open_dataset` can read).
+
+    output_dirname : str or Path
+        Destination directory. Created if needed.
+
+    dtype : str, default: "float32"
+        Storage type of the variables. Use ``None`` to keep the source
+        type.
+
+    chunk_bytes : int, default: 64 MiB
+        Size of the blocks copied at a time.
+
+    Returns
+    -------
+    Path
+        The output directory.
+
+    """
+    output_dirname = Path(output_dirname)
+    output_dirname.mkdir(parents=True, exist_ok=True)
+    src = open_dataset(data_filename)
+    try:
+        header = dict(format="memmap", version=1, attrs=dict(src.attrs), variables={})
+        for name in src.keys():
+            var = src[name]
+            if var.ndim != 2:
+                continue
+            header.setdefault("dims", list(getattr(var, "dims", ("time", "cell"))))
+            out_dtype = np.dtype(dtype or var.dtype)
+            filename = f"{name}.bin"
+            out = np.memmap(
+                output_dirname / filename, dtype=out_dtype, mode="w+", shape=var.shape
+            )
+            steps = max(1, chunk_bytes // (var.shape[1] * out_dtype.itemsize))
+            for a, block in iter_chunks(var, chunk_steps=steps):
+                out[a : a + len(block)] = block
+            out.flush()
+            del out
+            header["variables"][name] = dict(
+                file=filename, dtype=out_dtype.str, shape=list(var.shape)
+            )
+    finally:
+        src.close()
+    with open(output_dirname / MEMMAP_HEADER, "w") as f:
+        json.dump(header, f, indent=2)
+    return output_dirname
+
+
+def convert_delta(
+    data_filename,
+    output_dirname,
+    keyframe_interval=64,
+    tolerance=0.0,
+    dtype=None,
+    chunk_bytes=64 * 2**20,
+):
+    """Rewrite a data file as a :class:`DeltaStore` directory.
+
+    Each ``(n_steps, n_cells)`` variable is stored as a dense keyframe
+    every ``keyframe_interval`` steps plus, for the other steps, the
+    cells whose value changed since the previous step. Variables that
+    change in few cells per step (e.g. slip between events) shrink by
+    about ``n_cells / changed_cells``. The data is streamed in blocks of
+    at most ``chunk_bytes``.
+
+    Parameters
+    ----------
+    data_filename : str or Path
+        Source data file (anything :func:`open_dataset` can read).
+
+    output_dirname : str or Path
+        Destination directory. Created if needed.
+
+    keyframe_interval : int, default: 64
+        Number of steps between keyframes. Reading a step applies at
+        most ``keyframe_interval - 1`` steps of deltas.
+
+    tolerance : float, default: 0.0
+        Changes of at most ``tolerance`` are not stored, so every value
+        read back is within ``tolerance`` of the source. The default
+        stores the data exactly.
+
+    dtype : str, optional
+        Storage type of the variables. Defaults to the source type.
+
+    chunk_bytes : int, default: 64 MiB
+        Size of the blocks copied at a time.
+
+    Returns
+    -------
+    Path
+        The output directory.
+
+    """
+    if keyframe_interval < 1:
+        raise ValueError("`keyframe_interval` must be at least 1.")
+    if tolerance < 0:
+        raise ValueError("`tolerance` must not be negative.")
+    output_dirname = Path(output_dirname)
+    output_dirname.mkdir(parents=True, exist_ok=True)
+    src = open_dataset(data_filename)
+    try:
+        header = dict(format="delta", version=1, attrs=dict(src.attrs), variables={})
+        for name in src.keys():
+            var = src[name]
+            if var.ndim != 2:
+                continue
+            header.setdefault("dims", list(getattr(var, "dims", ("time", "cell"))))
+            out_dtype = np.dtype(dtype or var.dtype)
+            files = {
+                key: f"{name}.{key}.bin"
+                for key in ("keyframes", "offsets", "cells", "values")
+            }
+            interval = keyframe_interval
+            n_deltas = _write_deltas(
+                var, output_dirname, files, interval, tolerance, out_dtype, chunk_bytes
+            )
+            dense_bytes = var.shape[0] * var.shape[1] * out_dtype.itemsize
+            if n_deltas * (4 + out_dtype.itemsize) > dense_bytes:
+                # Variables changing in most cells every step are smaller as
+                # keyframes only
+                interval = 1
+                _write_deltas(
+                    var, output_dirname, files, 1, tolerance, out_dtype, chunk_bytes
+                )
+            header["variables"][name] = dict(
+                files,
+                dtype=out_dtype.str,
+                shape=list(var.shape),
+                keyframe_interval=interval,
+                tolerance=tolerance,
+            )
+    finally:
+        src.close()
+    with open(output_dirname / MEMMAP_HEADER, "w") as f:
+        json.dump(header, f, indent=2)
+    return output_dirname
+
+
+def _write_deltas(
+    var, dirname, files, keyframe_interval, tolerance, dtype, chunk_bytes
+):
+    """Write the keyframe and delta files of a variable, return the delta count."""
+    steps = max(1, chunk_bytes // (var.shape[1] * dtype.itemsize))
+    outputs = {key: open(dirname / filename, "wb") for key, filename in files.items()}
+    # Deltas are taken against the values the reader rebuilds, so that
+    # errors below the tolerance never accumulate
+    row = None
+    offset = 0
+    try:
+        outputs["offsets"].write(np.int64(0).tobytes())
+        for a, block in iter_chunks(var, chunk_steps=steps):
+            block = block.astype(dtype, copy=False)
+            for step, values in enumerate(block, a):
+                if step % keyframe_interval == 0:
+                    row = values.copy()
+                    outputs["keyframes"].write(row.tobytes())
+                else:
+                    with np.errstate(invalid="ignore"):
+                        changed = ~(np.abs(values - row) <= tolerance)
+                    changed &= ~(np.isnan(values) & np.isnan(row))
+                    cells = np.flatnonzero(changed)
+                    row[cells] = values[cells]
+                    outputs["cells"].write(cells.astype(np.int32).tobytes())
+                    outputs["values"].write(row[cells].tobytes())
+                    offset += len(cells)
+                outputs["offsets"].write(np.int64(offset).tobytes())
+    finally:
+        for f in outputs.values():
+            f.close()
+    return offset
+
+
+def read_throughput(data_filename, name=None, n_steps=50, stride=None):
+    """Measure per-step read throughput of a data file.
+
+    Reads ``n_steps`` time steps of a variable one at a time, the way
+    :class:`kale.Engine` does, spread evenly over the time axis (or
+    ``stride`` apart).
+
+    Returns
+    -------
+    dict
+        ``steps_per_second`` and ``megabytes_per_second``.
+
+    """
+    ds = open_dataset(data_filename)
+    try:
+        name = name or list(ds.keys())[0]
+        var = ds[name]
+        n_total = var.shape[0]
+        stride = stride or max(1, n_total // n_steps)
+        steps = range(0, n_total, stride)[:n_steps]
+        nbytes = 0
+        tic = time.perf_counter()
+        for step in steps:
+            # Sum forces the memmap pages to be read in
+            row = np.asarray(var[step, :])
+            row.sum()
+            nbytes += row.nbytes
+        elapsed = time.perf_counter() - tic
+    finally:
+        ds.close()
+    return dict(
+        steps_per_second=len(steps) / elapsed,
+        megabytes_per_second=nbytes / elapsed / 2**20,
+    )
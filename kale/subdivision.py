@@ -0,0 +1,218 @@
+"""Sparse operators for smoothing cell data on static triangle surfaces.
+
+Both the conversion of cell data to point data and Loop subdivision are
+linear in the data, so for a static surface they can be assembled once
+as sparse matrices. Smoothing a new time step is then a single sparse
+matrix-vector product per array.
+"""
+import numpy as np
+from scipy import sparse
+
+# Sides of a triangle and the vertex opposite each side
+_SIDES = np.array([[0, 1], [1, 2], [2, 0]])
+_OPPOSITE = np.array([2, 0, 1])
+
+
+def cell_to_point_operator(n_points, triangles):
+    """Sparse ``(n_points, n_cells)`` average of cell values at each point.
+
+    Matches ``vtkCellDataToPointData``: each point takes the unweighted
+    mean of the cells using it.
+    """
+    triangles = np.asarray(triangles)
+    n_cells = len(triangles)
+    rows = triangles.ravel()
+    cols = np.repeat(np.arange(n_cells), triangles.shape[1])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(n_points, n_cells)
+    )
+    counts = np.asarray(matrix.sum(axis=1)).ravel()
+    counts[counts == 0] = 1
+    return (sparse.diags(1.0 / counts) @ matrix).tocsr()
+
+
+def loop_subdivision_step(n_points, triangles):
+    """One level of Loop subdivision as a sparse operator.
+
+    Uses the stencils of ``vtkLoopSubdivisionFilter``: new edge points
+    are ``3/8`` of the edge end points plus ``1/8`` of the opposite
+    vertices (``1/2`` of the end points on boundaries), and existing
+    points are smoothed with Loop's ``beta`` weights (``3/4``, ``1/8``,
+    ``1/8`` along boundaries).
+
+    Returns
+    -------
+    tuple
+        ``(operator, triangles)`` where ``operator`` is a sparse
+        ``(n_points + n_edges, n_points)`` matrix and ``triangles`` the
+        subdivided connectivity. New edge points are numbered after the
+        existing points.
+
+    """
+    triangles = np.asarray(triangles, dtype=np.int64)
+    n_tri = len(triangles)
+    sides = triangles[:, _SIDES]
+    edges, inverse, counts = np.unique(
+        np.sort(sides, axis=-1).reshape(-1, 2),
+        axis=0,
+        return_inverse=True,
+        return_counts=True,
+    )
+    inverse = inverse.ravel()
+    n_edges = len(edges)
+    interior = counts == 2
+
+    rows, cols, vals = [], [], []
+
+    # Odd (edge) points
+    edge_rows = n_points + np.arange(n_edges)
+    end_weight = np.where(interior, 3 / 8, 1 / 2)
+    for k in range(2):
+        rows.append(edge_rows)
+        cols.append(edges[:, k])
+        vals.append(end_weight)
+    side_interior = interior[inverse]
+    rows.append(n_points + inverse[side_interior])
+    cols.append(triangles[:, _OPPOSITE].ravel()[side_interior])
+    vals.append(np.full(np.count_nonzero(side_interior), 1 / 8))
+
+    # Even (existing) points
+    valence = np.bincount(edges.ravel(), minlength=n_points)
+    boundary_edges = edges[counts == 1]
+    boundary_valence = np.bincount(boundary_edges.ravel(), minlength=n_points)
+    on_boundary = boundary_valence > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_sq = (3 / 8 + np.cos(2 * np.pi / valence) / 4) ** 2
+        beta = np.where(valence > 3, (5 / 8 - cos_sq) / valence, 3 / 16)
+    beta[on_boundary] = 0
+    center = np.where(on_boundary, 1.0, 1 - valence * beta)
+    smooth_boundary = boundary_valence == 2
+    center[smooth_boundary] = 3 / 4
+    points = np.arange(n_points)
+    rows.append(points)
+    cols.append(points)
+    vals.append(center)
+    # Interior points: beta for every neighbour
+    for a, b in ((0, 1), (1, 0)):
+        rows.append(edges[:, a])
+        cols.append(edges[:, b])
+        vals.append(beta[edges[:, a]])
+    # Regular boundary points: 1/8 for both boundary neighbours
+    for a, b in ((0, 1), (1, 0)):
+        keep = smooth_boundary[boundary_edges[:, a]]
+        rows.append(boundary_edges[keep, a])
+        cols.append(boundary_edges[keep, b])
+        vals.append(np.full(np.count_nonzero(keep), 1 / 8))
+
+    operator = sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_points + n_edges, n_points),
+    )
+    operator.eliminate_zeros()
+
+    e = n_points + inverse.reshape(n_tri, 3)
+    e01, e12, e20 = e[:, 0], e[:, 1], e[:, 2]
+    v0, v1, v2 = triangles.T
+    new_triangles = np.concatenate(
+        [
+            np.c_[v0, e01, e20],
+            np.c_[v1, e12, e01],
+            np.c_[v2, e20, e12],
+            np.c_[e01, e12, e20],
+        ]
+    )
+    return operator, new_triangles
+
+
+def loop_subdivision_operator(n_points, triangles, levels):
+    """Compose ``levels`` Loop subdivision steps into one sparse operator.
+
+    Returns
+    -------
+    tuple
+        ``(operator, triangles)`` with ``operator`` of shape
+        ``(n_subdivided_points, n_points)``.
+
+    """
+    operator = sparse.identity(n_points, format="csr")
+    for _ in range(levels):
+        step, triangles = loop_subdivision_step(operator.shape[0], triangles)
+        operator = (step @ operator).tocsr()
+    return operator, np.asarray(triangles)
+
+
+class SmoothedSurface:
+    """Cached Loop-subdivided geometry and smoothing operator of a surface.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        ``(n_points, 3)`` point coordinates.
+
+    triangles : numpy.ndarray
+        ``(n_cells, 3)`` point indices of the triangles.
+
+    levels : int
+        Number of subdivision levels.
+
+    Attributes
+    ----------
+    points, triangles : numpy.ndarray
+        The subdivided geometry.
+
+    operator : scipy.sparse.csr_matrix
+        Maps cell values of the input to point values of the subdivided
+        surface (cell-to-point averaging followed by subdivision).
+
+    """
+
+    def __init__(self, points, triangles, levels):
+        triangles = np.asarray(triangles)
+        self.levels = levels
+        subdivision, self.triangles = loop_subdivision_operator(
+            len(points), triangles, levels
+        )
+        self.points = subdivision @ np.asarray(points, dtype=np.float64)
+        self.operator = (
+            subdivision @ cell_to_point_operator(len(points), triangles)
+        ).tocsr()
+        self._operators = {}
+
+    def to_arrays(self):
+        """The surface as a dict of arrays, e.g. for a geometry cache."""
+        return dict(
+            levels=np.asarray(self.levels),
+            points=self.points,
+            triangles=self.triangles,
+            data=self.operator.data,
+            indices=self.operator.indices,
+            indptr=self.operator.indptr,
+            shape=np.asarray(self.operator.shape),
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a surface from :meth:`to_arrays`."""
+        surface = cls.__new__(cls)
+        surface.levels = int(arrays["levels"])
+        surface.points = arrays["points"]
+        surface.triangles = arrays["triangles"]
+        surface.operator = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(arrays["shape"]),
+        )
+        surface._operators = {}
+        return surface
+
+    def __call__(self, cell_values):
+        """Smoothed point values of the subdivided surface.
+
+        ``float32`` values are smoothed with a ``float32`` copy of the
+        operator and stay ``float32``.
+        """
+        cell_values = np.asarray(cell_values)
+        if cell_values.dtype != np.float32:
+            return self.operator @ cell_values
+        if np.float32 not in self._operators:
+            self._operators[np.float32] = self.operator.astype(np.float32)
+        return self._operators[np.float32] @ cell_values
@@ -40,7 +40,11 @@ class KaleTheme(DocumentTheme):
         """Initialize the theme."""
         super().__init__()
         self.background = "white"
-        self.jupyter_backend = "server"
+        try:
+            self.jupyter_backend = "server"
+        except ImportError:
+            # Headless use, e.g. the command line, without Jupyter/trame
+            pass
 
         # Use different colors as you add data to the scene
         # self.color_cycler = "default"  # Uses Matplotlibs default color cycler
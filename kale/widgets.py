@@ -1,11 +1,18 @@
-import ipywidgets as widgets
 import pyvista as pv
-from tqdm import tqdm
 
 from kale.engine import Engine
 
 
-def time_controls(engine: Engine, plotter: pv.BasePlotter, continuous_update=True):
+def time_controls(
+    engine: Engine, plotter: pv.BasePlotter, continuous_update=True, events=None
+):
+    """Play button and time step slider.
+
+    With ``events`` set to a variable name, buttons jump to the previous
+    and next event of that variable (see :meth:`kale.Engine.events`).
+    """
+    import ipywidgets as widgets
+
     def update_time_step(time_step):
         engine.time_step = time_step
         plotter.render()
@@ -31,21 +38,77 @@ def time_controls(engine: Engine, plotter: pv.BasePlotter, continuous_update=Tru
 
     slider = widgets.IntSlider(min=0, max=tmax, continuous_update=continuous_update)
     widgets.jslink((play, "value"), (slider, "value"))
-    return widgets.HBox([play, slider])
+    if events is None:
+        return widgets.HBox([play, slider])
+
+    catalog = engine.events(events)
+
+    def jump(find):
+        def on_click(button):
+            step = find(slider.value)
+            if step is not None:
+                slider.value = step
+
+        return on_click
+
+    previous_event = widgets.Button(icon="step-backward", tooltip="Previous event")
+    previous_event.on_click(jump(catalog.previous))
+    next_event = widgets.Button(icon="step-forward", tooltip="Next event")
+    next_event.on_click(jump(catalog.next))
+    return widgets.HBox([play, previous_event, slider, next_event])
 
 
-def show_ui(engine: Engine, plotter: pv.BasePlotter, continuous_update=True):
+def show_ui(
+    engine: Engine, plotter: pv.BasePlotter, continuous_update=True, events=None
+):
+    import ipywidgets as widgets
+
     iframe = plotter.show(
         return_viewer=True, jupyter_kwargs={"height": "600px", "width": "99%"}
     )
-    controls = time_controls(engine, plotter, continuous_update=continuous_update)
+    controls = time_controls(
+        engine, plotter, continuous_update=continuous_update, events=events
+    )
     return widgets.VBox([iframe, controls])
 
 
-def save_movie(engine: Engine, plotter: pv.BasePlotter, filename: str, **kwargs):
+def save_movie(
+    engine: Engine,
+    plotter: pv.BasePlotter,
+    filename: str,
+    times=None,
+    queue_size=4,
+    report=False,
+    **kwargs,
+):
+    """Write a movie of the plotter over time.
+
+    ``times`` defaults to every stored time step. Fractional times are
+    interpolated by the engine (e.g. ``np.arange(0, 100, 0.25)`` for
+    four frames per stored step). ``times=engine.events(name).steps``
+    renders only the steps where ``name`` jumps.
+
+    Loading data, rendering and encoding run as a pipeline (see
+    :func:`kale.render.write_movie_pipelined`). With ``report=True``,
+    the time spent in each stage is printed at the end.
+    """
+    from tqdm import tqdm
+
+    from kale.render import write_movie_pipelined
+
+    if times is None:
+        times = range(engine.max_time_step)
     plotter.open_movie(filename, **kwargs)
-    for tstep in tqdm(range(engine.max_time_step)):
-        engine.time_step = tstep
-        plotter.write_frame()
+    with tqdm(total=len(times)) as bar:
+        timer = write_movie_pipelined(
+            engine,
+            plotter,
+            times,
+            plotter.mwriter,
+            queue_size=queue_size,
+            progress=bar.update,
+        )
     plotter.mwriter.close()  # close out writer (internal API)
+    if report:
+        print(timer.report())
     return filename
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import pyvista as pv
+import xarray as xr
+
+
+@pytest.fixture
+def mesh_filename(tmp_path):
+    mesh = pv.Plane(i_resolution=6, j_resolution=5).triangulate()
+    mesh = mesh.cast_to_unstructured_grid()
+    mesh.clear_data()
+    filename = tmp_path / "mesh.vtk"
+    mesh.save(filename)
+    return filename
+
+
+@pytest.fixture
+def make_data(tmp_path, mesh_filename):
+    """Write a data file of ``n_steps`` random steps on the test mesh."""
+    n_cells = pv.read(mesh_filename).n_cells
+
+    def make_data(name="data", n_steps=10, seed=0):
+        rng = np.random.default_rng(seed)
+        jumps = (rng.random((n_steps, n_cells)) < 0.2) * rng.random((n_steps, n_cells))
+        ds = xr.Dataset(
+            {
+                "cumulative_slip": (("time", "cell"), np.cumsum(jumps, axis=0)),
+                "geometric_moment": (("time", "cell"), rng.random((n_steps, n_cells))),
+            }
+        )
+        filename = tmp_path / f"{name}.hdf"
+        ds.to_netcdf(filename, engine="netcdf4")
+        return filename
+
+    return make_data
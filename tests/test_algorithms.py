@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import pyvista
+
+from kale.algorithms import FieldExpressionAlgorithm, field_expression_algorithm
+
+
+@pytest.fixture
+def mesh():
+    mesh = pyvista.Plane(i_resolution=4, j_resolution=5)
+    mesh.point_data["slip"] = np.linspace(0.0, 1.0, mesh.n_points)
+    return mesh
+
+
+def test_field_expression_defaults_to_numpy(mesh):
+    efilter = field_expression_algorithm(mesh, {"log_slip": "log10(slip + 1)"})
+    assert efilter.backend == "numpy"
+    efilter.Update()
+    out = pyvista.wrap(efilter.GetOutputDataObject(0))
+    np.testing.assert_allclose(out["log_slip"], np.log10(mesh["slip"] + 1))
+
+
+def test_field_expression_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="backend"):
+        FieldExpressionAlgorithm({"a": "slip"}, backend="numba")
+
+
+def test_field_expression_rejects_unknown_variable():
+    efilter = FieldExpressionAlgorithm({"a": "sqrt(slip) + ones(3)"})
+    with pytest.raises(ValueError, match="`ones`"):
+        efilter._evaluate_numpy({"slip": np.ones(3)}, 3)
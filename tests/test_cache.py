@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from kale.cache import GeometryCache
+
+
+def test_geometry_cache_put_removes_partial_files(tmp_path, monkeypatch):
+    cache = GeometryCache(tmp_path)
+
+    def savez(file, **arrays):
+        file.write(b"partial")
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(np, "savez", savez)
+    for key in ("a", "b", "c"):
+        with pytest.warns(UserWarning, match="Unable to write"):
+            cache.put(key, dict(points=np.zeros(3)))
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.setattr(np, "savez", lambda file, **arrays: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        cache.put("d", dict(points=np.zeros(3)))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_geometry_cache_round_trip(tmp_path):
+    cache = GeometryCache(tmp_path)
+    cache.put("a", dict(points=np.arange(3.0)))
+    assert "a" in cache
+    np.testing.assert_array_equal(cache.get("a")["points"], np.arange(3.0))
+    assert cache.get("b") is None
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import pyvista as pv
+from vtkmodules.vtkCommonExecutionModel import vtkTrivialProducer
+
+from kale.algorithms import contour_banded, contour_banded_static
+
+
+@pytest.fixture
+def surface():
+    surface = pv.Plane(i_resolution=12, j_resolution=9).triangulate()
+    x, y = surface.points[:, 0], surface.points[:, 1]
+    surface.point_data["f"] = np.sin(3 * x) + y**2
+    producer = vtkTrivialProducer()
+    producer.SetOutput(surface)
+    return producer
+
+
+def band_areas(bands):
+    """Area of each band by its value, ignoring empty bands."""
+    bands = bands.compute_cell_sizes(length=False, volume=False)
+    values = bands.cell_data.active_scalars
+    areas = {}
+    for value in np.unique(values):
+        area = bands["Area"][values == value].sum()
+        if area > 0:
+            areas[float(value)] = area
+    return areas
+
+
+def contour(function, surface, levels, clipping):
+    bands, edges = function(surface, levels, "f", clipping=clipping)
+    bands.Update()
+    edges.Update()
+    return (
+        pv.wrap(bands.GetOutputDataObject(0)),
+        pv.wrap(edges.GetOutputDataObject(0)),
+    )
+
+
+@pytest.mark.parametrize("clipping", [False, True])
+def test_triangle_bands_match_vtk(surface, clipping):
+    levels = np.linspace(-0.8, 1.0, 6)
+    vtk_bands, vtk_edges = contour(contour_banded, surface, levels, clipping)
+    bands, edges = contour(contour_banded_static, surface, levels, clipping)
+
+    expected = band_areas(vtk_bands)
+    areas = band_areas(bands)
+    assert list(areas) == pytest.approx(list(expected))
+    np.testing.assert_allclose(list(areas.values()), list(expected.values()), rtol=1e-6)
+    assert bands.area == pytest.approx(vtk_bands.area, rel=1e-6)
+    if clipping:
+        assert bands.area < pv.wrap(surface.GetOutputDataObject(0)).area
+
+    def length(edges):
+        return edges.compute_cell_sizes(area=False, volume=False)["Length"].sum()
+
+    assert length(edges) == pytest.approx(length(vtk_edges), rel=1e-6)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from kale.events import EventIndex, detect_events
+
+
+@pytest.fixture
+def variable():
+    values = np.zeros((8, 5))
+    values[1:, 2] += 1.0
+    # Starts a chunk of two steps, its jump is taken across the boundary
+    values[2:, [0, 4]] += 0.5
+    values[4:, 1] += 0.05
+    values[7:, 3] += 2.0
+    return values
+
+
+@pytest.mark.parametrize("chunk_steps", [None, 1, 2, 3])
+def test_detect_events(variable, chunk_steps):
+    catalog = detect_events(variable, threshold=0.1, chunk_steps=chunk_steps)
+    np.testing.assert_array_equal(catalog.steps, [1, 2, 7])
+    np.testing.assert_array_equal(catalog.n_cells, [1, 2, 1])
+    np.testing.assert_array_equal(catalog.cells_of(0), [2])
+    np.testing.assert_array_equal(catalog.cells_of(1), [0, 4])
+    np.testing.assert_array_equal(catalog.cells_of(2), [3])
+    np.testing.assert_allclose(catalog.max_jump, [1.0, 0.5, 2.0])
+    np.testing.assert_allclose(catalog.total_jump, [1.0, 1.0, 2.0])
+
+
+def test_detect_events_filters(variable):
+    np.testing.assert_array_equal(
+        detect_events(variable, chunk_steps=2).steps, [1, 2, 4, 7]
+    )
+    np.testing.assert_array_equal(
+        detect_events(variable, min_cells=2, chunk_steps=2).steps, [2]
+    )
+    assert len(detect_events(variable, threshold=5.0)) == 0
+
+    catalog = detect_events(variable)
+    np.testing.assert_array_equal(catalog.select(start=2, stop=7), [2, 4])
+    np.testing.assert_array_equal(catalog.select(min_magnitude=1.0), [1, 2, 7])
+
+
+def test_event_catalog_navigation(variable):
+    catalog = detect_events(variable, threshold=0.1)
+    assert catalog.next(0) == 1
+    assert catalog.next(1) == 2
+    assert catalog.next(6) == 7
+    assert catalog.next(7) is None
+    assert catalog.previous(0) is None
+    assert catalog.previous(1) is None
+    assert catalog.previous(2) == 1
+    assert catalog.previous(100) == 7
+
+
+def test_event_index_invalidation(tmp_path, variable):
+    data_filename = tmp_path / "data.hdf"
+    data_filename.write_bytes(b"data")
+    index = EventIndex(data_filename)
+    catalog = detect_events(variable, threshold=0.1)
+    index.put("slip", catalog, threshold=0.1, min_cells=1)
+    assert index.filename("slip").exists()
+
+    cached = EventIndex(data_filename).get("slip", threshold=0.1, min_cells=1)
+    np.testing.assert_array_equal(cached.steps, catalog.steps)
+    np.testing.assert_array_equal(cached.cells, catalog.cells)
+    assert index.get("slip", threshold=0.2, min_cells=1) is None
+    assert index.get("slip", threshold=0.1, min_cells=2) is None
+    assert index.get("other", threshold=0.1, min_cells=1) is None
+
+    stat = data_filename.stat()
+    os.utime(data_filename, (stat.st_atime, stat.st_mtime + 10))
+    assert index.get("slip", threshold=0.1, min_cells=1) is None
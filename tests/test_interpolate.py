@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from kale import Engine, interpolate
+
+
+@pytest.fixture
+def engine(mesh_filename, make_data):
+    engine = Engine(mesh_filename, make_data())
+    yield engine
+    engine.close()
+
+
+def test_fractional_time_reproduces_stored_steps(engine):
+    for time in (0, 2.5, 3, 7.25, engine.max_time_step):
+        engine.time = time
+    for step in (4, 0, engine.max_time_step):
+        engine.time = float(step)
+        assert engine.time_step == step
+        for name in engine.keys:
+            np.testing.assert_array_equal(
+                engine.mesh[name], engine.get_variable(name, step)
+            )
+    with pytest.raises(ValueError):
+        engine.time = engine.max_time_step + 0.5
+
+
+def test_linear_interpolation(engine):
+    engine.interpolation = "linear"
+    for time in (2.25, 5.5, 8.75):
+        engine.time = time
+        step, frac = int(time), time - int(time)
+        assert engine.time_step == step
+        for name in engine.keys:
+            a = engine.get_variable(name, step)
+            b = engine.get_variable(name, step + 1)
+            np.testing.assert_allclose(engine.mesh[name], (1 - frac) * a + frac * b)
+
+
+def test_cubic_interpolation_does_not_overshoot(engine):
+    engine.interpolation = "cubic"
+    name = "cumulative_slip"
+    for step in range(engine.max_time_step):
+        a = engine.get_variable(name, step)
+        b = engine.get_variable(name, step + 1)
+        previous = a
+        for frac in np.linspace(0.1, 0.9, 9):
+            engine.time = step + frac
+            values = engine.mesh[name]
+            # Monotone data stays monotone and within the stored values
+            assert np.all(values >= a - 1e-12) and np.all(values <= b + 1e-12)
+            assert np.all(values >= previous - 1e-12)
+            previous = values
+
+
+def test_cubic_coefficients_interpolate_end_points():
+    rng = np.random.default_rng(0)
+    p = np.cumsum(rng.random((4, 50)), axis=0)
+    coefficients = interpolate.cubic_coefficients(*p)
+    np.testing.assert_allclose(interpolate.evaluate(coefficients, 0.0), p[1])
+    np.testing.assert_allclose(interpolate.evaluate(coefficients, 1.0), p[2])
+    s = np.linspace(0, 1, 11)[:, None]
+    values = interpolate.evaluate(coefficients, s)
+    assert np.all(np.diff(values, axis=0) >= -1e-12)
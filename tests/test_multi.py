@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from kale import MultiEngine
+
+
+@pytest.fixture
+def data_filenames(make_data):
+    return dict(
+        a=make_data("a", n_steps=10, seed=0), b=make_data("b", n_steps=7, seed=1)
+    )
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_difference_of_runs(mesh_filename, data_filenames, lazy):
+    engine = MultiEngine(mesh_filename, data_filenames, lazy=lazy)
+    try:
+        assert engine.sources == ["a", "b"]
+        # The time range is that of the shorter run
+        assert engine.max_time_step == 6
+        keys = engine.add_difference("a", "b")
+        assert keys == ["a-b/cumulative_slip", "a-b/geometric_moment"]
+        engine.set_active_scalars(keys[0])
+        # Revisited steps come from the step cache
+        for step in (0, 3, 6, 3):
+            engine.time_step = step
+            for key in keys:
+                variable = key.split("/")[1]
+                expected = engine.get_variable(f"a/{variable}") - engine.get_variable(
+                    f"b/{variable}"
+                )
+                np.testing.assert_array_equal(engine.get_variable(key), expected)
+                if not lazy or key == keys[0]:
+                    np.testing.assert_array_equal(engine.mesh[key], expected)
+        with pytest.raises(ValueError):
+            engine.time_step = 7
+    finally:
+        engine.close()
+
+
+def test_difference_errors(mesh_filename, data_filenames):
+    engine = MultiEngine(mesh_filename, data_filenames)
+    try:
+        with pytest.raises(ValueError, match="Unknown source"):
+            engine.add_difference("a", "c")
+        with pytest.raises(ValueError, match="Invalid difference name"):
+            engine.add_difference("a", "b", name="a")
+    finally:
+        engine.close()
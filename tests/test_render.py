@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+import pyvista as pv
+
+from kale.render import load_panel_data, write_movie_pipelined
+
+
+class FakeEngine:
+    time = 0
+
+    def preload(self, time):
+        pass
+
+
+class FakePlotter:
+    _first_time = False
+    image = np.zeros((2, 2, 3), dtype=np.uint8)
+
+    def render(self):
+        pass
+
+
+class FailingWriter:
+    def append_data(self, image):
+        raise RuntimeError("encoder failed")
+
+
+def test_write_movie_pipelined_reraises_encoder_error():
+    errors = []
+
+    def run():
+        try:
+            write_movie_pipelined(
+                FakeEngine(), FakePlotter(), range(50), FailingWriter(), queue_size=1
+            )
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "write_movie_pipelined hung"
+    assert len(errors) == 1 and str(errors[0]) == "encoder failed"
+
+
+def test_write_movie_pipelined_writes_every_frame():
+    class Writer:
+        frames = 0
+
+        def append_data(self, image):
+            self.frames += 1
+
+    writer = Writer()
+    timer = write_movie_pipelined(
+        FakeEngine(), FakePlotter(), range(20), writer, queue_size=1
+    )
+    assert writer.frames == timer.frames == 20
+
+
+class PanelEngine:
+    """Lazy engine whose mesh holds the step number in each requested array."""
+
+    def __init__(self):
+        self.time = 3
+        self.requested = {"a"}
+        self.mesh = pv.Plane(i_resolution=2, j_resolution=2)
+        self.algorithm = self
+
+    @property
+    def active_keys(self):
+        return sorted(self.requested)
+
+    def request(self, *names):
+        self.requested.update(names)
+
+    def release(self, *names):
+        self.requested.difference_update(names)
+
+    def Update(self):
+        self.mesh.clear_data()
+        for name in self.requested:
+            self.mesh.cell_data[name] = np.full(self.mesh.n_cells, self.time)
+
+    def GetOutputDataObject(self, port):
+        return self.mesh
+
+
+def test_load_panel_data_restores_engine():
+    engine = PanelEngine()
+    panels = [dict(time=0, scalars="a"), dict(time=5, scalars="b")]
+    _, values = load_panel_data(engine, panels)
+    assert values[0, "a"][0] == 0 and values[5, "b"][0] == 5
+    assert engine.time == 3
+    assert engine.requested == {"a"}
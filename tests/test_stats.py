@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+
+from kale.stats import StatisticsCache, streaming_statistics
+
+
+def test_streaming_statistics_large_mean_small_spread():
+    rng = np.random.default_rng(0)
+    values = 1e8 + rng.standard_normal((50, 40)) * 1e-3
+    values[3, 5] = np.nan
+    stats = streaming_statistics(values, chunk_steps=7)
+
+    finite = values[np.isfinite(values)]
+    assert stats["count"] == finite.size
+    np.testing.assert_allclose(stats["mean"], finite.mean(), rtol=1e-14)
+    np.testing.assert_allclose(stats["std"], finite.std(), rtol=1e-6)
+
+
+def test_statistics_cache_invalidated_by_store_files(tmp_path):
+    store = tmp_path / "store"
+    store.mkdir()
+    (store / "kale.json").write_text("{}")
+    chunk = store / "slip.npy"
+    chunk.write_bytes(b"\0" * 16)
+    cache = StatisticsCache(store)
+    cache.put("slip", "full", dict(min=0.0))
+    assert StatisticsCache(store).get("slip", "full") == dict(min=0.0)
+
+    # Rewriting a file leaves the directory's own mtime and size unchanged
+    stat = store.stat()
+    os.utime(chunk, (stat.st_atime + 10, stat.st_mtime + 10))
+    os.utime(store, (stat.st_atime, stat.st_mtime))
+    assert StatisticsCache(store).get("slip", "full") is None
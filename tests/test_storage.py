@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from kale.storage import convert, convert_delta, convert_memmap, open_dataset
+
+
+@pytest.fixture
+def data_filename(tmp_path):
+    rng = np.random.default_rng(0)
+    slip = np.cumsum(rng.random((20, 30)) * (rng.random((20, 30)) > 0.8), axis=0)
+    ds = xr.Dataset(
+        dict(
+            cumulative_slip=(("time", "cell"), slip),
+            geometric_moment=(("time", "cell"), rng.random((20, 30))),
+        ),
+        attrs=dict(title="test"),
+    )
+    filename = tmp_path / "data.nc"
+    ds.to_netcdf(filename, engine="netcdf4")
+    return filename
+
+
+@pytest.mark.parametrize("store", [convert_memmap, convert_delta])
+def test_convert_from_store_round_trip(tmp_path, data_filename, store):
+    kwargs = dict(dtype="float64") if store is convert_memmap else {}
+    store_dirname = store(data_filename, tmp_path / "store", **kwargs)
+    output = convert(store_dirname, tmp_path / "converted.nc")
+
+    src = open_dataset(data_filename)
+    dst = open_dataset(output)
+    try:
+        assert sorted(dst.keys()) == sorted(src.keys())
+        assert dst.attrs["title"] == "test"
+        for name in src.keys():
+            assert dst[name].dims == ("time", "cell")
+            np.testing.assert_array_equal(dst[name].values, src[name].values)
+    finally:
+        src.close()
+        dst.close()
+
+
+def write_dataset(filename, **variables):
+    ds = xr.Dataset(
+        {name: (("time", "cell"), values) for name, values in variables.items()}
+    )
+    ds.to_netcdf(filename, engine="netcdf4")
+    return filename
+
+
+def test_delta_store_exact_out_of_order(tmp_path, data_filename):
+    store = open_dataset(
+        convert_delta(data_filename, tmp_path / "store", keyframe_interval=4)
+    )
+    src = open_dataset(data_filename)
+    try:
+        slip = store["cumulative_slip"]
+        expected = src["cumulative_slip"].values
+        assert slip.keyframe_interval == 4
+        for step in (7, 3, 3, 12, 19, 0, 8, 9, 5, -1):
+            np.testing.assert_array_equal(slip[step], expected[step])
+        np.testing.assert_array_equal(slip[2:15:3], expected[2:15:3])
+        np.testing.assert_array_equal(slip.values, expected)
+    finally:
+        src.close()
+        store.close()
+
+
+def test_delta_store_tolerance_does_not_drift(tmp_path):
+    tolerance = 0.1
+    rng = np.random.default_rng(1)
+    # Every step changes by less than the tolerance, so errors would
+    # accumulate if deltas were taken against the previous source step
+    drift = np.cumsum(rng.uniform(0.0, 0.3 * tolerance, (24, 40)), axis=0)
+    data_filename = write_dataset(tmp_path / "drift.nc", drift=drift)
+    store = open_dataset(
+        convert_delta(
+            data_filename, tmp_path / "store", keyframe_interval=8, tolerance=tolerance
+        )
+    )
+    try:
+        var = store["drift"]
+        assert var.keyframe_interval == 8
+        error = np.abs(var.values - drift)
+        assert error.max() <= tolerance
+        # Keyframes are exact
+        np.testing.assert_array_equal(error[::8], 0)
+        assert var.nbytes < drift.nbytes
+    finally:
+        store.close()
+
+
+def test_delta_store_dense_fallback(tmp_path, data_filename):
+    store = open_dataset(
+        convert_delta(data_filename, tmp_path / "store", keyframe_interval=4)
+    )
+    src = open_dataset(data_filename)
+    try:
+        # Every cell changes on every step, keyframes alone are smaller
+        moment = store["geometric_moment"]
+        assert moment.keyframe_interval == 1
+        assert moment._offsets[-1] == 0
+        np.testing.assert_array_equal(moment.values, src["geometric_moment"].values)
+    finally:
+        src.close()
+        store.close()